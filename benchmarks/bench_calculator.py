@@ -0,0 +1,116 @@
+"""Benchmark for the calculator engine on very long expressions.
+
+Tracks tokens per second and peak traced memory across expression sizes and number modes,
+both for a fully materialized expression string and for the chunked streaming path.
+
+Usage:
+    python benchmarks/bench_calculator.py
+    python benchmarks/bench_calculator.py --sizes 1000 100000 --modes float --json bench_output.json
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from argparse import Namespace
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+from ai_agent.calculator.pkg.calculator import NUMBER_MODES, Calculator
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+CHUNK_SIZE = 64 * 1024
+OPERATORS = ("+", "-", "*", "/")
+
+
+class BenchArgs(Namespace):
+    """Typing information for arguments."""
+
+    sizes: list[int]
+    modes: list[str]
+    json: str | None
+
+    def __init__(self) -> None:
+        """Initialize the namespace, setting defaults for type checkers."""
+        super().__init__()
+        self.sizes = DEFAULT_SIZES
+        self.modes = list(NUMBER_MODES)
+        self.json = None
+
+
+def generate_chunks(tokens: int) -> Iterator[str]:
+    """Generates an expression of roughly `tokens` tokens in CHUNK_SIZE pieces without building it whole.
+
+    Args:
+        tokens: approximate number of tokens in the expression
+
+    Yields:
+        str: consecutive pieces of the expression
+    """
+    buffer: list[str] = ["1"]
+    size = 1
+    for i in range(1, tokens // 2 + 1):
+        # operands stay small and non-zero so no mode overflows or divides by zero
+        piece = f" {OPERATORS[i % 4]} {i % 9 + 1}"
+        buffer.append(piece)
+        size += len(piece)
+        if size >= CHUNK_SIZE:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def measure(run: Callable[[], object]) -> tuple[float, int]:
+    """Times a run, then repeats it under tracemalloc to get the peak traced memory.
+
+    Args:
+        run: the workload to measure
+
+    Returns:
+        tuple[float, int]: elapsed seconds of the untraced run and peak traced bytes.
+    """
+    start = time.perf_counter()
+    _ = run()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    _ = run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main() -> None:
+    """Runs the benchmark and prints a table of results."""
+    parser = argparse.ArgumentParser(description="Calculator engine benchmark.")
+    _ = parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Token counts to run.")
+    _ = parser.add_argument("--modes", nargs="+", choices=list(NUMBER_MODES), default=list(NUMBER_MODES))
+    _ = parser.add_argument("--json", type=str, help="Also write the results to this JSON file.")
+    args = parser.parse_args(namespace=BenchArgs())
+
+    results: list[dict[str, object]] = []
+    print(f"{'mode':<9} {'path':<9} {'tokens':>10} {'tokens/s':>12} {'peak KiB':>10}")
+    for mode in args.modes:
+        calculator = Calculator(mode)
+        for size in args.sizes:
+            expression = "".join(generate_chunks(size))
+            tokens = expression.count(" ") + 1
+            runs: dict[str, Callable[[], object]] = {
+                "string": lambda c=calculator, e=expression: c.evaluate(e),
+                "stream": lambda c=calculator, s=size: c.evaluate_chunks(generate_chunks(s)),
+            }
+            for path, run in runs.items():
+                elapsed, peak = measure(run)
+                rate = tokens / elapsed if elapsed else float("inf")
+                print(f"{mode:<9} {path:<9} {tokens:>10} {rate:>12,.0f} {peak / 1024:>10,.1f}")
+                results.append(
+                    {"mode": mode, "path": path, "tokens": tokens, "tokens_per_second": rate, "peak_bytes": peak}
+                )
+
+    if args.json:
+        _ = Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,18 @@
 """Entry point for boot_dev submissions."""
 
 import argparse
+import contextlib
 import logging
+import time
 from argparse import Namespace
+from pathlib import Path
 
-from ai_agent.agent import run_agent
-from ai_agent.constants import LOG_FILENAME, LOG_LEVEL
+from ai_agent.constants import STATE_DIRECTORY, WORKING_DIRECTORY
 from ai_agent.exceptions import ApiKeyError
+from ai_agent.logging_config import configure_logging
+from ai_agent.profiling import Profiler
 
-logging.basicConfig(
-    filename=LOG_FILENAME,
-    filemode="a",
-    level=getattr(logging, LOG_LEVEL),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+_ = configure_logging()
 
 logger = logging.getLogger(__name__)
 
@@ -23,19 +22,56 @@ class AiArgs(Namespace):
 
     prompt: str = ""
     verbose: bool = False
+    profile: str | None = None
+    resume: str | None = None
+    rollback: str | None = None
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="AI Agent CLI")
-    _ = parser.add_argument("prompt", type=str, help="The prompt for the AI agent.")
+    _ = parser.add_argument(
+        "prompt", type=str, nargs="?", help="The prompt for the AI agent."
+    )
     _ = parser.add_argument(
         "-v", "--verbose", action="store_true", help="Enable verbose output."
     )
+    _ = parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=str(Path(STATE_DIRECTORY, "profiles", time.strftime("%Y%m%d-%H%M%S"))),
+        metavar="DIR",
+        help="Profile CPU time and memory of the run and write reports to DIR.",
+    )
+    _ = parser.add_argument(
+        "--resume",
+        metavar="ID",
+        help="Continue the saved session ID, asking the prompt as a follow-up.",
+    )
+    _ = parser.add_argument(
+        "--rollback",
+        nargs="?",
+        const="",
+        metavar="ID",
+        help="Undo the agent's writes back to before checkpoint ID, or list the checkpoints.",
+    )
 
     try:
         args = parser.parse_args(namespace=AiArgs())
-        logger.info(f"Arguments received: {args}")
-        run_agent(args.prompt, verbose=args.verbose)
+        logger.info("Arguments received: %s", args)
+        if args.rollback is not None:
+            from ai_agent.functions.rollback_workspace import rollback_workspace
+
+            print(rollback_workspace(WORKING_DIRECTORY, args.rollback))
+        else:
+            if not args.prompt:
+                parser.error("the following arguments are required: prompt")
+            with Profiler(args.profile) if args.profile else contextlib.nullcontext():
+                # imported here so that --profile also covers tool discovery and schema generation
+                from ai_agent.agent import run_agent
+
+                run_agent(args.prompt, verbose=args.verbose, resume=args.resume)
+            if args.profile:
+                print(f"Profile written to {args.profile}")
     except ApiKeyError:
         logger.exception("make sure you have an API key")
     except SystemExit:
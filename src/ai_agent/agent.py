@@ -3,6 +3,9 @@
 import logging
 import os
 import sys
+import uuid
+from contextvars import ContextVar
+from typing import NamedTuple
 
 from dotenv import load_dotenv
 from google import genai
@@ -13,10 +16,37 @@ from ai_agent.constants import (
     EXCLUDED_FUNCTION_MODULES,
     MAX_ITERATIONS,
     MODEL_NAME,
+    PARTIAL_ANSWER_PROMPT,
+    RETRIEVAL_ENABLED,
+    TIMEOUT_HINT,
     WORKING_DIRECTORY,
 )
 from ai_agent.discovery import discover_tools, generate_schema
-from ai_agent.exceptions import ApiKeyError, FunctionError
+from ai_agent.dispatch import DISPATCHER, check_cancelled
+from ai_agent.exceptions import (
+    ApiKeyError,
+    ArgumentValidationError,
+    BudgetExceededError,
+    FunctionError,
+    IterationLimitError,
+    LoopDetectedError,
+    PluginLoadError,
+    SessionNotFoundError,
+    ToolTimeoutError,
+)
+from ai_agent.exec_cache import EXEC_CACHE
+from ai_agent.history import PayloadStore, compact_history, history_chars
+from ai_agent.kernel import shutdown_kernels
+from ai_agent.logging_config import ITERATION, log_context
+from ai_agent.loop_guard import LoopGuard
+from ai_agent.output_budget import CURRENT_BUDGET, OutputBudget
+from ai_agent.prefetch import PREFETCHER
+from ai_agent.profiling import mark_iteration
+from ai_agent.retrieval import build_context
+from ai_agent.router import CURRENT_ROUTER, ToolRouter
+from ai_agent.sessions import SESSION_STORE, SessionLog
+from ai_agent.usage import BudgetDecision, UsageLedger
+from ai_agent.validation import compile_validators
 
 logger = logging.getLogger(__name__)
 
@@ -25,51 +55,263 @@ DISCOVERED_TOOLS = discover_tools(exclude=EXCLUDED_FUNCTION_MODULES)
 AVAILABLE_FUNCTIONS = types.Tool(
     function_declarations=generate_schema(DISCOVERED_TOOLS, banned_args=["working_directory"])
 )
+TOOL_VALIDATORS = compile_validators(DISCOVERED_TOOLS, injected_args=["working_directory"])
+
+
+class SessionContext(NamedTuple):
+    """State shared by the tools of one running session.
+
+    Attributes:
+        client: ai client the session uses. Sub-agents share it.
+        ledger: usage ledger of the session.
+        depth: 0 for a top level session, 1 for a sub-agent started by delegate.
+        session_id: id stamped on the session's log records.
+    """
+
+    client: genai.Client
+    ledger: UsageLedger
+    depth: int = 0
+    session_id: str = "-"
+
+
+CURRENT_SESSION: ContextVar[SessionContext | None] = ContextVar("CURRENT_SESSION", default=None)
 
 
-def run_agent(user_prompt: str, verbose: bool) -> None:
+def run_agent(user_prompt: str, verbose: bool, client: genai.Client | None = None, resume: str | None = None) -> None:
     """Main driver for AI agent project.
 
     Cli application to interact with an LLM in the terminal.
+    With RETRIEVAL_ENABLED, snippets of the working directory that match the prompt are sent with it.
+    Token usage is tracked for the whole session. Before each request the next prompt size is projected;
+    if it would exceed MAX_SESSION_TOKENS or MAX_SESSION_COST the history is compacted, and if that is not
+    enough the session stops early. Totals are reported when the session ends.
+    With SESSION_LOG_ENABLED the session is logged as it runs, and can be continued later with `resume`.
 
     Args:
         user_prompt (str): Prompt to ask the AI.
         verbose (bool): Set to true if you want token stats in your response.
+        client: ai client to use. Defaults to a Gemini client built from GEMINI_API_KEY.
+        resume: id of a logged session to continue; the prompt is asked as a follow-up to its history.
     """
-    system_prompt = generate_system_prompt()
-
     if verbose:
         print(f"User prompt: {user_prompt}")
 
-    _ = load_dotenv()
-    api_key = os.environ.get("GEMINI_API_KEY")
-    if not api_key:
-        raise ApiKeyError
-    client = genai.Client(api_key=api_key)
+    if client is None:
+        client = create_client()
+
+    context = ""
+    if RETRIEVAL_ENABLED:
+        context = build_context(user_prompt, WORKING_DIRECTORY)
+        if verbose and context:
+            print(f"Retrieved {context.count('--- ')} snippets for the first prompt")
+
+    session_id = resume or uuid.uuid4().hex[:8]
+    try:
+        history, log = _open_session_log(session_id, resume=bool(resume))
+    except SessionNotFoundError as e:
+        print(e)
+        return
+
+    ledger = UsageLedger()
+    try:
+        final_response = run_session(
+            client,
+            user_prompt,
+            verbose,
+            ledger=ledger,
+            context=context,
+            session_id=session_id,
+            history=history,
+            log=log,
+        )
+        print("Final response:")
+        print(final_response)
+    except IterationLimitError as e:
+        print(e)
+        sys.exit(1)
+    except BudgetExceededError as e:
+        print(e)
+    finally:
+        _report_usage(ledger, verbose)
+        if log is not None and log.logged:
+            print(f"Session saved as {session_id}; continue it with --resume {session_id}")
+
+
+def _open_session_log(session_id: str, resume: bool) -> tuple[list[types.Content], SessionLog | None]:
+    """Returns the history to continue and the log to append to; no log when session logs are disabled."""
+    if SESSION_STORE is None:
+        if resume:
+            raise SessionNotFoundError(session_id)
+        return [], None
+    if resume:
+        return SESSION_STORE.resume(session_id)
+    return [], SESSION_STORE.open(session_id)
+
+
+def _report_usage(ledger: UsageLedger, verbose: bool) -> None:
+    """Logs the session's usage and cache counters, and prints them when verbose."""
+    summaries = [DISPATCHER.summary(), *(cache.summary() for cache in (PREFETCHER, EXEC_CACHE) if cache)]
+    logger.info("Session usage:\n%s", ledger.summary())
+    for summary in summaries:
+        logger.info(summary)
+    if verbose:
+        print("Session usage:")
+        print(ledger.summary())
+        for summary in summaries:
+            print(summary)
+
+
+def run_session(  # noqa: PLR0913
+    client: genai.Client,
+    user_prompt: str,
+    verbose: bool,
+    *,
+    ledger: UsageLedger | None = None,
+    tools: types.Tool | None = None,
+    max_iterations: int = MAX_ITERATIONS,
+    depth: int = 0,
+    context: str = "",
+    session_id: str | None = None,
+    history: list[types.Content] | None = None,
+    log: SessionLog | None = None,
+) -> str:
+    """Runs the model/tool loop for one prompt until the model gives a final answer.
+
+    If the model keeps repeating the same tool calls after being warned, the session stops early and returns
+    a partial answer the model writes without tools. Each turn offers the tools the router picks for it, and
+    the system prompt lists only those.
 
+    Args:
+        client: ai client used to generate content
+        user_prompt: Prompt to ask the AI.
+        verbose: set to True for stats for nerds.
+        ledger: usage ledger to record into. Its ceilings apply to this session.
+        tools: catalogue of tools the model may use. Defaults to AVAILABLE_FUNCTIONS.
+        max_iterations: maximum number of model calls.
+        depth: 0 for a top level session, 1 for a sub-agent.
+        context: retrieved snippets sent along with the prompt in the first message.
+        session_id: id stamped on log records of this session. Defaults to a new random id.
+        history: earlier messages of a resumed session; the prompt is appended to them.
+        log: session log new messages are appended to after every turn.
+
+    Returns:
+        str: the model's final response.
+
+    Raises:
+        IterationLimitError: if there is no final response after max_iterations model calls.
+        BudgetExceededError: if the next request would exceed the ledger's ceilings.
+        ToolCancelledError: if the session runs inside a tool call that was cancelled, e.g. a sub-agent.
+    """
+    tools = AVAILABLE_FUNCTIONS if tools is None else tools
+    ledger = UsageLedger() if ledger is None else ledger
+    payloads = PayloadStore()
+    guard = LoopGuard()
+    parts = [types.Part(text=user_prompt)]
+    if context:
+        parts.append(types.Part(text=f"Possibly relevant snippets from the working directory:\n{context}"))
     messages = [
-        types.Content(role="user", parts=[types.Part(text=user_prompt)]),
+        *(history or []),
+        types.Content(role="user", parts=parts),
     ]
+    router = ToolRouter(tools)
+    offered = router.select(messages)
+    system_prompt = generate_system_prompt(offered)
+
+    session_id = session_id or uuid.uuid4().hex[:8]
+    token = CURRENT_SESSION.set(SessionContext(client, ledger, depth, session_id))
+    router_token = CURRENT_ROUTER.set(router)
+    try:
+        with log_context(session_id, iteration=0):
+            for iteration in range(1, max_iterations + 1):
+                _ = ITERATION.set(iteration)
+                mark_iteration(session_id, iteration)
+                # a sub-agent runs inside its delegate call: stop once nobody is waiting for the answer
+                check_cancelled()
+                if (selected := router.select(messages)) is not offered:
+                    offered, system_prompt = selected, generate_system_prompt(selected)
+                if not _fits_budget(ledger, messages, system_prompt):
+                    raise BudgetExceededError
+
+                try:
+                    final_response = generate_content(
+                        client, messages, system_prompt, verbose, ledger, tools=offered, payloads=payloads, guard=guard
+                    )
+                    if final_response:
+                        return final_response
+                except LoopDetectedError as e:
+                    print(e)
+                    return _partial_answer(client, messages, system_prompt, ledger, e)
+                except Exception as e:
+                    logger.exception("Error in generate_content")
+                    print(f"Error in generate_content: {e}")
+                finally:
+                    if log is not None:
+                        _ = log.sync(messages)
+    finally:
+        CURRENT_ROUTER.reset(router_token)
+        CURRENT_SESSION.reset(token)
+        shutdown_kernels(session_id)
+    raise IterationLimitError(max_iterations)
+
+
+def create_client() -> genai.Client:
+    """Creates a Gemini client from the GEMINI_API_KEY environment variable or .env file.
 
-    iters = 0
-    while True:
-        iters += 1
-        if iters > MAX_ITERATIONS:
-            print(f"Maximum iterations ({MAX_ITERATIONS}) reached.")
-            sys.exit(1)
-
-        try:
-            final_response = generate_content(client, messages, system_prompt, verbose)
-            if final_response:
-                print("Final response:")
-                print(final_response)
-                break
-        except Exception as e:
-            print(f"Error in generate_content: {e}")
-
-
-def generate_content(
-    client: genai.Client, messages: list[types.Content], system_prompt: str, verbose: bool
+    Returns:
+        genai.Client: the client.
+
+    Raises:
+        ApiKeyError: if no API key is configured.
+    """
+    _ = load_dotenv()
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if not api_key:
+        raise ApiKeyError
+    return genai.Client(api_key=api_key)
+
+
+def _fits_budget(ledger: UsageLedger, messages: list[types.Content], system_prompt: str) -> bool:
+    decision = ledger.check(MODEL_NAME, messages, system_prompt)
+    if decision is BudgetDecision.COMPACT:
+        _ = compact_history(messages)
+        decision = ledger.check(MODEL_NAME, messages, system_prompt, can_compact=False)
+    return decision is BudgetDecision.CONTINUE
+
+
+def _partial_answer(
+    client: genai.Client,
+    messages: list[types.Content],
+    system_prompt: str,
+    ledger: UsageLedger,
+    error: LoopDetectedError,
+) -> str:
+    """Asks the model, without tools, to answer with what it has found so far."""
+    messages.append(types.Content(role="user", parts=[types.Part(text=PARTIAL_ANSWER_PROMPT)]))
+    if not _fits_budget(ledger, messages, system_prompt):
+        return str(error)
+    prompt_chars = history_chars(messages, system_prompt)
+    try:
+        response = client.models.generate_content(  # pyright: ignore[reportUnknownMemberType]
+            model=MODEL_NAME, contents=messages, config=types.GenerateContentConfig(system_instruction=system_prompt)
+        )
+    except Exception:
+        logger.exception("Error asking for a partial answer")
+        return str(error)
+    if response.usage_metadata is not None:
+        ledger.record(MODEL_NAME, response.usage_metadata, prompt_chars)
+    return f"{response.text}\n\n({error})" if response.text else str(error)
+
+
+def generate_content(  # noqa: PLR0913
+    client: genai.Client,
+    messages: list[types.Content],
+    system_prompt: str,
+    verbose: bool,
+    ledger: UsageLedger | None = None,
+    *,
+    tools: types.Tool | None = None,
+    payloads: PayloadStore | None = None,
+    guard: LoopGuard | None = None,
 ) -> str | None:
     """Generate conent to display to the screen.
 
@@ -78,18 +320,28 @@ def generate_content(
         messages: message history
         system_prompt: Prompt to give the client
         verbose: set to True for stats for nerds.
+        ledger: session usage ledger the response's token counts are added to.
+        tools: tools offered to the model. Defaults to AVAILABLE_FUNCTIONS.
+        payloads: store of the session's tool payloads. If given, repeated results are replaced by references.
+        guard: loop guard of the session. If given, repeated calls are served from memory and loops escalate.
 
     Returns:
         final response
 
     Raises:
         FunctionError: raises  if function call result is empty or there was no function calls
+        LoopDetectedError: if the guard sees the model repeat itself after being warned.
     """
+    prompt_chars = history_chars(messages, system_prompt)
     response = client.models.generate_content(  # pyright: ignore[reportUnknownMemberType]
         model=MODEL_NAME,
         contents=messages,
-        config=types.GenerateContentConfig(system_instruction=system_prompt, tools=[AVAILABLE_FUNCTIONS]),
+        config=types.GenerateContentConfig(
+            system_instruction=system_prompt, tools=[AVAILABLE_FUNCTIONS if tools is None else tools]
+        ),
     )
+    if ledger is not None and response.usage_metadata is not None:
+        ledger.record(MODEL_NAME, response.usage_metadata, prompt_chars)
     if response.candidates:
         messages.extend([c.content for c in response.candidates if c.content])
     if verbose:
@@ -102,43 +354,68 @@ def generate_content(
     if not response.function_calls:
         return response.text
 
+    tool_message = types.Content(role="tool", parts=_call_functions(response.function_calls, verbose, guard))
+    if payloads is not None:
+        _ = payloads.dedupe(messages, tool_message)
+    messages.append(tool_message)
+    if guard is not None:
+        guard.check(tool_message)
+    return None
+
+
+def _call_functions(
+    function_calls: list[types.FunctionCall], verbose: bool, guard: LoopGuard | None = None
+) -> list[types.Part]:
+    """Calls the functions the model asked for in one turn, under one output budget."""
+    budget = OutputBudget()
     function_responses: list[types.Part] = []
-    for function_call_part in response.function_calls:
-        function_call_result = call_function(function_call_part, verbose)
+    for function_call_part in function_calls:
+        recalled = guard.recall(function_call_part) if guard is not None else None
+        function_call_result = recalled or call_function(function_call_part, verbose, budget)
         if not function_call_result.parts or not function_call_result.parts[0].function_response:
             raise FunctionError(function_call_part.name)
+        if guard is not None:
+            guard.record(function_call_part, function_call_result.parts[0].function_response.response or {})
         if verbose:
             print(f"-> {function_call_result.parts[0].function_response.response}")
         function_responses.append(function_call_result.parts[0])
 
     if not function_responses:
         raise FunctionError()
-
-    messages.append(types.Content(role="tool", parts=function_responses))
-    return None
+    return function_responses
 
 
-def generate_system_prompt() -> str:
+def generate_system_prompt(tools: types.Tool | None = None) -> str:
     """Generates the system promped based on available functions.
 
+    Args:
+        tools: tools to describe. Defaults to AVAILABLE_FUNCTIONS.
+
     Returns:
         string for the full system prompt
     """
-    if not AVAILABLE_FUNCTIONS.function_declarations:
+    tools = AVAILABLE_FUNCTIONS if tools is None else tools
+    if not tools.function_declarations:
         tool_descriptions = ["no functions available at this time"]
     else:
         tool_descriptions: list[str] = [
-            func.description.split("\n")[0] for func in AVAILABLE_FUNCTIONS.function_declarations if func.description
+            func.description.split("\n")[0] for func in tools.function_declarations if func.description
         ]
     return BASE_SYSTEM_PROMPT.format(tool_list="\n- ".join(tool_descriptions))
 
 
-def call_function(function_call_part: types.FunctionCall, verbose: bool = False) -> types.Content:
+def call_function(
+    function_call_part: types.FunctionCall, verbose: bool = False, budget: OutputBudget | None = None
+) -> types.Content:
     """Call function based on the function call part.
 
+    The tool runs on a worker thread under its deadline; if it does not finish in time the model gets a
+    structured timeout error instead of the session hanging.
+
     Args:
         function_call_part: The function call part containing the function name and arguments.
         verbose: If True, print additional information. Defaults to False.
+        budget: Output budget of the current turn. If given, the result is truncated to fit it.
 
     Returns:
         types.Content: Response from the function call.
@@ -159,11 +436,46 @@ def call_function(function_call_part: types.FunctionCall, verbose: bool = False)
             ],
         )
 
-    if function_call_part.args is None:
-        function_call_part.args = {}
-    function_call_part.args["working_directory"] = WORKING_DIRECTORY
+    try:
+        args = TOOL_VALIDATORS[function_call_part.name](function_call_part.args or {})
+    except ArgumentValidationError as e:
+        logger.warning(str(e))
+        return types.Content(
+            role="tool",
+            parts=[
+                types.Part.from_function_response(
+                    name=function_call_part.name,
+                    response={"error": str(e), "details": e.errors, "expected_arguments": e.expected},
+                )
+            ],
+        )
+
+    args["working_directory"] = WORKING_DIRECTORY
     func = DISCOVERED_TOOLS[function_call_part.name]
-    result = func(**function_call_part.args)
+    budget_token = CURRENT_BUDGET.set(budget)
+    try:
+        result = DISPATCHER.run(function_call_part.name, func, args)
+    except PluginLoadError as e:
+        logger.exception("Error in call_function:")
+        return types.Content(
+            role="tool",
+            parts=[types.Part.from_function_response(name=function_call_part.name, response={"error": str(e)})],
+        )
+    except ToolTimeoutError as e:
+        return types.Content(
+            role="tool",
+            parts=[
+                types.Part.from_function_response(
+                    name=function_call_part.name,
+                    response={"error": str(e), "timed_out": True, "timeout_seconds": e.timeout, "hint": TIMEOUT_HINT},
+                )
+            ],
+        )
+    finally:
+        CURRENT_BUDGET.reset(budget_token)
+
+    if budget is not None:
+        result = budget.apply(function_call_part.name, result)
 
     return types.Content(
         role="tool",
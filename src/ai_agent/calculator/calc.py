@@ -1,8 +1,12 @@
 """Calculator package."""
 
 import argparse
+import sys
 from argparse import Namespace
+from collections.abc import Iterable
+from pathlib import Path
 
+from ai_agent.calculator.pkg.batch import OUTPUT_FORMATS, evaluate_stream, format_batch_result
 from ai_agent.calculator.pkg.calculator import Calculator
 from ai_agent.calculator.pkg.render import render
 
@@ -11,28 +15,115 @@ class CalcArgs(Namespace):
     """Typing information for arguments."""
 
     expression: list[str]
+    file: str | None
+    format: str
+    workers: int | None
+    chunk_size: int
 
     def __init__(self) -> None:
         """Initialize the namespace, setting defaults for type checkers."""
         super().__init__()
         self.expression = []
+        self.file = None
+        self.format = "render"
+        self.workers = None
+        self.chunk_size = 256
+
+
+def _positive_int(value: str) -> int:
+    """Argparse type for counts that must be at least 1.
+
+    Args:
+        value: the command line value
+
+    Returns:
+        int: the parsed value
+
+    Raises:
+        argparse.ArgumentTypeError: if the value is not an integer of at least 1
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        msg = f"must be a whole number of at least 1, got {value!r}"
+        raise argparse.ArgumentTypeError(msg)
+    return number
+
+
+def run_batch(stream: Iterable[str], args: CalcArgs) -> None:
+    """Evaluates one expression per line, printing results in order as soon as they are ready.
+
+    Output is flushed once per chunk so results show up while the rest of the input is still being evaluated.
+
+    Args:
+        stream: lines to evaluate, such as an open file or sys.stdin
+        args: parsed command line arguments
+    """
+    if args.format == "csv":
+        print("line,expression,result,error")
+    for count, result in enumerate(evaluate_stream(stream, workers=args.workers, chunk_size=args.chunk_size), 1):
+        print(format_batch_result(result, args.format), flush=count % args.chunk_size == 0)
+    _ = sys.stdout.flush()
 
 
 def main() -> None:
     """Example usage of the Calculator package."""
     parser = argparse.ArgumentParser(
         description="A command-line calculator.",
-        epilog='Example: python main.py "3 + 5"',
+        epilog='Example: python main.py "3 + 5"  or  python main.py --file expressions.txt --format jsonl',
     )
 
     _ = parser.add_argument(
         "expression",
         type=str,
-        nargs="+",
+        nargs="*",
         help="The mathematical expression to evaluate, in quotes.",
     )
+    _ = parser.add_argument(
+        "-f",
+        "--file",
+        type=str,
+        help='Evaluate one expression per line from this file ("-" reads stdin).',
+    )
+    _ = parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="render",
+        help="Output format for batch mode.",
+    )
+    _ = parser.add_argument(
+        "-j",
+        "--workers",
+        type=_positive_int,
+        help="Number of worker processes for batch mode. Defaults to every core.",
+    )
+    _ = parser.add_argument(
+        "--chunk-size",
+        type=_positive_int,
+        default=256,
+        help="Number of expressions sent to a worker at a time in batch mode.",
+    )
     args = parser.parse_args(namespace=CalcArgs())
 
+    if args.file is not None:
+        if args.expression:
+            parser.error("give either an expression or --file, not both")
+        if args.file == "-":
+            run_batch(sys.stdin, args)
+            return
+        try:
+            stream = Path(args.file).open(encoding="utf-8")  # noqa: SIM115
+        except OSError as e:
+            print(f"Error: {e}")
+            return
+        with stream:
+            run_batch(stream, args)
+        return
+    if not args.expression:
+        parser.error("the following arguments are required: expression (or --file)")
+
     calculator = Calculator()
     expression = " ".join(args.expression)
     try:
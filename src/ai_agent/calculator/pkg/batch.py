@@ -0,0 +1,150 @@
+"""Streaming batch evaluation of many expressions across a process pool."""
+
+import csv
+import io
+import json
+import os
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import NamedTuple
+
+from ai_agent.calculator.pkg.calculator import Calculator
+from ai_agent.calculator.pkg.render import format_result, render
+
+OUTPUT_FORMATS = ("render", "csv", "jsonl")
+
+_CALCULATOR = Calculator()
+
+
+class BatchResult(NamedTuple):
+    """Outcome of evaluating a single line of a batch.
+
+    Attributes:
+        line_number: 1-based line number of the expression in the input.
+        expression: the expression as read, without surrounding whitespace.
+        result: final value, None if the line failed to evaluate.
+        error: error message, None if the line evaluated successfully.
+    """
+
+    line_number: int
+    expression: str
+    result: float | None
+    error: str | None
+
+
+def evaluate_line(line_number: int, expression: str) -> BatchResult:
+    """Evaluates one expression, capturing any error instead of raising it.
+
+    Args:
+        line_number: 1-based line number of the expression in the input.
+        expression: expression to evaluate
+
+    Returns:
+        BatchResult: the result or the error for this line.
+    """
+    try:
+        result = _CALCULATOR.evaluate(expression)
+    except (ValueError, ZeroDivisionError, OverflowError) as e:
+        return BatchResult(line_number, expression, None, str(e) or type(e).__name__)
+    if result is None:
+        return BatchResult(line_number, expression, None, "empty expression")
+    return BatchResult(line_number, expression, result, None)
+
+
+def evaluate_chunk(chunk: list[tuple[int, str]]) -> list[BatchResult]:
+    """Evaluates a chunk of numbered expressions. Runs inside a worker process.
+
+    Args:
+        chunk: list of (line_number, expression) pairs
+
+    Returns:
+        list[BatchResult]: one result per expression, in the same order.
+    """
+    return [evaluate_line(line_number, expression) for line_number, expression in chunk]
+
+
+def iter_chunks(lines: Iterable[str], chunk_size: int) -> Iterator[list[tuple[int, str]]]:
+    """Groups non-blank lines into numbered chunks without reading ahead of the current chunk.
+
+    Args:
+        lines: any iterable of lines, such as an open file or sys.stdin
+        chunk_size: maximum number of expressions per chunk
+
+    Yields:
+        list[tuple[int, str]]: (line_number, expression) pairs.
+    """
+    numbered = ((n, line.strip()) for n, line in enumerate(lines, start=1))
+    expressions = ((n, line) for n, line in numbered if line)
+    while chunk := list(islice(expressions, chunk_size)):
+        yield chunk
+
+
+def evaluate_stream(
+    lines: Iterable[str],
+    workers: int | None = None,
+    chunk_size: int = 256,
+    max_pending: int | None = None,
+) -> Iterator[BatchResult]:
+    """Evaluates a stream of expressions, yielding results in input order as soon as they are ready.
+
+    Chunks are submitted to a process pool while the input is being read. At most `max_pending`
+    chunks are in flight at any time, so memory stays bounded no matter how long the input is.
+    A failing line produces a BatchResult with an error and never aborts the batch.
+
+    Args:
+        lines: any iterable of lines, such as an open file or sys.stdin
+        workers: number of worker processes. 1 evaluates in the current process. None uses every core.
+        chunk_size: number of expressions sent to a worker at a time
+        max_pending: maximum number of chunks in flight. Defaults to twice the number of workers.
+
+    Yields:
+        BatchResult: one result per non-blank input line, in input order.
+    """
+    chunks = iter_chunks(lines, chunk_size)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for chunk in chunks:
+            yield from evaluate_chunk(chunk)
+        return
+
+    limit = max_pending or 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: deque[Future[list[BatchResult]]] = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(evaluate_chunk, chunk))
+            while len(pending) >= limit or (pending and pending[0].done()):
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def format_batch_result(result: BatchResult, output_format: str) -> str:
+    """Formats a single batch result as one record of the requested output format.
+
+    Args:
+        result: the result to format
+        output_format: one of OUTPUT_FORMATS
+
+    Returns:
+        str: the formatted record, without a trailing newline.
+
+    Raises:
+        ValueError: if the output format is unknown.
+    """
+    if output_format == "jsonl":
+        return json.dumps(result._asdict())
+    if output_format == "csv":
+        buffer = io.StringIO()
+        value = "" if result.error else format_result(result.result)
+        csv.writer(buffer, lineterminator="").writerow(
+            [result.line_number, result.expression, value, result.error or ""]
+        )
+        return buffer.getvalue()
+    if output_format == "render":
+        if result.error:
+            return f"line {result.line_number}: Error: {result.error}"
+        return render(result.expression, result.result)
+    msg = f"unknown output format: {output_format}"
+    raise ValueError(msg)
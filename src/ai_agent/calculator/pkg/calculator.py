@@ -1,21 +1,51 @@
 """Calculator class."""
 
+import re
+from collections.abc import Iterable, Iterator
+from decimal import Decimal, InvalidOperation
+from fractions import Fraction
+from operator import add, mul, sub, truediv
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from collections.abc import Callable
 
+type Number = float | Fraction | Decimal
+
+NUMBER_MODES: dict[str, type[float | Fraction | Decimal]] = {
+    "float": float,
+    "fraction": Fraction,
+    "decimal": Decimal,
+}
+
+_TOKEN_PATTERN = re.compile(r"\S+")
+
 
 class Calculator:
-    """Calculator Class. currently only supports basic arithmatic expressions with standard order of operations."""
-
-    def __init__(self) -> None:
-        """Initiallizer for the calculator."""
-        self.operators: dict[str, Callable[[float, float], float]] = {
-            "+": lambda a, b: a + b,
-            "-": lambda a, b: a - b,
-            "*": lambda a, b: a * b,
-            "/": lambda a, b: a / b,
+    """Calculator Class. currently only supports basic arithmatic expressions with standard order of operations.
+
+    Expressions are tokenized lazily and reduced as they are read, so evaluation takes linear time and the
+    operand/operator stacks never hold more than a few entries, however long the expression is.
+    """
+
+    def __init__(self, mode: str = "float") -> None:
+        """Initiallizer for the calculator.
+
+        Args:
+            mode: number type used for evaluation. "float" (default), or "fraction"/"decimal" for exact results.
+
+        Raises:
+            ValueError: if the mode is unknown.
+        """
+        if mode not in NUMBER_MODES:
+            msg = f"unknown mode: {mode}. expected one of {', '.join(NUMBER_MODES)}"
+            raise ValueError(msg)
+        self.number_type: type[float | Fraction | Decimal] = NUMBER_MODES[mode]
+        self.operators: dict[str, Callable[[Number, Number], Number]] = {
+            "+": add,
+            "-": sub,
+            "*": mul,
+            "/": truediv,
         }
         self.precedence: dict[str, int] = {
             "+": 1,
@@ -24,7 +54,7 @@ class Calculator:
             "/": 2,
         }
 
-    def evaluate(self, expression: str) -> float | None:
+    def evaluate(self, expression: str) -> Number | None:
         """Evaluates expresion passed into the calculator.
 
         Evaluates the entire expresion. only handels basic arithmatic. expresion must be space delimeted.
@@ -34,32 +64,52 @@ class Calculator:
             expression (str): expresion to evaluate
 
         Returns:
-            float | None: final value, None if expresion is malformated
+            Number | None: final value, None if expresion is malformated
         """
         if not expression or expression.isspace():
             return None
-        tokens = expression.strip().split()
-        return self._evaluate_infix(tokens)
+        return self._evaluate_infix(self._tokenize([expression]))
 
-    def _evaluate_infix(self, tokens: list[str]) -> float:
-        values: list[float] = []
+    def evaluate_chunks(self, chunks: Iterable[str]) -> Number | None:
+        """Evaluates an expression that arrives in pieces, such as successive reads from a large file.
+
+        A token may be split across two chunks. Only the current chunk is held in memory.
+
+        Args:
+            chunks: consecutive pieces of a single space delimeted expression
+
+        Returns:
+            Number | None: final value, None if the expression is empty
+        """
+        tokens = self._tokenize(chunks)
+        first = next(tokens, None)
+        if first is None:
+            return None
+        return self._evaluate_infix(tokens, first)
+
+    @staticmethod
+    def _tokenize(chunks: Iterable[str]) -> Iterator[str]:
+        carry = ""
+        for chunk in chunks:
+            text = carry + chunk
+            carry = ""
+            for match in _TOKEN_PATTERN.finditer(text):
+                # a token touching the end of the chunk may continue in the next one
+                if match.end() == len(text):
+                    carry = match.group()
+                else:
+                    yield match.group()
+        if carry:
+            yield carry
+
+    def _evaluate_infix(self, tokens: Iterable[str], first: str | None = None) -> Number:
+        values: list[Number] = []
         operators: list[str] = []
 
+        if first is not None:
+            self._push_token(first, operators, values)
         for token in tokens:
-            if token in self.operators:
-                while (
-                    operators
-                    and operators[-1] in self.operators
-                    and self.precedence[operators[-1]] >= self.precedence[token]
-                ):
-                    self._apply_operator(operators, values)
-                operators.append(token)
-            else:
-                try:
-                    values.append(float(token))
-                except ValueError as e:
-                    msg = f"invalid token: {token}"
-                    raise ValueError(msg) from e
+            self._push_token(token, operators, values)
 
         while operators:
             self._apply_operator(operators, values)
@@ -70,7 +120,19 @@ class Calculator:
 
         return values[0]
 
-    def _apply_operator(self, operators: list[str], values: list[float]) -> None:
+    def _push_token(self, token: str, operators: list[str], values: list[Number]) -> None:
+        if token in self.operators:
+            while operators and self.precedence[operators[-1]] >= self.precedence[token]:
+                self._apply_operator(operators, values)
+            operators.append(token)
+            return
+        try:
+            values.append(self.number_type(token))
+        except (ValueError, InvalidOperation) as e:
+            msg = f"invalid token: {token}"
+            raise ValueError(msg) from e
+
+    def _apply_operator(self, operators: list[str], values: list[Number]) -> None:
         if not operators:
             return
 
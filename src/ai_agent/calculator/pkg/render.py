@@ -3,6 +3,18 @@
 # render.py
 
 
+def format_result(result: float | None) -> str:
+    """Formats a result for display, dropping the fractional part of whole numbers.
+
+    Args:
+        result: final result of an expression
+
+    Returns:
+        str: the result as a string
+    """
+    return str(int(result)) if isinstance(result, float) and result.is_integer() else str(result)
+
+
 def render(expression: str, result: float | None) -> str:
     """Redneres a box with the answer from the expression.
 
@@ -13,7 +25,7 @@ def render(expression: str, result: float | None) -> str:
     Returns:
         str: ASCII box with expresion and result inside
     """
-    result_str = str(int(result)) if isinstance(result, float) and result.is_integer() else str(result)
+    result_str = format_result(result)
 
     box_width = max(len(expression), len(result_str)) + 4
 
@@ -0,0 +1,269 @@
+"""Checkpoints of the working directory, taken before every write, and rollback to them.
+
+A checkpoint is a journal of pre-images: before a write tool changes files, the current version of each
+target is saved (or, for a file that does not exist yet, the fact that it did not), so a checkpoint costs
+O(files changed) however large the workspace is. Pre-images are reflinked where the file system supports it
+(btrfs, XFS), which shares the file's blocks until one copy changes, and copied otherwise. Hardlinks are not
+used, since write_file rewrites files in place and would change the pre-image too.
+
+Rolling back to a checkpoint undoes it and every newer one, newest first. Checkpoints are kept under
+STATE_DIRECTORY/checkpoints, per working directory, and pruned to the newest CHECKPOINT_KEEP and at most
+CHECKPOINT_MAX_BYTES of pre-images after every new one.
+"""
+
+import hashlib
+import json
+import logging
+import shutil
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import NamedTuple, TypedDict
+
+from ai_agent.constants import CHECKPOINT_KEEP, CHECKPOINT_MAX_BYTES, CHECKPOINTS_ENABLED, STATE_DIRECTORY
+from ai_agent.exceptions import CheckpointNotFoundError
+
+logger = logging.getLogger(__name__)
+
+# ioctl(2) request that clones a whole file's extents into another file, see ioctl_ficlone(2)
+FICLONE = 0x40049409
+
+
+class _FileRecord(TypedDict):
+    path: str
+    preimage: str | None
+    created_directory: str | None
+
+
+class _Manifest(TypedDict):
+    id: str
+    label: str
+    created_ns: int
+    files: list[_FileRecord]
+
+
+class CheckpointInfo(NamedTuple):
+    """One checkpoint, as listed.
+
+    Attributes:
+        checkpoint_id: Id to roll back to.
+        label: The write that the checkpoint was taken before.
+        created: Unix time the checkpoint was taken.
+        files: Paths, relative to the working directory, the write was about to change.
+    """
+
+    checkpoint_id: str
+    label: str
+    created: float
+    files: list[str]
+
+
+class CheckpointJournal:
+    """Checkpoints of one working directory.
+
+    Attributes:
+        root (Path): Resolved working directory.
+        directory (Path): Where the checkpoints of this working directory are kept.
+        keep (int): Most checkpoints kept.
+        max_bytes (int): Most bytes of pre-images kept.
+    """
+
+    def __init__(
+        self,
+        working_directory: str | Path,
+        state_directory: str | Path = STATE_DIRECTORY,
+        keep: int = CHECKPOINT_KEEP,
+        max_bytes: int = CHECKPOINT_MAX_BYTES,
+    ) -> None:
+        """Initializes the journal. Nothing is created on disk until the first checkpoint.
+
+        Args:
+            working_directory: The working directory to checkpoint.
+            state_directory: Directory for state kept between runs.
+            keep: Most checkpoints kept.
+            max_bytes: Most bytes of pre-images kept. The newest checkpoint is kept even if it is larger.
+        """
+        self.root: Path = Path(working_directory).resolve()
+        digest = hashlib.blake2b(str(self.root).encode(), digest_size=8).hexdigest()
+        self.directory: Path = Path(state_directory, "checkpoints", digest)
+        self.keep: int = keep
+        self.max_bytes: int = max_bytes
+        self._lock: threading.Lock = threading.Lock()
+        self._last_ns: int = 0
+
+    def checkpoint(self, label: str, targets: list[Path]) -> str:
+        """Saves the current version of files that are about to be written.
+
+        Args:
+            label: What is about to be written, e.g. "write_file notes.txt".
+            targets: Resolved paths inside the working directory.
+
+        Returns:
+            str: Id of the new checkpoint.
+
+        Raises:
+            OSError: If a pre-image could not be saved. The partial checkpoint is removed.
+        """
+        with self._lock:
+            created_ns = max(time.time_ns(), self._last_ns + 1)
+            self._last_ns = created_ns
+            checkpoint_id = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(created_ns / 1e9))}-{uuid.uuid4().hex[:6]}"
+            folder = self.directory / checkpoint_id
+            folder.mkdir(parents=True)
+            try:
+                files = [self._save(folder, index, target) for index, target in enumerate(targets)]
+                manifest = _Manifest(id=checkpoint_id, label=label, created_ns=created_ns, files=files)
+                _ = (folder / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+            except OSError:
+                shutil.rmtree(folder, ignore_errors=True)
+                raise
+            self._prune()
+        logger.info("checkpoint %s taken before %s", checkpoint_id, label)
+        return checkpoint_id
+
+    def discard(self, checkpoint_id: str) -> None:
+        """Removes a checkpoint whose write did not happen.
+
+        Args:
+            checkpoint_id: The checkpoint to remove.
+        """
+        with self._lock:
+            shutil.rmtree(self.directory / checkpoint_id, ignore_errors=True)
+
+    def checkpoints(self) -> list[CheckpointInfo]:
+        """Returns the checkpoints, newest first."""
+        return [
+            CheckpointInfo(
+                manifest["id"], manifest["label"], manifest["created_ns"] / 1e9, [f["path"] for f in manifest["files"]]
+            )
+            for manifest in reversed(self._manifests())
+        ]
+
+    def rollback(self, checkpoint_id: str) -> list[str]:
+        """Restores the working directory to how it was just before a checkpoint.
+
+        The checkpoint and every newer one are undone, newest first, and then removed.
+
+        Args:
+            checkpoint_id: The checkpoint to go back to.
+
+        Returns:
+            list[str]: Paths, relative to the working directory, that were restored or removed.
+
+        Raises:
+            CheckpointNotFoundError: If there is no such checkpoint.
+        """
+        with self._lock:
+            manifests = self._manifests()
+            ids = [manifest["id"] for manifest in manifests]
+            if checkpoint_id not in ids:
+                raise CheckpointNotFoundError(checkpoint_id)
+            undone = manifests[ids.index(checkpoint_id) :]
+            changed: dict[str, None] = {}
+            for manifest in reversed(undone):
+                folder = self.directory / manifest["id"]
+                for record in reversed(manifest["files"]):
+                    self._restore(folder, record)
+                    changed[record["path"]] = None
+                shutil.rmtree(folder, ignore_errors=True)
+        logger.info("rolled back %s checkpoints to before %s", len(undone), checkpoint_id)
+        return list(changed)
+
+    def _save(self, folder: Path, index: int, target: Path) -> _FileRecord:
+        relative = target.relative_to(self.root).as_posix()
+        if target.is_file():
+            preimage = f"{index}.pre"
+            _clone(target, folder / preimage)
+            return _FileRecord(path=relative, preimage=preimage, created_directory=None)
+        # the write creates the file, and possibly directories; remember the topmost missing one
+        missing = [parent for parent in target.parents if parent.is_relative_to(self.root) and not parent.exists()]
+        created_directory = missing[-1].relative_to(self.root).as_posix() if missing else None
+        return _FileRecord(path=relative, preimage=None, created_directory=created_directory)
+
+    def _restore(self, folder: Path, record: _FileRecord) -> None:
+        target = self.root / record["path"]
+        if record["preimage"] is not None:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            temporary = target.with_name(f".{target.name}.rollback")
+            _clone(folder / record["preimage"], temporary)
+            _ = temporary.replace(target)
+            return
+        target.unlink(missing_ok=True)
+        if record["created_directory"] is not None:
+            created = self.root / record["created_directory"]
+            # only remove directories the write created that are empty again
+            for directory in [target.parent, *target.parent.parents]:
+                if not directory.is_relative_to(created):
+                    break
+                try:
+                    directory.rmdir()
+                except OSError:
+                    break
+
+    def _manifests(self) -> list[_Manifest]:
+        """Reads every checkpoint's manifest, oldest first. Unreadable checkpoints are skipped."""
+        manifests: list[_Manifest] = []
+        if not self.directory.is_dir():
+            return manifests
+        for folder in self.directory.iterdir():
+            try:
+                manifests.append(json.loads((folder / "manifest.json").read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                logger.debug("skipping incomplete checkpoint %s", folder)
+        return sorted(manifests, key=lambda manifest: manifest["created_ns"])
+
+    def _prune(self) -> None:
+        """Removes the oldest checkpoints beyond keep or max_bytes, always keeping the newest."""
+        manifests = self._manifests()
+        sizes = [
+            sum(path.stat().st_size for path in (self.directory / manifest["id"]).iterdir()) for manifest in manifests
+        ]
+        total = sum(sizes)
+        for index, manifest in enumerate(manifests[:-1]):
+            if len(manifests) - index <= self.keep and total <= self.max_bytes:
+                break
+            shutil.rmtree(self.directory / manifest["id"], ignore_errors=True)
+            total -= sizes[index]
+            logger.debug("pruned checkpoint %s", manifest["id"])
+
+
+def _clone(source: Path, destination: Path) -> None:
+    """Copies a file with its permissions, sharing its blocks (reflink) where the file system supports it."""
+    with source.open("rb") as src, destination.open("wb") as dst:
+        cloned = False
+        if sys.platform == "linux":
+            import fcntl  # noqa: PLC0415
+
+            try:
+                _ = fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                cloned = True
+            except OSError:
+                pass
+        if not cloned:
+            shutil.copyfileobj(src, dst)
+    shutil.copymode(source, destination)
+
+
+_JOURNALS: dict[Path, CheckpointJournal] = {}
+_JOURNALS_LOCK = threading.Lock()
+
+
+def get_journal(working_directory: str) -> CheckpointJournal | None:
+    """Returns the checkpoint journal of a working directory, or None when checkpoints are disabled.
+
+    Args:
+        working_directory: The working directory.
+
+    Returns:
+        CheckpointJournal | None: The shared journal for that directory.
+    """
+    if not CHECKPOINTS_ENABLED:
+        return None
+    root = Path(working_directory).resolve()
+    with _JOURNALS_LOCK:
+        journal = _JOURNALS.get(root)
+        if journal is None:
+            journal = _JOURNALS[root] = CheckpointJournal(root)
+        return journal
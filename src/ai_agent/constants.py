@@ -8,12 +8,69 @@ DEFAULT_FILE_CHAR_LIMIT: Final[int] = 10_000
 DEFAULT_MODEL_NAME: Final[str] = "gemini-2.0-flash-001"
 DEFAULT_WORKING_DIRECTORY: Final[str] = "src/ai_agent/calculator"
 DEFAULT_LOG_LEVEL: Final[str] = "INFO"
+DEFAULT_LOG_FORMAT: Final[str] = "json"
+DEFAULT_LOG_MAX_BYTES: Final[int] = 10 * 1024 * 1024
+DEFAULT_LOG_BACKUP_COUNT: Final[int] = 5
+DEFAULT_TOOL_OUTPUT_LIMIT: Final[int] = 12_000
+DEFAULT_TURN_OUTPUT_LIMIT: Final[int] = 40_000
+DEFAULT_TOOL_TIMEOUT: Final[int] = 60
 
 # Environment-configurable values with defaults
 FILE_CHAR_LIMIT: int = int(os.environ.get("FILE_CHAR_LIMIT", DEFAULT_FILE_CHAR_LIMIT))
 MODEL_NAME: str = os.environ.get("MODEL_NAME", DEFAULT_MODEL_NAME)
 WORKING_DIRECTORY: str = os.environ.get("WORKING_DIRECTORY", DEFAULT_WORKING_DIRECTORY)
 LOG_LEVEL: str = os.environ.get("LOG_LEVEL", DEFAULT_LOG_LEVEL)
+# "json" for one JSON object per record, "text" for LOG_TEXT_FORMAT lines; the log file rotates at LOG_MAX_BYTES
+LOG_FORMAT: str = os.environ.get("LOG_FORMAT", DEFAULT_LOG_FORMAT)
+LOG_MAX_BYTES: int = int(os.environ.get("LOG_MAX_BYTES", DEFAULT_LOG_MAX_BYTES))
+LOG_BACKUP_COUNT: int = int(os.environ.get("LOG_BACKUP_COUNT", DEFAULT_LOG_BACKUP_COUNT))
+# characters a single tool result may add to the history, and the total for all tool calls in one turn
+TOOL_OUTPUT_LIMIT: int = int(os.environ.get("TOOL_OUTPUT_LIMIT", DEFAULT_TOOL_OUTPUT_LIMIT))
+TURN_OUTPUT_LIMIT: int = int(os.environ.get("TURN_OUTPUT_LIMIT", DEFAULT_TURN_OUTPUT_LIMIT))
+# per-tool overrides of TOOL_OUTPUT_LIMIT, e.g. TOOL_OUTPUT_LIMITS="run_python_file=4000,get_files_info=6000"
+TOOL_OUTPUT_LIMITS: dict[str, int] = {
+    name.strip(): int(limit)
+    for name, _, limit in (item.partition("=") for item in os.environ.get("TOOL_OUTPUT_LIMITS", "").split(",") if item)
+}
+# seconds a tool call may take before the model is told it timed out
+TOOL_TIMEOUT: float = float(os.environ.get("TOOL_TIMEOUT", DEFAULT_TOOL_TIMEOUT))
+# per-tool overrides of TOOL_TIMEOUT, e.g. TOOL_TIMEOUTS="get_files_info=10,delegate=1200"
+TOOL_TIMEOUTS: dict[str, float] = {
+    name.strip(): float(timeout)
+    for name, _, timeout in (item.partition("=") for item in os.environ.get("TOOL_TIMEOUTS", "").split(",") if item)
+}
+# session ceilings; 0 disables a ceiling
+MAX_SESSION_TOKENS: int = int(os.environ.get("MAX_SESSION_TOKENS", "0"))
+MAX_SESSION_COST: float = float(os.environ.get("MAX_SESSION_COST", "0"))
+SUBAGENT_MAX_TOKENS: int = int(os.environ.get("SUBAGENT_MAX_TOKENS", "0"))
+# background prefetching of listed files, off by default
+PREFETCH_ENABLED: bool = os.environ.get("PREFETCH_ENABLED", "").lower() in {"1", "true", "yes"}
+PREFETCH_CACHE_BYTES: int = int(os.environ.get("PREFETCH_CACHE_BYTES", str(4 * 1024 * 1024)))
+PREFETCH_MAX_FILE_BYTES: int = int(os.environ.get("PREFETCH_MAX_FILE_BYTES", str(64 * 1024)))
+PREFETCH_WORKERS: int = int(os.environ.get("PREFETCH_WORKERS", "4"))
+# directory for state kept between runs (indexes, caches), relative to where the agent is started
+STATE_DIRECTORY: str = os.environ.get("STATE_DIRECTORY", ".ai_agent")
+# lexical retrieval of snippets for the first prompt, off by default
+RETRIEVAL_ENABLED: bool = os.environ.get("RETRIEVAL_ENABLED", "").lower() in {"1", "true", "yes"}
+RETRIEVAL_TOP_K: int = int(os.environ.get("RETRIEVAL_TOP_K", "5"))
+RETRIEVAL_TOKEN_CAP: int = int(os.environ.get("RETRIEVAL_TOKEN_CAP", "1500"))
+# cache of run_python_file results, off by default
+EXEC_CACHE_ENABLED: bool = os.environ.get("EXEC_CACHE_ENABLED", "").lower() in {"1", "true", "yes"}
+EXEC_CACHE_MAX_BYTES: int = int(os.environ.get("EXEC_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+# address space cap of run_python_code kernels in bytes, 0 for none
+KERNEL_MEMORY_LIMIT: int = int(os.environ.get("KERNEL_MEMORY_LIMIT", str(1024 * 1024 * 1024)))
+# CPU seconds a run_python_code kernel may use over its life, and largest file it may write in bytes; 0 for none
+KERNEL_CPU_LIMIT: int = int(os.environ.get("KERNEL_CPU_LIMIT", "600"))
+KERNEL_FILE_SIZE_LIMIT: int = int(os.environ.get("KERNEL_FILE_SIZE_LIMIT", str(256 * 1024 * 1024)))
+# append-only session logs under STATE_DIRECTORY/sessions, for main.py --resume; on by default
+SESSION_LOG_ENABLED: bool = os.environ.get("SESSION_LOG_ENABLED", "1").lower() in {"1", "true", "yes"}
+# pre-image checkpoints taken before every write, for rollback_workspace and main.py --rollback; on by default.
+# the newest CHECKPOINT_KEEP are kept, as long as their pre-images take at most CHECKPOINT_MAX_BYTES
+CHECKPOINTS_ENABLED: bool = os.environ.get("CHECKPOINTS_ENABLED", "1").lower() in {"1", "true", "yes"}
+CHECKPOINT_KEEP: int = int(os.environ.get("CHECKPOINT_KEEP", "50"))
+CHECKPOINT_MAX_BYTES: int = int(os.environ.get("CHECKPOINT_MAX_BYTES", str(256 * 1024 * 1024)))
+# most tools offered to the model per turn; larger catalogues are narrowed down to the relevant ones
+ROUTER_MAX_TOOLS: int = int(os.environ.get("ROUTER_MAX_TOOLS", "16"))
 
 # Static templates and prompts (not environment-specific)
 BASE_SYSTEM_PROMPT: Final[str] = """
@@ -26,10 +83,98 @@ Do not ask the user for more information without first making a plan. You can pe
 
 All paths you provide should be relative to the working directory. You do not need to specify the working directory in your function calls as it is automatically injected for security reasons.
 """
+# sent, without tools, when a session is stopped for repeating itself
+PARTIAL_ANSWER_PROMPT: Final[str] = (
+    "You have been repeating the same tool calls without making progress, so tools are no longer available. "
+    "Answer the original request as well as you can with what you have found so far, and say what is missing."
+)
+# sent with a timeout error, so the model retries with a smaller request instead of the same one
+TIMEOUT_HINT: Final[str] = "Retry with a narrower request, e.g. a subdirectory, a smaller file range or fewer files."
 
 # Business logic constants
 MAX_FUNCTION_TIMEOUT: Final[int] = 30
+READ_CHUNK_SIZE: Final[int] = 64 * 1024
+# bytes looked at (after decompression) to decide whether a file is text before reading it
+BINARY_SNIFF_BYTES: Final[int] = 8 * 1024
+# read_files: most files one call returns, and threads reading them
+READ_FILES_MAX_FILES: Final[int] = 50
+READ_FILES_WORKERS: Final[int] = 8
+# write_files: most files one transaction may write
+WRITE_FILES_MAX_FILES: Final[int] = 50
+# run_python_file cache: results kept per script and arguments, and the marker that opts a file out
+EXEC_CACHE_MAX_VARIANTS: Final[int] = 4
+NO_CACHE_MARKER: Final[str] = "# ai-agent: no-cache"
+# run_python_code: default and longest timeout of one snippet, seconds an interrupted snippet gets to stop,
+# and characters kept per output stream
+KERNEL_TIMEOUT: Final[int] = 30
+KERNEL_MAX_TIMEOUT: Final[int] = 300
+KERNEL_INTERRUPT_GRACE: Final[float] = 2.0
+KERNEL_OUTPUT_LIMIT: Final[int] = 10_000
+# deadlines of tools that bound their own run time; they get a little longer than their own limit
+DEFAULT_TOOL_TIMEOUTS: Final[dict[str, float]] = {
+    "run_python_file": MAX_FUNCTION_TIMEOUT + 10,
+    "run_python_code": KERNEL_MAX_TIMEOUT + KERNEL_INTERRUPT_GRACE + 10,
+    "delegate": 900,
+}
+# loop detection: a cycle of at most LOOP_MAX_PERIOD calls repeated LOOP_MIN_REPEATS times in a row is a loop;
+# the model is warned LOOP_WARNINGS times before the next loop stops the session
+LOOP_MIN_REPEATS: Final[int] = 3
+LOOP_MAX_PERIOD: Final[int] = 3
+LOOP_WARNINGS: Final[int] = 1
+# tools without side effects, whose repeated identical calls are answered from memory; list_tools is not one,
+# it unlocks the tools it lists
+READ_ONLY_TOOLS: Final[frozenset[str]] = frozenset(
+    {"calculate", "get_file_content", "get_files_info", "load_session_output", "read_files"}
+)
+# tool router: tools offered in every turn, model turns whose tool calls keep those tools offered,
+# and most tools one list_tools call returns
+CORE_TOOLS: Final[frozenset[str]] = frozenset(
+    {"get_file_content", "get_files_info", "list_tools", "run_python_file", "write_file"}
+)
+ROUTER_RECENT_TURNS: Final[int] = 3
+LIST_TOOLS_LIMIT: Final[int] = 20
+# main.py --profile: entries listed per ranking, and frames kept per traced allocation (each extra frame makes
+# tracing markedly slower; importing google-genai takes over ten times longer with 8 frames than with 1)
+PROFILE_TOP_ENTRIES: Final[int] = 25
+PROFILE_TRACEMALLOC_FRAMES: Final[int] = 1
+DEFAULT_CHARS_PER_TOKEN: Final[float] = 4.0
+# tool results at least this long are sent once per session; later identical results refer back to the first
+DEDUP_MIN_CHARS: Final[int] = 256
+# session logs: strings at least this long are stored once as compressed blobs, and resuming loads the payloads
+# of this many of the most recent tool messages
+SESSION_BLOB_MIN_CHARS: Final[int] = 1024
+SESSION_RESUME_PAYLOADS: Final[int] = 1
+# USD per million tokens: (input, output, cached input)
+MODEL_PRICES: Final[dict[str, tuple[float, float, float]]] = {
+    "gemini-2.0-flash-001": (0.10, 0.40, 0.025),
+    "gemini-2.0-flash": (0.10, 0.40, 0.025),
+    "gemini-2.5-flash": (0.30, 2.50, 0.075),
+    "gemini-2.5-pro": (1.25, 10.00, 0.31),
+}
 SUPPORTED_FILE_EXTENSIONS: Final[list[str]] = [".py", ".txt", ".md"]
 EXCLUDED_FUNCTION_MODULES: Final[list[str]] = ["utils"]
+PLUGIN_ENTRY_POINT_GROUP: Final[str] = "ai_agent.tools"
 LOG_FILENAME: Final[str] = "app.log"
+LOG_TEXT_FORMAT: Final[str] = "%(asctime)s - %(name)s - %(levelname)s - [%(session_id)s:%(iteration)s] %(message)s"
+# workspace snapshot: changes kept for get_workspace_changes, and entries it lists per call
+WORKSPACE_CHANGE_LOG_SIZE: Final[int] = 10_000
+WORKSPACE_DELTA_LIMIT: Final[int] = 200
+WORKSPACE_IGNORED_NAMES: Final[frozenset[str]] = frozenset(
+    {".git", "__pycache__", ".venv", ".mypy_cache", ".ruff_cache", ".ai_agent"}
+)
+# BM25 retrieval: lines per indexed chunk, and files larger than this are not indexed
+RETRIEVAL_CHUNK_LINES: Final[int] = 40
+RETRIEVAL_MAX_FILE_BYTES: Final[int] = 256 * 1024
 MAX_ITERATIONS = 20
+
+# Sub-agents started by the delegate tool
+SUBAGENT_MAX_ITERATIONS: Final[int] = 8
+SUBAGENT_MAX_TASKS: Final[int] = 8
+SUBAGENT_MAX_WORKERS: Final[int] = 4
+SUBAGENT_ANSWER_LIMIT: Final[int] = 2_000
+SUBAGENT_PROMPT: Final[str] = """
+You are a sub-agent handling one part of a larger task. You do not see the rest of the conversation.
+Use your tools as needed, then reply with a concise final answer that stands on its own.
+
+Task: {task}
+"""
@@ -1,17 +1,21 @@
 """Package for generating FunctionDeclaration schemas for the google.genai API to be able to run functions."""
 
+import functools
 import importlib
 import inspect
 import logging
 import pkgutil
-from collections.abc import Callable
+import types as pytypes
+from collections.abc import Callable, Sequence
 from enum import Enum
-from typing import Any
+from typing import Any, Literal, Union, get_args, get_origin
 
 from google.genai import types
 
 import ai_agent.functions
-from ai_agent.constants import EXCLUDED_FUNCTION_MODULES, LOG_FILENAME, LOG_LEVEL
+from ai_agent.constants import EXCLUDED_FUNCTION_MODULES
+from ai_agent.logging_config import configure_logging
+from ai_agent.plugins import discover_plugin_tools
 
 logger = logging.getLogger(__name__)
 
@@ -21,20 +25,30 @@ TYPE_MAPPING: dict[Any, types.Type] = {  # pyright: ignore[reportExplicitAny]
     float: types.Type.NUMBER,
     bool: types.Type.BOOLEAN,
     list: types.Type.ARRAY,
+    dict: types.Type.OBJECT,
 }
+# annotations that become arrays, with their item type taken from the type arguments
+SEQUENCE_TYPES: tuple[type, ...] = (list, tuple, set, frozenset, Sequence)
+# types of the values an unannotated or Any parameter is offered as
+ANY_TYPES: tuple[types.Type, ...] = (types.Type.STRING, types.Type.NUMBER, types.Type.BOOLEAN)
 
 
 # This new function does the slow work just ONCE.
 def discover_tools(
     exclude: list[str] | None = None,
+    include_plugins: bool = True,
 ) -> dict[str, Callable[..., str]]:
-    """Discovers tools found in the functions directory.
+    """Discovers tools found in the functions directory and in installed plugins.
 
     Uses the builtin inspect module to discover all functions in the functions directory.
     Returns only the funtions the match the title of their file.
+    Plugin tools registered under the PLUGIN_ENTRY_POINT_GROUP entry point group are added as
+    LazyTool objects, which are only imported the first time they are called.
+    Built-in tools win over plugins with the same name.
 
     Args:
         exclude: files to exlude from inspection. do not use the full path, do not use the ".py" file extention
+        include_plugins: set to False to skip entry point plugins
 
     Returns:
         dict of callable functions
@@ -61,6 +75,13 @@ def discover_tools(
         primary_func_name, primary_func_object = members[primary_function_idx]
         discovered_tools[primary_func_name] = primary_func_object
 
+    if include_plugins:
+        for name, tool in discover_plugin_tools().items():
+            if name in discovered_tools:
+                logger.warning("plugin tool '%s' is shadowed by a built-in tool of the same name", name)
+                continue
+            discovered_tools[name] = tool
+
     return discovered_tools
 
 
@@ -72,26 +93,38 @@ def generate_schema(
 
     Some files in that directory are not tools so you cna exclude some names.
     This tool assumes that public functions have Google Python style DocStrings.
+    Parameter schemas follow the type annotations: generics such as list[str] get typed items, Optional
+    parameters are nullable, Literal and Enum parameters list their values, and parameters without a
+    default are required. Each declaration is computed once per tool and cached.
+
+    Args:
+        discovered_tools: tools keyed by name, as returned by discover_tools.
+        banned_args: arguments left out of the schemas, e.g. ones the agent injects.
 
     Returns:
         list: list of FunctionDeclarations.
     """
     schemas: list[types.FunctionDeclaration] = []
+    banned = tuple(banned_args or [])
 
     for name, func in discovered_tools.items():
-        docstring = inspect.getdoc(func)
-        signature = inspect.signature(func)
+        declaration = _declaration(name, func, banned)
+        if declaration is not None:
+            schemas.append(declaration)
 
-        if not docstring:
-            logger.info(f"module function '{name}' lacks a docstring, could not generate schema")
-            continue
-        description, parameter_info = _parse_docstring(docstring, banned_args)
+    return schemas
 
-        param_schema = _get_parameter_schema(parameter_info, signature, banned_args)
-        s = types.FunctionDeclaration(name=name, description=description, parameters=param_schema)
-        schemas.append(s)
 
-    return schemas
+@functools.cache
+def _declaration(name: str, func: Callable[..., str], banned_args: tuple[str, ...]) -> types.FunctionDeclaration | None:
+    docstring = inspect.getdoc(func)
+    if not docstring:
+        logger.info("module function '%s' lacks a docstring, could not generate schema", name)
+        return None
+    description, parameter_info = _parse_docstring(docstring, list(banned_args))
+
+    param_schema = _get_parameter_schema(parameter_info, inspect.signature(func), list(banned_args))
+    return types.FunctionDeclaration(name=name, description=description, parameters=param_schema)
 
 
 def _parse_docstring(docstring: str, banned_args: list[str] | None) -> tuple[str, dict[str, str]]:
@@ -155,25 +188,89 @@ def _get_parameter_schema(
     if banned_args is None:
         banned_args = []
     properties: dict[str, types.Schema] = {}
+    required: list[str] = []
     for p in signature.parameters.values():
+        if p.kind in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD) or p.name in banned_args:
+            continue
         desc = parameter_info.get(p.name, "")
-        if not desc and p.name not in banned_args:
-            logger.warning(f"parameter {p} does not have any documentation")
-
-        properties[p.name] = types.Schema(
-            type=TYPE_MAPPING.get(p.annotation, types.Type.OBJECT),  # pyright: ignore[reportAny]
-            description=desc,
-        )
-
-    return types.Schema(type=types.Type.OBJECT, properties=properties)
+        if not desc:
+            logger.warning("parameter %s does not have any documentation", p)
+
+        schema = _annotation_schema(p.annotation)  # pyright: ignore[reportAny]
+        # keep the allowed values of a non-string Literal next to the documented description
+        note = f" ({schema.description})" if schema.description else ""
+        schema = schema.model_copy(update={"description": desc + note if desc else schema.description})
+        default = p.default.value if isinstance(p.default, Enum) else p.default  # pyright: ignore[reportAny]
+        if default is inspect.Parameter.empty:
+            required.append(p.name)
+        elif _is_json_value(default):
+            schema.default = default
+        properties[p.name] = schema
+
+    return types.Schema(type=types.Type.OBJECT, properties=properties, required=required or None)
+
+
+@functools.cache
+def _annotation_schema(annotation: object) -> types.Schema:  # noqa: PLR0911
+    """Builds the schema of a type annotation, without a description."""
+    if annotation is inspect.Parameter.empty or annotation is Any:
+        return types.Schema(any_of=[types.Schema(type=t) for t in ANY_TYPES])
+
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+    if origin in (Union, pytypes.UnionType):
+        members = [m for m in args if m is not type(None)]  # pyright: ignore[reportAny]
+        if len(members) == 1:
+            schema = _annotation_schema(members[0]).model_copy()
+        else:
+            schema = types.Schema(any_of=[_annotation_schema(m) for m in members])
+        schema.nullable = len(members) < len(args) or None
+        return schema
+    if origin is Literal:
+        return _choices_schema(list(args))
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        return _choices_schema([member.value for member in annotation])
+    if annotation in SEQUENCE_TYPES or origin in SEQUENCE_TYPES:
+        return _sequence_schema(annotation, origin, args)
+    if origin is dict:
+        return types.Schema(type=types.Type.OBJECT)
+    if annotation in TYPE_MAPPING:
+        return types.Schema(type=TYPE_MAPPING[annotation])
+    logger.debug("no schema rule for annotation %r, describing it as an object", annotation)
+    return types.Schema(type=types.Type.OBJECT)
+
+
+def _sequence_schema(annotation: object, origin: object, args: tuple[object, ...]) -> types.Schema:
+    """Builds an array schema, typing its items from the annotation's arguments when there are any."""
+    if not args:
+        return types.Schema(type=types.Type.ARRAY, items=_annotation_schema(Any))
+    if (origin or annotation) is tuple and not (len(args) == 2 and args[1] is Ellipsis):  # noqa: PLR2004
+        # fixed-length tuple, e.g. tuple[int, str]
+        items = [_annotation_schema(arg) for arg in args]
+        item = items[0] if len(set(args)) == 1 else types.Schema(any_of=items)
+        return types.Schema(type=types.Type.ARRAY, items=item, min_items=len(args), max_items=len(args))
+    return types.Schema(type=types.Type.ARRAY, items=_annotation_schema(args[0]))
+
+
+def _choices_schema(values: list[object]) -> types.Schema:
+    """Builds the schema of a fixed set of values, as strings since enums must be strings in the api."""
+    if all(isinstance(value, str) for value in values):
+        return types.Schema(type=types.Type.STRING, enum=[str(value) for value in values])
+    kinds = {TYPE_MAPPING.get(type(value), types.Type.STRING) for value in values}
+    kind = kinds.pop() if len(kinds) == 1 else types.Type.STRING
+    listed = ", ".join(repr(value) for value in values)
+    return types.Schema(type=kind, description=f"one of {listed}")
+
+
+def _is_json_value(value: object) -> bool:
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return True
+    if isinstance(value, (list, tuple)):
+        return all(_is_json_value(item) for item in value)  # pyright: ignore[reportUnknownVariableType]
+    return False
 
 
 if __name__ == "__main__":
-    logging.basicConfig(
-        filename=LOG_FILENAME,
-        filemode="a",
-        level=getattr(logging, LOG_LEVEL),  # pyright: ignore[reportAny]
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    )
+    _ = configure_logging()
     tools = discover_tools(exclude=EXCLUDED_FUNCTION_MODULES)
     _ = generate_schema(tools)
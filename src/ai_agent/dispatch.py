@@ -0,0 +1,193 @@
+"""Runs tool calls on worker threads under per-tool deadlines.
+
+A tool blocked on a slow mount or a huge directory must not hang the session. Every call runs on its own
+daemon thread, in a copy of the caller's context so the session's context variables are still visible. The
+caller waits until the tool's deadline (TOOL_TIMEOUTS, then DEFAULT_TOOL_TIMEOUTS, then TOOL_TIMEOUT) and then
+gives up with ToolTimeoutError, which the agent turns into a structured error for the model.
+
+Python threads cannot be killed, so cancellation is cooperative: the call's CancellationToken is cancelled on
+timeout, and long-running tools call check_cancelled() in their loops to stop early. A tool that never checks
+keeps its thread until it returns, and is counted as abandoned meanwhile.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextvars import ContextVar
+
+from ai_agent.constants import DEFAULT_TOOL_TIMEOUTS, TOOL_TIMEOUT, TOOL_TIMEOUTS
+from ai_agent.exceptions import ToolCancelledError, ToolTimeoutError
+
+logger = logging.getLogger(__name__)
+
+
+class CancellationToken:
+    """Tells a running tool that nobody is waiting for its result any more.
+
+    Attributes:
+        deadline (float): time.monotonic() value the call is due by.
+        reason (str): Why the call was cancelled, empty while it is not.
+    """
+
+    def __init__(self, timeout: float) -> None:
+        """Initializes a token for a call that starts now.
+
+        Args:
+            timeout: Seconds the call may take.
+        """
+        self.deadline: float = time.monotonic() + timeout
+        self.reason: str = ""
+        self._event: threading.Event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the call was cancelled."""
+        return self._event.is_set()
+
+    def remaining(self) -> float:
+        """Seconds left until the deadline, never negative."""
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def cancel(self, reason: str) -> None:
+        """Cancels the call. Only the first reason is kept.
+
+        Args:
+            reason: Why the call is cancelled.
+        """
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    def raise_if_cancelled(self) -> None:
+        """Stops the tool if the call was cancelled.
+
+        Raises:
+            ToolCancelledError: If the call was cancelled.
+        """
+        if self._event.is_set():
+            raise ToolCancelledError(self.reason)
+
+
+CURRENT_CANCELLATION: ContextVar[CancellationToken | None] = ContextVar("CURRENT_CANCELLATION", default=None)
+
+
+def check_cancelled() -> None:
+    """Stops the current tool if its call was cancelled. Does nothing outside a dispatched call.
+
+    Raises:
+        ToolCancelledError: If the current call was cancelled.
+    """
+    token = CURRENT_CANCELLATION.get()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+class ToolDispatcher:
+    """Runs tool calls under deadlines and counts how they ended.
+
+    Attributes:
+        timeouts (dict[str, float]): Per-tool deadlines in seconds.
+        default_timeout (float): Deadline of tools without their own entry.
+        stats (dict[str, dict[str, int]]): Per tool: calls, timeouts, cancelled.
+    """
+
+    def __init__(self, timeouts: dict[str, float] | None = None, default_timeout: float = TOOL_TIMEOUT) -> None:
+        """Initializes the dispatcher.
+
+        Args:
+            timeouts: Per-tool deadlines. Defaults to DEFAULT_TOOL_TIMEOUTS updated with TOOL_TIMEOUTS.
+            default_timeout: Deadline of tools without their own entry.
+        """
+        self.timeouts: dict[str, float] = {**DEFAULT_TOOL_TIMEOUTS, **TOOL_TIMEOUTS} if timeouts is None else timeouts
+        self.default_timeout: float = default_timeout
+        self.stats: dict[str, dict[str, int]] = {}
+        self._running: set[threading.Thread] = set()
+        self._lock: threading.Lock = threading.Lock()
+
+    def timeout_for(self, tool_name: str) -> float:
+        """Returns the deadline of a tool in seconds."""
+        return self.timeouts.get(tool_name, self.default_timeout)
+
+    def run(self, tool_name: str, func: Callable[..., str], kwargs: dict[str, object]) -> str:
+        """Calls a tool on a worker thread and waits for it until its deadline.
+
+        Args:
+            tool_name: Name of the tool, for its deadline and counters.
+            func: The tool function.
+            kwargs: Arguments of the call.
+
+        Returns:
+            str: The tool's result.
+
+        Raises:
+            ToolTimeoutError: If the tool did not finish within its deadline.
+        """
+        timeout = self.timeout_for(tool_name)
+        token = CancellationToken(timeout)
+        future: Future[str] = Future()
+        context = contextvars.copy_context()
+        worker = threading.Thread(
+            target=context.run,
+            args=(self._work, token, future, func, kwargs),
+            name=f"tool-{tool_name}",
+            daemon=True,
+        )
+        self._count(tool_name, "calls")
+        with self._lock:
+            self._running.add(worker)
+        worker.start()
+
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            token.cancel(f"{tool_name} ran past its {timeout:g}s deadline")
+            self._count(tool_name, "timeouts")
+            logger.warning("%s timed out after %ss", tool_name, timeout)
+            raise ToolTimeoutError(tool_name, timeout) from None
+        except ToolCancelledError:
+            self._count(tool_name, "cancelled")
+            raise
+        except BaseException:
+            # e.g. KeyboardInterrupt while waiting: let the tool know nobody will read its result
+            token.cancel("the caller stopped waiting")
+            raise
+
+    def summary(self) -> str:
+        """Formats the counters on one line."""
+        tools = ", ".join(
+            f"{name}={counts['calls']}/{counts['timeouts']}/{counts['cancelled']}"
+            for name, counts in sorted(self.stats.items())
+        )
+        return f"tool dispatch (calls/timeouts/cancelled): {tools or 'none'}; abandoned={self.abandoned}"
+
+    @property
+    def abandoned(self) -> int:
+        """Number of calls still running after the caller stopped waiting for them."""
+        with self._lock:
+            return len(self._running)
+
+    def _work(
+        self, token: CancellationToken, future: Future[str], func: Callable[..., str], kwargs: dict[str, object]
+    ) -> None:
+        _ = CURRENT_CANCELLATION.set(token)
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(func(**kwargs))
+                except BaseException as e:  # noqa: BLE001
+                    future.set_exception(e)
+        finally:
+            with self._lock:
+                self._running.discard(threading.current_thread())
+
+    def _count(self, tool_name: str, counter: str) -> None:
+        with self._lock:
+            counts = self.stats.setdefault(tool_name, dict.fromkeys(("calls", "timeouts", "cancelled"), 0))
+            counts[counter] += 1
+
+
+DISPATCHER = ToolDispatcher()
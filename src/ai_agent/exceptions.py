@@ -59,6 +59,24 @@ class InvalidPathError(AIAgentError):
         super().__init__(message)
 
 
+class BinaryFileError(AIAgentError):
+    """Raised when a file that should be read as text looks binary.
+
+    Attributes:
+        target_path (str): The file that was rejected.
+    """
+
+    def __init__(self, target_path: str) -> None:
+        """Initializes the BinaryFileError.
+
+        Args:
+            target_path: The file that was rejected.
+        """
+        self.target_path: str = target_path
+        message = f"The file '{target_path}' is not UTF-8 text (it looks binary)."
+        super().__init__(message)
+
+
 class ApiKeyError(AIAgentError):
     """Raised when there is a problem with the API key."""
 
@@ -89,3 +107,175 @@ class FunctionError(AIAgentError):
         else:
             message = "no function calls gave any responses"
         super().__init__(message)
+
+
+class PluginLoadError(AIAgentError):
+    """Raised when a plugin tool registered through an entry point cannot be located or imported.
+
+    Attributes:
+        tool_name (str): The entry point name of the tool.
+    """
+
+    def __init__(self, tool_name: str, reason: str) -> None:
+        """Initializes the PluginLoadError.
+
+        Args:
+            tool_name: The entry point name of the tool.
+            reason: Why the tool could not be loaded.
+        """
+        self.tool_name: str = tool_name
+        message = f"Could not load plugin tool '{tool_name}': {reason}"
+        super().__init__(message)
+
+
+class ArgumentValidationError(AIAgentError):
+    """Raised when the model calls a tool with unknown, missing or badly typed arguments.
+
+    Attributes:
+        tool_name (str): The tool that was called.
+        errors (dict[str, str]): Problem found for each offending argument.
+        expected (list[str]): Arguments the tool accepts.
+    """
+
+    def __init__(self, tool_name: str, errors: dict[str, str], expected: list[str]) -> None:
+        """Initializes the ArgumentValidationError.
+
+        Args:
+            tool_name: The tool that was called.
+            errors: Problem found for each offending argument.
+            expected: Arguments the tool accepts.
+        """
+        self.tool_name: str = tool_name
+        self.errors: dict[str, str] = errors
+        self.expected: list[str] = expected
+        details = "; ".join(f"{name}: {problem}" for name, problem in errors.items())
+        message = f"Invalid arguments for {tool_name}: {details}"
+        super().__init__(message)
+
+
+class IterationLimitError(AIAgentError):
+    """Raised when a session reaches its iteration limit without a final response.
+
+    Attributes:
+        max_iterations (int): The limit that was reached.
+    """
+
+    def __init__(self, max_iterations: int) -> None:
+        """Initializes the IterationLimitError.
+
+        Args:
+            max_iterations: The limit that was reached.
+        """
+        self.max_iterations: int = max_iterations
+        message = f"Maximum iterations ({max_iterations}) reached."
+        super().__init__(message)
+
+
+class BudgetExceededError(AIAgentError):
+    """Raised when the next request of a session would exceed its token or cost ceiling."""
+
+    def __init__(self) -> None:
+        """Initializes the BudgetExceededError."""
+        message = "Session token budget reached. Stopping before the next request would exceed it."
+        super().__init__(message)
+
+
+class DelegationError(AIAgentError):
+    """Raised when sub-agents cannot be started from the current context."""
+
+    def __init__(self, reason: str) -> None:
+        """Initializes the DelegationError.
+
+        Args:
+            reason: Why delegation is not possible.
+        """
+        message = f"Cannot delegate: {reason}"
+        super().__init__(message)
+
+
+class LoopDetectedError(AIAgentError):
+    """Raised when a session keeps repeating the same tool calls after being warned.
+
+    Attributes:
+        cycle (str): The repeated calls.
+    """
+
+    def __init__(self, cycle: str) -> None:
+        """Initializes the LoopDetectedError.
+
+        Args:
+            cycle: The repeated calls.
+        """
+        self.cycle: str = cycle
+        message = f"Stopped early: the agent kept repeating the same tool calls ({cycle})."
+        super().__init__(message)
+
+
+class ToolTimeoutError(AIAgentError):
+    """Raised when a tool call runs past its deadline.
+
+    Attributes:
+        tool_name (str): The tool that timed out.
+        timeout (float): The deadline in seconds.
+    """
+
+    def __init__(self, tool_name: str, timeout: float) -> None:
+        """Initializes the ToolTimeoutError.
+
+        Args:
+            tool_name: The tool that timed out.
+            timeout: The deadline in seconds.
+        """
+        self.tool_name: str = tool_name
+        self.timeout: float = timeout
+        message = f"{tool_name} did not finish within {timeout:g} seconds and was cancelled."
+        super().__init__(message)
+
+
+class ToolCancelledError(AIAgentError):
+    """Raised inside a tool that checks its cancellation token after the call was cancelled."""
+
+    def __init__(self, reason: str) -> None:
+        """Initializes the ToolCancelledError.
+
+        Args:
+            reason: Why the call was cancelled.
+        """
+        message = f"Tool call cancelled: {reason}"
+        super().__init__(message)
+
+
+class SessionNotFoundError(AIAgentError):
+    """Raised when a session to resume has no log.
+
+    Attributes:
+        session_id (str): The session asked for.
+    """
+
+    def __init__(self, session_id: str) -> None:
+        """Initializes the SessionNotFoundError.
+
+        Args:
+            session_id: The session asked for.
+        """
+        self.session_id: str = session_id
+        message = f"No saved session '{session_id}' to resume."
+        super().__init__(message)
+
+
+class CheckpointNotFoundError(AIAgentError):
+    """Raised when rolling back to a checkpoint that does not exist.
+
+    Attributes:
+        checkpoint_id (str): The checkpoint asked for.
+    """
+
+    def __init__(self, checkpoint_id: str) -> None:
+        """Initializes the CheckpointNotFoundError.
+
+        Args:
+            checkpoint_id: The checkpoint asked for.
+        """
+        self.checkpoint_id: str = checkpoint_id
+        message = f"No checkpoint '{checkpoint_id}'; it may have been rolled back or pruned."
+        super().__init__(message)
@@ -0,0 +1,324 @@
+"""Opt-in cache of run_python_file results.
+
+A cached run is keyed by the script's path and content hash, its arguments and the interpreter. Which other
+files the result depends on is only known after running it, so the child process is started with a small
+sitecustomize module that records, through an import hook and an audit hook, every file under the working
+directory that it imports or opens for reading, and every directory there that it lists, after running the
+sitecustomize it shadows, if any. The hashes of those files, and of the names in those directories, are stored
+with the result, and a later lookup is a hit only if all of them are unchanged.
+
+Runs that write files, start processes or open sockets have side effects a cached result would skip, so the
+audit hook marks them uncacheable. Files containing NO_CACHE_MARKER opt out, as does the tool's no_cache argument.
+The cache lives under STATE_DIRECTORY and is trimmed to EXEC_CACHE_MAX_BYTES, least recently used first.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import NamedTuple, TypedDict
+
+from ai_agent.constants import (
+    EXEC_CACHE_ENABLED,
+    EXEC_CACHE_MAX_BYTES,
+    EXEC_CACHE_MAX_VARIANTS,
+    NO_CACHE_MARKER,
+    STATE_DIRECTORY,
+)
+
+logger = logging.getLogger(__name__)
+
+DEPENDENCIES_ENV = "AI_AGENT_EXEC_DEPENDENCIES"
+ROOT_ENV = "AI_AGENT_EXEC_ROOT"
+
+# imported by the child at startup; must not import anything from ai_agent
+BOOTSTRAP = """
+import _thread, atexit, json, os, sys
+
+
+def _run_shadowed_sitecustomize():
+    # this module hides any sitecustomize further down the path, e.g. a virtualenv's: find that one and run it
+    import importlib.machinery, importlib.util
+    here = os.path.dirname(os.path.realpath(__file__))
+    path = [entry for entry in sys.path if os.path.realpath(entry or os.curdir) != here]
+    spec = importlib.machinery.PathFinder.find_spec("sitecustomize", path)
+    if spec is not None and spec.loader is not None:
+        spec.loader.exec_module(importlib.util.module_from_spec(spec))
+
+
+_run_shadowed_sitecustomize()
+_output = os.environ.pop("AI_AGENT_EXEC_DEPENDENCIES", None)
+_root = os.environ.pop("AI_AGENT_EXEC_ROOT", None)
+if _output and _root:
+    _root = os.path.realpath(_root) + os.sep
+    _files = set()
+    _directories = set()
+    _uncacheable = []
+    # threads inside an import: the import system lists sys.path entries, but the modules it finds are recorded
+    _importing = set()
+
+    def _record(path):
+        try:
+            path = os.path.realpath(os.fsdecode(path))
+        except (TypeError, ValueError):
+            return
+        if path.startswith(_root) and os.path.isfile(path):
+            _files.add(path[len(_root):])
+
+    def _record_directory(path):
+        if isinstance(path, int):
+            _uncacheable.append("lists a directory by descriptor")
+            return
+        try:
+            path = os.path.realpath(os.fsdecode(os.curdir if path is None else path))
+        except (TypeError, ValueError):
+            return
+        if (path + os.sep).startswith(_root) and "__pycache__" not in path and os.path.isdir(path):
+            _directories.add(os.path.relpath(path, _root))
+
+    def _audit(event, args):
+        if event == "open":
+            path, mode, flags = args
+            if path is None or isinstance(path, int) or os.fsdecode(path) == _output:
+                return
+            if "__pycache__" in os.fsdecode(path):
+                return
+            if (mode and any(c in mode for c in "wax+")) or (flags or 0) & (os.O_WRONLY | os.O_RDWR):
+                _uncacheable.append(f"writes {path}")
+            else:
+                _record(path)
+        elif event in ("os.listdir", "os.scandir"):
+            if _thread.get_ident() not in _importing:
+                _record_directory(args[0])
+        elif event in ("subprocess.Popen", "os.system", "os.exec", "os.spawn", "os.posix_spawn", "socket.connect"):
+            _uncacheable.append(event)
+
+    class _Recorder:
+        @staticmethod
+        def find_spec(name, path=None, target=None):
+            thread = _thread.get_ident()
+            nested = thread in _importing
+            _importing.add(thread)
+            try:
+                for finder in sys.meta_path:
+                    if finder is _Recorder:
+                        continue
+                    find = getattr(finder, "find_spec", None)
+                    spec = find(name, path, target) if find else None
+                    if spec is not None:
+                        if spec.origin:
+                            _record(spec.origin)
+                        return spec
+                return None
+            finally:
+                if not nested:
+                    _importing.discard(thread)
+
+    def _write():
+        with open(_output, "w", encoding="utf-8") as f:
+            record = {"files": sorted(_files), "directories": sorted(_directories), "uncacheable": _uncacheable[:5]}
+            json.dump(record, f)
+
+    sys.meta_path.insert(0, _Recorder)
+    atexit.register(_write)
+    sys.addaudithook(_audit)
+"""
+
+
+class CachedRun(NamedTuple):
+    """Outcome of a finished run."""
+
+    stdout: str
+    stderr: str
+    returncode: int
+
+
+class _Variant(TypedDict):
+    dependencies: dict[str, str]
+    stdout: str
+    stderr: str
+    returncode: int
+
+
+class ExecutionCache:
+    """Disk cache of script runs, validated against the files each run read.
+
+    Attributes:
+        directory (Path): Where entries are kept.
+        max_bytes (int): Size the cache is trimmed to after each store.
+        stats (dict[str, int]): Counters: hits, misses, stored, uncacheable, evicted.
+    """
+
+    def __init__(self, directory: str | Path | None = None, max_bytes: int = EXEC_CACHE_MAX_BYTES) -> None:
+        """Initializes the cache. Nothing is created on disk until the first store.
+
+        Args:
+            directory: Where entries are kept. Defaults to STATE_DIRECTORY/exec-cache.
+            max_bytes: Size the cache is trimmed to after each store.
+        """
+        self.directory: Path = Path(STATE_DIRECTORY, "exec-cache") if directory is None else Path(directory)
+        self.max_bytes: int = max_bytes
+        self.stats: dict[str, int] = dict.fromkeys(("hits", "misses", "stored", "uncacheable", "evicted"), 0)
+        self._lock: threading.Lock = threading.Lock()
+
+    def lookup(self, root: Path, script: Path, args: list[str]) -> CachedRun | None:
+        """Returns the stored result of an identical earlier run, if every file it read is unchanged.
+
+        Args:
+            root: Resolved working directory.
+            script: Resolved script path.
+            args: Command line arguments.
+
+        Returns:
+            CachedRun | None: The stored result, or None on a miss or if the script opts out.
+        """
+        key = self._key(root, script, args)
+        if key is None:
+            return None
+        entry = self.directory / f"{key}.json"
+        with self._lock:
+            for variant in self._read(entry):
+                if all(_dependency_hash(root, name) == digest for name, digest in variant["dependencies"].items()):
+                    os.utime(entry)
+                    self.stats["hits"] += 1
+                    return CachedRun(variant["stdout"], variant["stderr"], variant["returncode"])
+            self.stats["misses"] += 1
+        return None
+
+    def child_environment(self, root: Path) -> tuple[dict[str, str], Path]:
+        """Builds the environment that makes a child process record what it reads.
+
+        Args:
+            root: Resolved working directory.
+
+        Returns:
+            tuple[dict[str, str], Path]: The environment, and the file the child writes its dependencies to.
+        """
+        bootstrap_directory = self.directory.resolve() / "bootstrap"
+        bootstrap = bootstrap_directory / "sitecustomize.py"
+        if not bootstrap.exists() or bootstrap.read_text(encoding="utf-8") != BOOTSTRAP:
+            bootstrap_directory.mkdir(parents=True, exist_ok=True)
+            _ = bootstrap.write_text(BOOTSTRAP, encoding="utf-8")
+
+        fd, dependencies = tempfile.mkstemp(dir=self.directory.resolve(), prefix="deps-", suffix=".deps")
+        os.close(fd)
+        env = dict(os.environ)
+        python_path = [str(bootstrap_directory), *filter(None, [env.get("PYTHONPATH")])]
+        env.update({"PYTHONPATH": os.pathsep.join(python_path), DEPENDENCIES_ENV: dependencies, ROOT_ENV: str(root)})
+        return env, Path(dependencies)
+
+    def store(self, root: Path, script: Path, args: list[str], run: CachedRun, dependencies_file: Path) -> bool:
+        """Stores a finished run, unless it had side effects or a file it read opts out.
+
+        Args:
+            root: Resolved working directory.
+            script: Resolved script path.
+            args: Command line arguments.
+            run: Outcome of the run.
+            dependencies_file: File the child wrote its dependencies to. It is removed.
+
+        Returns:
+            bool: Whether the run was stored.
+        """
+        try:
+            recorded = json.loads(dependencies_file.read_text(encoding="utf-8") or "null")
+        except (OSError, ValueError):
+            recorded = None
+        finally:
+            dependencies_file.unlink(missing_ok=True)
+
+        key = self._key(root, script, args)
+        if key is None or not recorded or recorded["uncacheable"]:
+            reason = recorded["uncacheable"] if recorded else "no dependency record"
+            logger.debug("not caching run of %s: %s", script, reason)
+            self.stats["uncacheable"] += 1
+            return False
+
+        dependencies: dict[str, str] = {}
+        for name in [script.relative_to(root).as_posix(), *recorded["files"]]:
+            digest = _file_hash(root / name)
+            if digest is None or _opts_out(root / name):
+                self.stats["uncacheable"] += 1
+                return False
+            dependencies[name] = digest
+        for name in recorded.get("directories", []):
+            digest = _dependency_hash(root, f"{name}/")
+            if digest is None:
+                self.stats["uncacheable"] += 1
+                return False
+            dependencies[f"{name}/"] = digest
+
+        variant = _Variant(dependencies=dependencies, stdout=run.stdout, stderr=run.stderr, returncode=run.returncode)
+        entry = self.directory / f"{key}.json"
+        with self._lock:
+            variants = [v for v in self._read(entry) if v["dependencies"] != dependencies]
+            variants = [variant, *variants][:EXEC_CACHE_MAX_VARIANTS]
+            temporary = entry.with_suffix(".tmp")
+            _ = temporary.write_text(json.dumps(variants), encoding="utf-8")
+            _ = temporary.replace(entry)
+            self.stats["stored"] += 1
+            self._trim()
+        return True
+
+    def summary(self) -> str:
+        """Formats the counters on one line."""
+        return "exec cache: " + ", ".join(f"{name}={count}" for name, count in self.stats.items())
+
+    def _key(self, root: Path, script: Path, args: list[str]) -> str | None:
+        digest = _file_hash(script)
+        if digest is None or _opts_out(script):
+            return None
+        material = [script.relative_to(root).as_posix(), digest, args, sys.version, sys.executable]
+        return hashlib.sha256(json.dumps(material).encode()).hexdigest()[:32]
+
+    @staticmethod
+    def _read(entry: Path) -> list[_Variant]:
+        try:
+            return json.loads(entry.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            logger.warning("ignoring unreadable cache entry %s: %s", entry, e)
+            return []
+
+    def _trim(self) -> None:
+        entries = [(path.stat(), path) for path in self.directory.glob("*.json")]
+        total = sum(stat.st_size for stat, _ in entries)
+        for stat, path in sorted(entries, key=lambda item: item[0].st_mtime_ns):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+            self.stats["evicted"] += 1
+
+
+def _dependency_hash(root: Path, name: str) -> str | None:
+    # a name ending in "/" is a directory the run listed: it changes when an entry is added, removed or renamed
+    if name.endswith("/"):
+        try:
+            listing = sorted(path.name for path in (root / name).iterdir())
+        except OSError:
+            return None
+        return hashlib.sha256("\0".join(listing).encode()).hexdigest()
+    return _file_hash(root / name)
+
+
+def _file_hash(path: Path) -> str | None:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def _opts_out(path: Path) -> bool:
+    try:
+        return NO_CACHE_MARKER.encode() in path.read_bytes()
+    except OSError:
+        return True
+
+
+EXEC_CACHE: ExecutionCache | None = ExecutionCache() if EXEC_CACHE_ENABLED else None
@@ -0,0 +1,47 @@
+"""Tools for doing arithmetic.
+
+This module provides a safe, agent-callable function for evaluating arithmetic expressions in process.
+"""
+
+import logging
+
+from ai_agent.calculator.pkg.calculator import Calculator
+from ai_agent.calculator.pkg.render import format_result
+
+logger = logging.getLogger(__name__)
+
+_CALCULATOR = Calculator()
+
+
+def calculate(working_directory: str, expressions: list[str]) -> str:  # noqa: ARG001
+    """Evaluates one or more arithmetic expressions in process. Prefer this over running calc.py.
+
+    Supports + - * / with standard order of operations. Tokens must be space delimited, e.g. "1 + 2 / 4".
+    Returns one line per expression in the form "<expression> = <result>", or "<expression> = Error: <reason>".
+
+    Args:
+        working_directory: Unused, injected for every tool.
+        expressions: List of expressions to evaluate in one call, e.g. ["3 + 5", "2 * 3 - 1"].
+
+    Returns:
+        str: One result line per expression.
+    """
+    if isinstance(expressions, str):
+        expressions = [expressions]
+
+    lines: list[str] = []
+    for expression in expressions:
+        try:
+            result = _CALCULATOR.evaluate(expression)
+        except (ValueError, ZeroDivisionError, OverflowError) as e:
+            logger.debug("Could not evaluate '%s': %s", expression, e)
+            lines.append(f"{expression} = Error: {e}")
+            continue
+        if result is None:
+            lines.append(f"{expression} = Error: empty expression")
+        else:
+            lines.append(f"{expression} = {format_result(result)}")
+
+    if not lines:
+        return "Error: no expressions given"
+    return "\n".join(lines)
@@ -0,0 +1,42 @@
+"""Tools for splitting work across sub-agents.
+
+This module provides an agent-callable function for running independent tasks in parallel.
+"""
+
+import logging
+
+from ai_agent.exceptions import AIAgentError
+
+logger = logging.getLogger(__name__)
+
+
+def delegate(working_directory: str, tasks: list[str]) -> str:  # noqa: ARG001
+    """Runs independent tasks in parallel sub-agents and returns each one's final answer.
+
+    Use this when work splits into independent parts, e.g. "summarize each module in pkg". Every sub-agent has
+    the same tools but none of this conversation, so each task must be fully self-contained.
+
+    Args:
+        working_directory: Unused, injected for every tool.
+        tasks: Self-contained task descriptions, one per sub-agent.
+
+    Returns:
+        str: The final answer of each task, in order.
+    """
+    # imported here because ai_agent.agent discovers this module while it is being imported
+    from ai_agent.subagents import run_subagents  # noqa: PLC0415
+
+    if isinstance(tasks, str):
+        tasks = [tasks]
+    if not tasks:
+        return "Error: no tasks given"
+
+    try:
+        answers = run_subagents(tasks)
+    except AIAgentError as e:
+        logger.exception("Error in delegate:")
+        return f"Error: {e}"
+
+    return "\n\n".join(
+        f"## Task {i}: {task}\n{answer}" for i, (task, answer) in enumerate(zip(tasks, answers, strict=True), 1)
+    )
@@ -7,21 +7,25 @@ import logging
 
 from ai_agent.constants import FILE_CHAR_LIMIT
 from ai_agent.exceptions import AIAgentError, PathType
-from ai_agent.functions.utils import validate_path
+from ai_agent.functions.utils import read_text_range, validate_path
+from ai_agent.prefetch import PREFETCHER
 
 logger = logging.getLogger(__name__)
 
 
-def get_file_content(working_directory: str, file_path: str) -> str:
+def get_file_content(working_directory: str, file_path: str, offset: int = 0) -> str:
     """Reads the content of a file up to a character limit of FILE_CHAR_LIMIT.
 
     This function is designed to be safe for use by an LLM agent. It will always
     return a string. On success, it returns the file content. On failure, it
-    returns a string starting with "Error: ".
+    returns a string starting with "Error: ". Long files can be read in parts by
+    calling again with the offset given in the truncation notice. Files compressed
+    with gzip, bzip2 or xz are decompressed on the fly; binary files are refused.
 
     Args:
         working_directory: The highest-level directory where reading is allowed.
         file_path: The path to the file to read, relative to the working directory.
+        offset: Number of characters to skip from the start of the file. Defaults to 0.
 
     Returns:
         str: The content of the file or an error message.
@@ -29,12 +33,18 @@ def get_file_content(working_directory: str, file_path: str) -> str:
     try:
         target_path = validate_path(file_path, working_directory, expected_type=PathType.FILE)
 
-        with target_path.open(encoding="utf-8") as f:
-            content = f.read(FILE_CHAR_LIMIT)
-            # Check if there's more content
-            if f.read(1):
-                content += f"\n[ ... File '{file_path}' truncated at {FILE_CHAR_LIMIT} characters ... ]"
-    except (OSError, AIAgentError) as e:
+        offset = max(offset, 0)
+        cached = PREFETCHER.get(target_path) if PREFETCHER else None
+        if cached is not None:
+            content, truncated = cached[offset : offset + FILE_CHAR_LIMIT], len(cached) > offset + FILE_CHAR_LIMIT
+        else:
+            content, truncated = read_text_range(target_path, offset, FILE_CHAR_LIMIT)
+        if truncated:
+            content += (
+                f"\n[ ... File '{file_path}' truncated at {FILE_CHAR_LIMIT} characters ... ]"
+                f"\n[ ... call get_file_content with offset={offset + len(content)} to read more ... ]"
+            )
+    except (OSError, UnicodeDecodeError, AIAgentError) as e:
         logger.exception("Error in get_file_content:")
         return f"Error: {e}"
     else:
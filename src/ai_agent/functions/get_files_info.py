@@ -5,8 +5,10 @@ This module provides a safe, agent-callable function for querying files.
 
 import logging
 
+from ai_agent.dispatch import check_cancelled
 from ai_agent.exceptions import AIAgentError, PathType
 from ai_agent.functions.utils import validate_path
+from ai_agent.prefetch import PREFETCHER
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +27,7 @@ def get_files_info(working_directory: str, directory: str = ".") -> str:
     Returns:
         str: A formatted string containing file information or an error message.
     """
-    logger.debug(f"New request: working='{working_directory}', dir='{directory}'")
+    logger.debug("New request: working='%s', dir='%s'", working_directory, directory)
 
     try:
         target_path = validate_path(directory, working_directory, expected_type=PathType.DIRECTORY)
@@ -35,11 +37,16 @@ def get_files_info(working_directory: str, directory: str = ".") -> str:
         return f"Error: {e}"
 
     reports: list[str] = []
-    for file in sorted(target_path.iterdir()):
+    entries = sorted(target_path.iterdir())
+    for file in entries:
+        check_cancelled()
         try:
             file_report = f"- {file.name}: file_size={file.stat().st_size} bytes, is_dir={file.is_dir()}"
             reports.append(file_report)
         except OSError as e:
-            logger.warning(f"Could not stat file {file.name}: {e}")
+            logger.warning("Could not stat file %s: %s", file.name, e)
+
+    if PREFETCHER:
+        _ = PREFETCHER.schedule(entries)
 
     return "\n".join(reports)
@@ -0,0 +1,66 @@
+"""Tools for tracking changes to the working directory.
+
+This module provides a safe, agent-callable function for listing what changed since an earlier look,
+instead of listing whole directories again.
+"""
+
+import logging
+
+from ai_agent.constants import WORKSPACE_DELTA_LIMIT
+from ai_agent.workspace import get_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+def get_workspace_changes(working_directory: str, since: str = "") -> str:
+    """List files and directories created, modified or deleted since a token.
+
+    Call it without a token first to get one. Later calls with that token return only what changed in between,
+    e.g. the files written by a script, plus a new token for the next call.
+
+    Args:
+        working_directory: The highest-level directory where inspection is allowed.
+        since: Token returned by an earlier call. Leave empty to get a token for the current state.
+
+    Returns:
+        str: The new token followed by one line per change ("+ created", "~ modified", "- deleted"),
+            or an error message.
+    """
+    logger.debug("New request: working='%s', since='%s'", working_directory, since)
+
+    try:
+        snapshot = get_snapshot(working_directory)
+    except OSError as e:
+        logger.exception("Error in get_workspace_changes:")
+        return f"Error: {e}"
+
+    if not since:
+        snapshot.refresh()
+        directories = sum(entry.is_dir for entry in snapshot.entries.values())
+        return (
+            f"token={snapshot.token}\n"
+            f"Workspace has {len(snapshot.entries) - directories} files in {directories} directories."
+            " Pass the token as `since` to see what changes from now on."
+        )
+
+    delta = snapshot.changes_since(since)
+    if delta is None:
+        return "Error: unknown or expired token; call get_workspace_changes without `since` for a new one"
+
+    lines = [f"token={delta.token}"]
+    changes = [
+        *(("+", path) for path in delta.created),
+        *(("~", path) for path in delta.modified),
+        *(("-", path) for path in delta.deleted),
+    ]
+    if not changes:
+        lines.append("No changes.")
+    for marker, path in changes[:WORKSPACE_DELTA_LIMIT]:
+        entry = snapshot.entries.get(path)
+        if entry is None:
+            lines.append(f"{marker} {path}")
+        else:
+            lines.append(f"{marker} {path}: file_size={entry.size} bytes, is_dir={entry.is_dir}")
+    if len(changes) > WORKSPACE_DELTA_LIMIT:
+        lines.append(f"[ ... {len(changes) - WORKSPACE_DELTA_LIMIT} more changes not shown; use get_files_info ... ]")
+    return "\n".join(lines)
@@ -0,0 +1,40 @@
+"""Tools for finding more tools.
+
+This module provides an agent-callable function for listing the tools that are not offered in the current turn.
+"""
+
+import logging
+
+from ai_agent.constants import LIST_TOOLS_LIMIT
+from ai_agent.router import CURRENT_ROUTER
+
+logger = logging.getLogger(__name__)
+
+
+def list_tools(working_directory: str, query: str = "") -> str:  # noqa: ARG001
+    """Lists more tools than the ones offered right now, and makes the listed tools callable from the next turn.
+
+    Use it when none of your tools fits the task, e.g. query="convert csv to json".
+
+    Args:
+        working_directory: Unused, injected for every tool.
+        query: words describing what the tool should do. Leave empty to list every other tool.
+
+    Returns:
+        str: One line per tool with its name and what it does, or an error message.
+    """
+    router = CURRENT_ROUTER.get()
+    if router is None:
+        return "Error: no tool catalogue outside of a session"
+
+    # no more than fit next to the core tools, so every tool listed is really offered in the next turn
+    declarations = router.unlisted(query)[: min(LIST_TOOLS_LIMIT, router.free_slots)]
+    if not declarations:
+        return "No other tools match." if query.strip() else "All tools are already available."
+
+    router.pin([declaration.name for declaration in declarations if declaration.name])
+    logger.info("list_tools unlocked %s tools for query %r", len(declarations), query)
+    lines = [
+        f"- {declaration.name}: {(declaration.description or '').split(chr(10))[0]}" for declaration in declarations
+    ]
+    return "These tools can be called from now on:\n" + "\n".join(lines)
@@ -0,0 +1,32 @@
+"""Tools for reading back the output of a resumed session.
+
+This module provides an agent-callable function for loading a tool output that resuming left on disk.
+"""
+
+import logging
+
+from ai_agent.sessions import SESSION_STORE
+
+logger = logging.getLogger(__name__)
+
+
+def load_session_output(working_directory: str, ref: str) -> str:  # noqa: ARG001
+    """Loads the output of a tool call from before the session was resumed.
+
+    Older outputs of a resumed session are replaced by a note with a ref; pass that ref to read the output,
+    as it was when the session ran. Call the tool itself again instead if you need the current state.
+
+    Args:
+        working_directory: Unused, injected for every tool.
+        ref: The ref given in the note, e.g. "3f2a...".
+
+    Returns:
+        str: The stored output, or an error message.
+    """
+    if SESSION_STORE is None:
+        return "Error: session logs are disabled (SESSION_LOG_ENABLED)"
+    output = SESSION_STORE.load(ref.strip())
+    if output is None:
+        logger.warning("no stored session output %r", ref)
+        return f"Error: no stored output with ref '{ref}'"
+    return output
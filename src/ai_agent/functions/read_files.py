@@ -0,0 +1,165 @@
+"""Tools for interacting with the local file system.
+
+This module provides a safe, agent-callable function for reading many files in one call.
+"""
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TypedDict
+
+from ai_agent.constants import READ_FILES_MAX_FILES, READ_FILES_WORKERS, TOOL_OUTPUT_LIMIT, TOOL_OUTPUT_LIMITS
+from ai_agent.dispatch import check_cancelled
+from ai_agent.exceptions import AIAgentError, BinaryFileError, DirectoryTraversalError, PathType
+from ai_agent.functions.utils import read_text_range, validate_path
+from ai_agent.output_budget import CURRENT_BUDGET
+from ai_agent.prefetch import PREFETCHER
+
+logger = logging.getLogger(__name__)
+
+GLOB_CHARACTERS = frozenset("*?[")
+# share of the output limit left for file contents; the rest covers JSON keys and escaping
+CONTENT_SHARE = 0.9
+# room for the next_offset key a newly truncated entry gains
+TRUNCATION_MARGIN = 32
+
+
+class FileResult(TypedDict):
+    """Per-file entry of the read_files result."""
+
+    path: str
+    content: str
+    truncated: bool
+    error: str | None
+
+
+def read_files(working_directory: str, paths: list[str]) -> str:
+    """Reads several files in one call. Prefer this over repeated get_file_content calls.
+
+    Paths may be glob patterns such as "pkg/*.py" or "**/*.md". Files are read concurrently under one shared
+    character budget; small files are returned whole and larger ones share what is left. Returns JSON:
+    {"files": [{"path", "content", "truncated", "error", "next_offset"?}], "omitted": [...]}. For a truncated
+    file, call get_file_content with next_offset to read on.
+
+    Args:
+        working_directory: The highest-level directory where reading is allowed.
+        paths: File paths or glob patterns, relative to the working directory, e.g. ["main.py", "pkg/*.py"].
+
+    Returns:
+        str: A JSON document with one entry per file, or an error message.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    logger.debug("New request: working='%s', paths=%s", working_directory, paths)
+    try:
+        base_path = Path(working_directory).resolve(strict=True)
+    except OSError as e:
+        return f"Error: {e}"
+
+    targets, errors = _expand(paths, base_path, working_directory)
+    omitted = [relative for relative, _ in targets[READ_FILES_MAX_FILES:]]
+    targets = targets[:READ_FILES_MAX_FILES]
+    if not targets and not errors:
+        return "Error: no files matched"
+
+    # the output is JSON, which the turn's output budget cannot cut without breaking it; fit it here instead
+    budget = CURRENT_BUDGET.get()
+    output_limit = budget.limit("read_files") if budget else TOOL_OUTPUT_LIMITS.get("read_files", TOOL_OUTPUT_LIMIT)
+    allocations = _allocate(targets, int(output_limit * CONTENT_SHARE))
+    with ThreadPoolExecutor(max_workers=min(READ_FILES_WORKERS, len(targets)) or 1) as pool:
+        texts = list(pool.map(_read, targets, allocations))
+
+    results = [
+        FileResult(path=relative, content=text, truncated=truncated, error=error)
+        for (relative, _), (text, truncated, error) in zip(targets, texts, strict=True)
+    ]
+    results.extend(errors)
+
+    # JSON escaping can still push the document over the limit; trim the largest contents until it fits.
+    # An escaped character takes at least one character of the document, so cutting the overflow is enough.
+    document = _render(results, omitted)
+    for _ in results:
+        overflow = len(document) - output_limit
+        if overflow <= 0:
+            break
+        largest = max(results, key=lambda result: len(result["content"]))
+        largest["content"] = largest["content"][: max(len(largest["content"]) - overflow - TRUNCATION_MARGIN, 0)]
+        largest["truncated"] = True
+        document = _render(results, omitted)
+    return document
+
+
+def _expand(
+    patterns: list[str], base_path: Path, working_directory: str
+) -> tuple[list[tuple[str, Path]], list[FileResult]]:
+    """Resolves paths and glob patterns to files, keeping the first occurrence of each.
+
+    Returns:
+        tuple: (relative path, resolved path) of each file to read, and error entries for patterns that failed.
+    """
+    targets: dict[str, Path] = {}
+    errors: list[FileResult] = []
+    for pattern in patterns:
+        check_cancelled()
+        try:
+            if GLOB_CHARACTERS.isdisjoint(pattern):
+                matches = [validate_path(pattern, working_directory, expected_type=PathType.FILE)]
+            else:
+                matches = sorted(path.resolve() for path in base_path.glob(pattern) if path.is_file())
+                if not matches:
+                    errors.append(_error(pattern, "no files match this pattern"))
+        except (OSError, ValueError, NotImplementedError, AIAgentError) as e:
+            errors.append(_error(pattern, str(e)))
+            continue
+
+        for match in matches:
+            if not match.is_relative_to(base_path):
+                errors.append(_error(pattern, str(DirectoryTraversalError(str(match)))))
+                continue
+            _ = targets.setdefault(match.relative_to(base_path).as_posix(), match)
+    return list(targets.items()), errors
+
+
+def _allocate(targets: list[tuple[str, Path]], budget: int) -> list[int]:
+    """Splits the character budget so that small files are read whole and large ones share the rest evenly."""
+    sizes: list[int] = []
+    for _, path in targets:
+        try:
+            sizes.append(path.stat().st_size)
+        except OSError:
+            sizes.append(0)
+    allocations = [0] * len(targets)
+    remaining = budget
+    for count, index in enumerate(sorted(range(len(targets)), key=sizes.__getitem__)):
+        share = remaining // (len(targets) - count)
+        # bytes are an upper bound on characters, so a file within its share is read whole
+        allocations[index] = min(sizes[index], share)
+        remaining -= allocations[index]
+    return allocations
+
+
+def _read(target: tuple[str, Path], limit: int) -> tuple[str, bool, str | None]:
+    relative, path = target
+    try:
+        cached = PREFETCHER.get(path) if PREFETCHER else None
+        if cached is not None:
+            return cached[:limit], len(cached) > limit, None
+        text, truncated = read_text_range(path, 0, limit)
+    except (OSError, UnicodeDecodeError, BinaryFileError) as e:
+        logger.warning("read_files could not read %s: %s", relative, e)
+        return "", False, str(e)
+    return text, truncated, None
+
+
+def _error(path: str, error: str) -> FileResult:
+    return FileResult(path=path, content="", truncated=False, error=error)
+
+
+def _render(results: list[FileResult], omitted: list[str]) -> str:
+    files = [{**result, "next_offset": len(result["content"])} if result["truncated"] else result for result in results]
+    payload: dict[str, object] = {"files": files}
+    if omitted:
+        payload["omitted"] = omitted
+        payload["note"] = f"only the first {READ_FILES_MAX_FILES} files were read; request the omitted ones separately"
+    return json.dumps(payload, ensure_ascii=False)
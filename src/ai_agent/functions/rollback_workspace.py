@@ -0,0 +1,52 @@
+"""Tools for undoing changes to the working directory.
+
+This module provides an agent-callable function for listing workspace checkpoints and rolling back to one.
+"""
+
+import logging
+import time
+
+from ai_agent.checkpoints import get_journal
+from ai_agent.exceptions import CheckpointNotFoundError
+from ai_agent.prefetch import PREFETCHER
+
+logger = logging.getLogger(__name__)
+
+
+def rollback_workspace(working_directory: str, checkpoint: str = "") -> str:
+    """Undo file writes by restoring the working directory to how it was before a checkpoint.
+
+    A checkpoint is taken before every write_file and write_files call. Call this without a checkpoint to
+    list them, newest first, then with the id of the first bad write to undo it and everything after it.
+
+    Args:
+        working_directory: The highest-level directory where writing is allowed.
+        checkpoint: Id of the checkpoint to roll back to. Leave empty to list the checkpoints.
+
+    Returns:
+        str: The checkpoints, or the files that were restored, or an error message.
+    """
+    journal = get_journal(working_directory)
+    if journal is None:
+        return "Error: checkpoints are disabled (CHECKPOINTS_ENABLED)"
+
+    if not checkpoint:
+        checkpoints = journal.checkpoints()
+        if not checkpoints:
+            return "No checkpoints."
+        return "\n".join(
+            f"{info.checkpoint_id}  {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(info.created))}  "
+            f"before {info.label}"
+            for info in checkpoints
+        )
+
+    try:
+        restored = journal.rollback(checkpoint)
+    except (CheckpointNotFoundError, OSError) as e:
+        logger.exception("Error in rollback_workspace:")
+        return f"Error: {e}"
+
+    if PREFETCHER:
+        for path in restored:
+            PREFETCHER.invalidate(journal.root / path)
+    return f"Rolled back to before checkpoint {checkpoint}; restored {len(restored)} files: {', '.join(restored)}"
@@ -0,0 +1,58 @@
+"""Tools for interacting with the local file system.
+
+This module provides an agent-callable function for running python snippets in a persistent kernel.
+"""
+
+import logging
+
+from ai_agent.constants import KERNEL_MAX_TIMEOUT, KERNEL_TIMEOUT
+from ai_agent.kernel import KernelResult, get_kernel
+
+logger = logging.getLogger(__name__)
+
+
+def run_python_code(working_directory: str, code: str, timeout: int = KERNEL_TIMEOUT, restart: bool = False) -> str:
+    """Runs a python snippet in a persistent interpreter whose variables and imports survive between calls.
+
+    Use it to explore data or iterate on code without rerunning everything from scratch. The interpreter
+    runs in the working directory, so its modules can be imported. If the snippet ends in an expression,
+    its value is shown like in a REPL. A snippet that runs too long is interrupted without losing state.
+    It is not sandboxed: only its memory, CPU time and file sizes are capped.
+
+    Args:
+        working_directory: the working_directory
+        code: python source to run, one or more statements, e.g. "total = sum(range(10))"
+        timeout: seconds the snippet may run before it is interrupted
+        restart: set to true to discard all state before running the snippet
+
+    Returns:
+        str: captured output and the value of the last expression, or the error.
+    """
+    timeout = max(1, min(timeout, KERNEL_MAX_TIMEOUT))
+    try:
+        kernel = get_kernel(working_directory)
+        if restart:
+            kernel.restart()
+        # WARNING: security concern. This runs arbitrary code, which could be dangerous.
+        result = kernel.execute(code, timeout)
+    except OSError as e:
+        logger.exception("Error in run_python_code:")
+        return f"Error: could not run the kernel: {e}"
+    return _format_result(result, timeout)
+
+
+def _format_result(result: KernelResult, timeout: int) -> str:
+    lines: list[str] = []
+    if result.stdout:
+        lines.append(f"STDOUT: {result.stdout}")
+    if result.stderr:
+        lines.append(f"STDERR: {result.stderr}")
+    if result.value is not None:
+        lines.append(f"Result: {result.value}")
+    if result.timed_out:
+        lines.append(f"Interrupted after {timeout} seconds.")
+    if result.error:
+        lines.append(f"Error: {result.error}")
+    if result.restarted:
+        lines.append(f"Kernel restarted: {result.restarted}.")
+    return "\n".join(lines) or "No output produced"
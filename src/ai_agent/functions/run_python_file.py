@@ -5,25 +5,35 @@ This module provides a safe, agent-callable function for running a python file.
 
 import logging
 import sys
+from pathlib import Path
 from subprocess import run
 from typing import Any
 
 from ai_agent.constants import MAX_FUNCTION_TIMEOUT, SUPPORTED_FILE_EXTENSIONS
 from ai_agent.exceptions import DirectoryTraversalError, PathType
+from ai_agent.exec_cache import EXEC_CACHE, CachedRun
 from ai_agent.functions.utils import validate_path
 
 logger = logging.getLogger(__name__)
 
 
-def run_python_file(working_directory: str, file_path: str, args: list[Any] | None = None) -> str:  # pyright: ignore[reportExplicitAny]
+def run_python_file(
+    working_directory: str,
+    file_path: str,
+    args: list[Any] | None = None,  # pyright: ignore[reportExplicitAny]
+    no_cache: bool = False,
+) -> str:
     """Tool to allow agent to execute python code stored in the working directory.
 
     Only python code stored in teh working directoyr is allowed to be run.
+    When the execution cache is enabled, rerunning an unchanged script with the same arguments returns the
+    stored output; set no_cache to force a fresh run.
 
     Args:
         working_directory: the working_directory
         file_path: file path must be a decendent of working_directory and be a python file
         args: comand arguemts to the python function
+        no_cache: set to true to run the script even if a cached result exists
 
     Returns:
         str: output of the python funciton being ran by the ai agent.
@@ -42,25 +52,43 @@ def run_python_file(working_directory: str, file_path: str, args: list[Any] | No
     if not target_path.name.endswith(SUPPORTED_FILE_EXTENSIONS[0]):  # .py extension
         return f'Error: "{file_path}" is not a Python file.'
 
+    root = Path(working_directory).resolve()
+    cache = None if no_cache else EXEC_CACHE
+    arguments = [str(arg) for arg in args]
+    cached = cache.lookup(root, target_path, arguments) if cache else None
+    if cached is not None:
+        return _format_output(cached) + "\n(cached result of an identical earlier run; pass no_cache=true to rerun)"
+
+    dependencies_file = None
     try:
+        env, dependencies_file = cache.child_environment(root) if cache else (None, None)
         # WARNING: security concern. This runs arbitrary code, which could be dangerous.
         process = run(  # noqa: S603
-            [sys.executable, target_path, *args],
+            [sys.executable, target_path, *arguments],
             text=True,
             check=False,
             capture_output=True,
             timeout=MAX_FUNCTION_TIMEOUT,
+            env=env,
         )
-
-        if not process.stdout and not process.stderr:
-            return "No output produced"
-
-        output = ""
-        output += f"STDOUT: {process.stdout}\n"
-        output += f"STDERR: {process.stderr}\n"
-        if process.returncode != 0:
-            output += f"Process exited with code {process.returncode}"
+        finished = CachedRun(process.stdout, process.stderr, process.returncode)
+        if cache and dependencies_file:
+            _ = cache.store(root, target_path, arguments, finished, dependencies_file)
     except Exception as e:  # noqa: BLE001
+        if dependencies_file:
+            dependencies_file.unlink(missing_ok=True)
         return f"Error: excecuting Python file: {e}"
 
+    return _format_output(finished)
+
+
+def _format_output(finished: CachedRun) -> str:
+    if not finished.stdout and not finished.stderr:
+        return "No output produced"
+
+    output = ""
+    output += f"STDOUT: {finished.stdout}\n"
+    output += f"STDERR: {finished.stderr}\n"
+    if finished.returncode != 0:
+        output += f"Process exited with code {finished.returncode}"
     return output
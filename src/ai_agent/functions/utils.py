@@ -1,12 +1,32 @@
 """Package for working with files."""
 
+import bz2
+import codecs
+import gzip
+import io
 import logging
+import lzma
+import re
+from collections.abc import Callable
 from pathlib import Path
 
-from ai_agent.exceptions import DirectoryTraversalError, InvalidPathError, PathType
+from ai_agent.constants import BINARY_SNIFF_BYTES, READ_CHUNK_SIZE
+from ai_agent.dispatch import check_cancelled
+from ai_agent.exceptions import BinaryFileError, DirectoryTraversalError, InvalidPathError, PathType
 
 logger = logging.getLogger(__name__)
 
+# compressed formats are recognised by their magic bytes, whatever the file is called
+DECOMPRESSORS: dict[re.Pattern[bytes], Callable[[Path], io.BufferedIOBase]] = {
+    re.compile(rb"\x1f\x8b"): gzip.GzipFile,
+    # "BZh" alone is ordinary text: also require the block size and the magic of the first block, or of the
+    # end of the stream for empty data
+    re.compile(rb"BZh[1-9](?:1AY&SY|\x17rE8P\x90)"): bz2.BZ2File,
+    re.compile(rb"\xfd7zXZ\x00"): lzma.LZMAFile,
+}
+# number of bytes read to match DECOMPRESSORS
+MAGIC_SIZE = 10
+
 
 def validate_path(relative_path: str, working_directory: str, expected_type: PathType) -> Path:
     """Method for validating the path.
@@ -34,3 +54,71 @@ def validate_path(relative_path: str, working_directory: str, expected_type: Pat
     if (expected_type == PathType.DIRECTORY) != target_path.is_dir():
         raise InvalidPathError(str(target_path), path_type=expected_type)
     return target_path
+
+
+def read_text_range(path: Path, offset: int, limit: int) -> tuple[str, bool]:
+    """Reads up to `limit` characters of a text file, starting at character `offset`.
+
+    Only the requested range is kept in memory; characters before `offset` are read and discarded in chunks.
+    The skipping stops early if the tool call is cancelled. gzip, bzip2 and xz files are decompressed while
+    streaming, so only as much is decompressed as the range needs. The first BINARY_SNIFF_BYTES are checked
+    before decoding, and a file that looks binary is rejected without reading the rest.
+
+    Args:
+        path: File to read.
+        offset: Number of characters to skip from the start of the file.
+        limit: Maximum number of characters to return.
+
+    Returns:
+        tuple[str, bool]: The characters read, and whether the file continues past them.
+
+    Raises:
+        BinaryFileError: If the (decompressed) content does not look like UTF-8 text.
+        OSError: If the file cannot be read or its compressed data is corrupt.
+    """
+    try:
+        with open_binary(path) as stream:
+            if _looks_binary(stream.peek(BINARY_SNIFF_BYTES)[:BINARY_SNIFF_BYTES]):
+                raise BinaryFileError(str(path))
+            with io.TextIOWrapper(stream, encoding="utf-8") as f:
+                remaining = offset
+                while remaining > 0:
+                    check_cancelled()
+                    skipped = f.read(min(remaining, READ_CHUNK_SIZE))
+                    if not skipped:
+                        break
+                    remaining -= len(skipped)
+                content = f.read(limit)
+                truncated = bool(f.read(1))
+    except (EOFError, lzma.LZMAError) as e:
+        msg = f"corrupt compressed file '{path}': {e}"
+        raise OSError(msg) from e
+    return content, truncated
+
+
+def open_binary(path: Path) -> io.BufferedReader:
+    """Opens a file for buffered binary reading, decompressing it on the fly if it is compressed.
+
+    Args:
+        path: File to open.
+
+    Returns:
+        io.BufferedReader: A stream of the file's (decompressed) bytes that supports peek.
+    """
+    with path.open("rb") as f:
+        magic = f.read(MAGIC_SIZE)
+    for pattern, decompressor in DECOMPRESSORS.items():
+        if pattern.match(magic):
+            return io.BufferedReader(decompressor(path), buffer_size=max(READ_CHUNK_SIZE, BINARY_SNIFF_BYTES))  # pyright: ignore[reportArgumentType]
+    return path.open("rb", buffering=max(READ_CHUNK_SIZE, BINARY_SNIFF_BYTES))
+
+
+def _looks_binary(sample: bytes) -> bool:
+    """Guesses from the first bytes of a file whether it is binary rather than UTF-8 text."""
+    if b"\x00" in sample:
+        return True
+    try:
+        _ = codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return True
+    return False
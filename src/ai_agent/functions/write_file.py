@@ -6,8 +6,11 @@ This module provides a safe, agent-callable function for writing to a file.
 import logging
 from pathlib import Path
 
-from ai_agent.exceptions import AIAgentError, PathType
+from ai_agent.checkpoints import get_journal
+from ai_agent.dispatch import check_cancelled
+from ai_agent.exceptions import AIAgentError, PathType, ToolCancelledError
 from ai_agent.functions.utils import validate_path
+from ai_agent.prefetch import PREFETCHER
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +19,7 @@ def write_file(working_directory: str, file_path: str, content: str) -> str:
     """Tool for agent to write to a file.
 
     Overriddes the content of a file within the working directory. Creates a new file if it does not exist.
+    A checkpoint is taken first, so the write can be undone with rollback_workspace.
 
     Args:
         working_directory: Path for the working directory
@@ -30,15 +34,28 @@ def write_file(working_directory: str, file_path: str, content: str) -> str:
     except FileNotFoundError:
         base_path = Path(working_directory).resolve()
         target_path = (base_path / file_path).resolve()
-        target_path.parent.mkdir(parents=True, exist_ok=True)
     except (AIAgentError, OSError) as e:
         logger.exception("Error in write_file:")
         return f"Error: {e}"
 
+    journal = get_journal(working_directory)
     try:
+        checkpoint = journal.checkpoint(f"write_file {file_path}", [target_path]) if journal else None
+    except OSError as e:
+        logger.exception("Error in write_file:")
+        return f"Error: could not take a checkpoint, nothing was written: {e}"
+
+    try:
+        # a call that timed out while waiting for the checkpoint must not write after the model was told so
+        check_cancelled()
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        if PREFETCHER:
+            PREFETCHER.invalidate(target_path)
         with Path.open(target_path, "w") as f:
             bit_len = f.write(content)
             return f"Successfully wrote to '{file_path}' ({bit_len} characters written)"
-    except OSError as e:
+    except (OSError, ToolCancelledError) as e:
         logger.exception("Error in write_file:")
+        if journal is not None and checkpoint is not None:
+            journal.discard(checkpoint)
         return f"Error: {e}"
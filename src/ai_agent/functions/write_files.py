@@ -0,0 +1,205 @@
+"""Tools for interacting with the local file system.
+
+This module provides a safe, agent-callable function for writing several files as one transaction.
+"""
+
+import contextlib
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from ai_agent.checkpoints import get_journal
+from ai_agent.constants import WRITE_FILES_MAX_FILES
+from ai_agent.dispatch import check_cancelled
+from ai_agent.exceptions import AIAgentError, PathType, ToolCancelledError
+from ai_agent.functions.utils import validate_path
+from ai_agent.prefetch import PREFETCHER
+
+logger = logging.getLogger(__name__)
+
+
+def write_files(working_directory: str, paths: list[str], contents: list[str]) -> str:
+    """Writes several files at once, all or nothing. Prefer this over repeated write_file calls.
+
+    Every path is checked before anything is written. The new contents are staged next to their targets,
+    flushed to disk together and then swapped in by atomic renames. If any step fails, every file is left
+    as it was. Missing parent directories are created. A checkpoint is taken first, so the whole batch can
+    be undone later with rollback_workspace.
+
+    Args:
+        working_directory: The highest-level directory where writing is allowed.
+        paths: Paths relative to the working directory, e.g. ["pkg/a.py", "README.md"].
+        contents: New content of each file, in the same order as paths.
+
+    Returns:
+        str: Success or Error message as a string.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    if isinstance(contents, str):
+        contents = [contents]
+    logger.debug("New request: working='%s', paths=%s", working_directory, paths)
+
+    try:
+        targets = _validate(working_directory, paths, contents)
+    except (AIAgentError, OSError, ValueError) as e:
+        logger.warning("write_files rejected the batch: %s", e)
+        return f"Error: nothing was written: {e}"
+
+    journal = get_journal(working_directory)
+    try:
+        checkpoint = journal.checkpoint(f"write_files {', '.join(paths)}", targets) if journal else None
+    except OSError as e:
+        logger.exception("Error in write_files:")
+        return f"Error: could not take a checkpoint, nothing was written: {e}"
+
+    transaction = _Transaction()
+    try:
+        for target, content in zip(targets, contents, strict=True):
+            transaction.stage(target, content)
+        # the last point to back out: a call that timed out must not swap files in after the model was told so
+        check_cancelled()
+        transaction.commit()
+    except (OSError, ToolCancelledError) as e:
+        logger.exception("Error in write_files, rolling back:")
+        transaction.rollback()
+        if journal is not None and checkpoint is not None:
+            journal.discard(checkpoint)
+        return f"Error: nothing was written: {e}"
+    finally:
+        transaction.cleanup()
+        if PREFETCHER:
+            for target in targets:
+                PREFETCHER.invalidate(target)
+
+    characters = sum(len(content) for content in contents)
+    return f"Successfully wrote {len(paths)} files ({characters} characters written): {', '.join(paths)}"
+
+
+def _validate(working_directory: str, paths: list[str], contents: list[str]) -> list[Path]:
+    """Resolves every path, collecting all problems before reporting them.
+
+    Raises:
+        ValueError: If the batch is malformed or any path is invalid.
+    """
+    if len(paths) != len(contents):
+        msg = f"got {len(paths)} paths but {len(contents)} contents"
+        raise ValueError(msg)
+    if not paths:
+        msg = "no files given"
+        raise ValueError(msg)
+    if len(paths) > WRITE_FILES_MAX_FILES:
+        msg = f"at most {WRITE_FILES_MAX_FILES} files per call, got {len(paths)}"
+        raise ValueError(msg)
+
+    base_path = Path(working_directory).resolve(strict=True)
+    targets: list[Path] = []
+    problems: list[str] = []
+    for file_path in paths:
+        try:
+            target = validate_path(file_path, working_directory, expected_type=PathType.FILE)
+        except FileNotFoundError:
+            target = (base_path / file_path).resolve()
+        except AIAgentError as e:
+            problems.append(f"{file_path}: {e}")
+            continue
+        if target in targets:
+            problems.append(f"{file_path}: listed more than once")
+        elif any(parent.exists() and not parent.is_dir() for parent in target.parents):
+            problems.append(f"{file_path}: a parent path is a file")
+        targets.append(target)
+    if problems:
+        raise ValueError("; ".join(problems))
+    return targets
+
+
+class _Transaction:
+    """Staged writes that become visible together, or not at all."""
+
+    def __init__(self) -> None:
+        self.staged: list[tuple[Path, Path]] = []
+        self.backups: dict[Path, Path | None] = {}
+        self.created_directories: list[Path] = []
+
+    def stage(self, target: Path, content: str) -> None:
+        """Writes the new content to a temporary file next to the target."""
+        missing = [parent for parent in reversed(target.parents) if not parent.exists()]
+        for directory in missing:
+            directory.mkdir()
+            self.created_directories.append(directory)
+
+        fd, temporary = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+        self.staged.append((Path(temporary), target))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            _ = f.write(content)
+        if target.exists():
+            shutil.copymode(target, temporary)
+
+    def commit(self) -> None:
+        """Flushes every staged file, then renames them over their targets."""
+        # one durability barrier for the whole batch, before anything becomes visible
+        for temporary, _ in self.staged:
+            fd = os.open(temporary, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+        for temporary, target in self.staged:
+            self.backups[target] = self._backup(target)
+            _ = temporary.replace(target)
+
+        for directory in {target.parent for _, target in self.staged}:
+            _fsync_directory(directory)
+
+    def rollback(self) -> None:
+        """Restores every target that was already replaced, and removes what the batch created."""
+        for target, backup in reversed(self.backups.items()):
+            try:
+                if backup is None:
+                    target.unlink(missing_ok=True)
+                else:
+                    _ = backup.replace(target)
+            except OSError:
+                logger.exception("could not roll back %s", target)
+        self.backups.clear()
+        for temporary, _ in self.staged:
+            temporary.unlink(missing_ok=True)
+        for directory in reversed(self.created_directories):
+            with contextlib.suppress(OSError):
+                directory.rmdir()
+
+    def cleanup(self) -> None:
+        """Removes leftover temporary and backup files."""
+        for temporary, _ in self.staged:
+            temporary.unlink(missing_ok=True)
+        for backup in self.backups.values():
+            if backup is not None:
+                backup.unlink(missing_ok=True)
+
+    @staticmethod
+    def _backup(target: Path) -> Path | None:
+        """Keeps the current version of a target until the batch is committed. Returns None for new files."""
+        if not target.exists():
+            return None
+        backup = target.with_name(f".{target.name}.{os.getpid()}.bak")
+        try:
+            os.link(target, backup)
+        except OSError:
+            _ = shutil.copy2(target, backup)
+        return backup
+
+
+def _fsync_directory(directory: Path) -> None:
+    """Makes renames within a directory durable, where the platform supports it."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        with contextlib.suppress(OSError):
+            os.fsync(fd)
+    finally:
+        os.close(fd)
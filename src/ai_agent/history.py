@@ -0,0 +1,160 @@
+"""Helpers for measuring and shrinking the conversation history sent to the model."""
+
+import hashlib
+import json
+import logging
+from typing import NamedTuple
+
+from google.genai import types
+
+from ai_agent.constants import DEDUP_MIN_CHARS
+
+logger = logging.getLogger(__name__)
+
+COMPACTED_NOTE = "[ ... output removed to save tokens; call the tool again if you still need it ... ]"
+DUPLICATE_NOTE = "[ ... identical to the result of {name} in tool message #{number} above; it has not changed ... ]"
+
+
+def content_chars(content: types.Content) -> int:
+    """Counts the characters a message contributes to the prompt.
+
+    Args:
+        content: A message of the history.
+
+    Returns:
+        int: Approximate number of characters sent for this message.
+    """
+    total = 0
+    for part in content.parts or []:
+        if part.text:
+            total += len(part.text)
+        if part.function_call:
+            total += len(part.function_call.name or "") + len(json.dumps(part.function_call.args or {}, default=str))
+        if part.function_response:
+            response = part.function_response.response or {}
+            total += len(part.function_response.name or "") + len(json.dumps(response, default=str))
+    return total
+
+
+def history_chars(messages: list[types.Content], system_prompt: str = "") -> int:
+    """Counts the characters of a whole request: the system prompt plus every message.
+
+    Args:
+        messages: The conversation history.
+        system_prompt: The system prompt sent with it.
+
+    Returns:
+        int: Approximate number of characters sent.
+    """
+    return len(system_prompt) + sum(content_chars(content) for content in messages)
+
+
+def compact_history(messages: list[types.Content], keep_last: int = 1) -> int:
+    """Replaces the payloads of older tool results with a short note, in place.
+
+    The most recent `keep_last` tool messages are left untouched, so the model still sees what it just asked for.
+
+    Args:
+        messages: The conversation history.
+        keep_last: Number of most recent tool messages to keep whole.
+
+    Returns:
+        int: Number of characters removed.
+    """
+    tool_indices = [i for i, content in enumerate(messages) if content.role == "tool"]
+    to_compact = tool_indices[:-keep_last] if keep_last else tool_indices
+
+    before = 0
+    after = 0
+    for index in to_compact:
+        content = messages[index]
+        before += content_chars(content)
+        for part in content.parts or []:
+            response = part.function_response
+            if response and response.response and response.response.get("result") != COMPACTED_NOTE:
+                response.response = {"result": COMPACTED_NOTE}
+        after += content_chars(content)
+
+    removed = before - after
+    if removed:
+        logger.info("compacted %s tool messages, removing %s characters", len(to_compact), removed)
+    return removed
+
+
+class _StoredPayload(NamedTuple):
+    text: str
+    name: str
+    message_index: int
+    part_index: int
+
+
+class PayloadStore:
+    """Content-addressed store of the large tool payloads in one session's history.
+
+    The first occurrence of a payload stays in the history as is. Later identical payloads are replaced by a
+    short reference to it, as long as that first occurrence is still in the history; once it has been compacted
+    away the next copy is kept whole and becomes the one referred to.
+
+    Attributes:
+        min_chars (int): Payloads shorter than this are never deduplicated.
+        saved_chars (int): Characters kept out of the history so far.
+    """
+
+    def __init__(self, min_chars: int = DEDUP_MIN_CHARS) -> None:
+        """Initializes an empty store.
+
+        Args:
+            min_chars: Payloads shorter than this are never deduplicated.
+        """
+        self.min_chars: int = min_chars
+        self.saved_chars: int = 0
+        self._payloads: dict[str, _StoredPayload] = {}
+
+    def dedupe(self, messages: list[types.Content], content: types.Content) -> int:
+        """Replaces repeated payloads in a tool message that is about to be appended to the history.
+
+        Args:
+            messages: The history, not yet including `content`.
+            content: The new tool message. Its payloads are edited in place.
+
+        Returns:
+            int: Characters saved in this message.
+        """
+        history = [*messages, content]
+        message_index = len(messages)
+        saved = 0
+        for part_index, part in enumerate(content.parts or []):
+            response = part.function_response
+            if response is None or not response.response:
+                continue
+            result = response.response.get("result")
+            if not isinstance(result, str) or len(result) < self.min_chars:
+                continue
+
+            digest = hashlib.blake2b(result.encode(), digest_size=16).hexdigest()
+            stored = self._payloads.get(digest)
+            if stored is None or not _still_present(history, stored):
+                self._payloads[digest] = _StoredPayload(result, response.name or "a tool", message_index, part_index)
+                continue
+
+            number = sum(1 for message in history[: stored.message_index + 1] if message.role == "tool")
+            # the tool that produced the stored payload, which may not be the one that repeated it
+            note = DUPLICATE_NOTE.format(name=stored.name, number=number)
+            response.response["result"] = note
+            saved += len(result) - len(note)
+
+        if saved:
+            self.saved_chars += saved
+            logger.info("replaced repeated tool output with references, saving %s characters", saved)
+        return saved
+
+
+def _still_present(messages: list[types.Content], stored: _StoredPayload) -> bool:
+    """Whether a stored payload is still in the history, i.e. has not been compacted away."""
+    if stored.message_index >= len(messages):
+        return False
+    parts = messages[stored.message_index].parts or []
+    if stored.part_index >= len(parts):
+        return False
+    response = parts[stored.part_index].function_response
+    return bool(response and response.response and response.response.get("result") is stored.text)
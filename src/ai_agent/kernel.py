@@ -0,0 +1,375 @@
+"""Long-lived Python interpreters that keep state between snippets.
+
+Each session gets its own child interpreter per working directory. Snippets are sent over the child's stdin
+as JSON lines and answered on its stdout, and run in one persistent namespace, so variables, imports and
+loaded data survive between calls. The child runs in isolated mode with the working directory as its
+current directory and first import path, with its address space capped at KERNEL_MEMORY_LIMIT, its total CPU
+time at KERNEL_CPU_LIMIT and the size of the files it writes at KERNEL_FILE_SIZE_LIMIT. These are resource
+caps, not a sandbox: like run_python_file, the child can read and write anything the agent's user can,
+inside the working directory or not, and use the network.
+
+A snippet that overruns its timeout is interrupted with SIGINT, which raises KeyboardInterrupt inside the
+snippet and leaves the kernel and its state alive. Only if the child does not answer the interrupt, dies,
+or runs out of memory is it restarted, and the caller is told that the state was lost.
+"""
+
+import atexit
+import itertools
+import json
+import logging
+import os
+import queue
+import signal
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+from ai_agent.constants import (
+    KERNEL_CPU_LIMIT,
+    KERNEL_FILE_SIZE_LIMIT,
+    KERNEL_INTERRUPT_GRACE,
+    KERNEL_MEMORY_LIMIT,
+    KERNEL_OUTPUT_LIMIT,
+)
+from ai_agent.logging_config import SESSION_ID
+
+logger = logging.getLogger(__name__)
+
+# runs in the child as `python -I -u -c KERNEL_SOURCE <memory limit> <output limit> <cpu limit> <file size limit>`
+KERNEL_SOURCE = r"""
+import ast, io, json, os, sys, traceback
+
+memory_limit, output_limit, cpu_limit, file_size_limit = map(int, sys.argv[1:5])
+try:
+    import resource, signal
+    # a write past the file size cap then fails with OSError instead of killing the kernel
+    signal.signal(signal.SIGXFSZ, signal.SIG_IGN)
+    # the CPU hard limit is a second later, so that SIGXCPU at the soft limit says why the kernel ended
+    for kind, soft, hard in ((resource.RLIMIT_AS, memory_limit, memory_limit),
+                             (resource.RLIMIT_CPU, cpu_limit, cpu_limit + 1),
+                             (resource.RLIMIT_FSIZE, file_size_limit, file_size_limit)):
+        if soft:
+            resource.setrlimit(kind, (soft, hard))
+except (ImportError, AttributeError, ValueError, OSError):
+    pass
+
+sys.path.insert(0, os.getcwd())
+channel = os.fdopen(os.dup(1), "w", encoding="utf-8")
+requests = os.fdopen(os.dup(0), "r", encoding="utf-8")
+devnull = os.open(os.devnull, os.O_RDWR)
+os.dup2(devnull, 0)
+os.dup2(devnull, 1)
+sys.stdin = io.StringIO()
+namespace = {"__name__": "__main__", "__builtins__": __builtins__}
+
+
+class Capture(io.TextIOBase):
+    def __init__(self):
+        self.parts, self.size, self.dropped = [], 0, 0
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        room = max(output_limit - self.size, 0)
+        self.parts.append(text[:room])
+        self.size += min(len(text), room)
+        self.dropped += max(len(text) - room, 0)
+        return len(text)
+
+    def text(self):
+        note = f"\n[ ... {self.dropped} more characters of output dropped ... ]" if self.dropped else ""
+        return "".join(self.parts) + note
+
+
+def run(code):
+    out, err = Capture(), Capture()
+    sys.stdout, sys.stderr = out, err
+    value = error = None
+    memory_exceeded = False
+    try:
+        tree = ast.parse(code, "<kernel>", "exec")
+        last = tree.body.pop() if tree.body and isinstance(tree.body[-1], ast.Expr) else None
+        exec(compile(tree, "<kernel>", "exec"), namespace)
+        if last is not None:
+            result = eval(compile(ast.Expression(last.value), "<kernel>", "eval"), namespace)
+            if result is not None:
+                namespace["_"] = result
+                value = repr(result)[:output_limit]
+    except MemoryError:
+        memory_exceeded = True
+        error = "MemoryError: the kernel exceeded its memory cap"
+    except BaseException as e:
+        error = "".join(traceback.format_exception(type(e), e, e.__traceback__.tb_next)).rstrip()[-output_limit:]
+    finally:
+        sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+    return {"stdout": out.text(), "stderr": err.text(), "value": value, "error": error,
+            "memory_exceeded": memory_exceeded}
+
+
+while True:
+    try:
+        line = requests.readline()
+        if not line:
+            break
+        request = json.loads(line)
+        response = run(request["code"])
+        response["id"] = request["id"]
+        channel.write(json.dumps(response) + "\n")
+        channel.flush()
+        if response["memory_exceeded"]:
+            break
+    except KeyboardInterrupt:
+        continue
+"""
+
+
+class KernelResult(NamedTuple):
+    """Outcome of one snippet.
+
+    Attributes:
+        stdout: Captured standard output, bounded.
+        stderr: Captured standard error, bounded.
+        value: repr of the snippet's last expression, if it was one and not None.
+        error: Traceback of an exception raised by the snippet.
+        timed_out: Whether the snippet was interrupted for running past its timeout.
+        restarted: Why the kernel was restarted after this snippet, losing its state. None if it was not.
+    """
+
+    stdout: str = ""
+    stderr: str = ""
+    value: str | None = None
+    error: str | None = None
+    timed_out: bool = False
+    restarted: str | None = None
+
+
+class Kernel:
+    """A child interpreter with persistent state.
+
+    Attributes:
+        working_directory (Path): Current directory of the child.
+        executions (int): Snippets run since the last (re)start.
+    """
+
+    def __init__(
+        self,
+        working_directory: str | Path,
+        memory_limit: int = KERNEL_MEMORY_LIMIT,
+        output_limit: int = KERNEL_OUTPUT_LIMIT,
+        cpu_limit: int = KERNEL_CPU_LIMIT,
+        file_size_limit: int = KERNEL_FILE_SIZE_LIMIT,
+    ) -> None:
+        """Initializes the kernel. The child is started on first use.
+
+        Args:
+            working_directory: Current directory of the child.
+            memory_limit: Address space cap in bytes, 0 for none.
+            output_limit: Characters kept per output stream of one snippet.
+            cpu_limit: CPU seconds the child may use before it is killed and restarted, 0 for none.
+            file_size_limit: Largest file the child may write in bytes, 0 for none.
+        """
+        self.working_directory: Path = Path(working_directory).resolve()
+        self.executions: int = 0
+        self._memory_limit: int = memory_limit
+        self._output_limit: int = output_limit
+        self._cpu_limit: int = cpu_limit
+        self._file_size_limit: int = file_size_limit
+        self._process: subprocess.Popen[str] | None = None
+        self._responses: queue.Queue[dict[str, object] | None] = queue.Queue()
+        self._ids: itertools.count[int] = itertools.count(1)
+        self._lock: threading.Lock = threading.Lock()
+        self._closed: bool = False
+
+    @property
+    def alive(self) -> bool:
+        """Whether the child process is running."""
+        return self._process is not None and self._process.poll() is None
+
+    def execute(self, code: str, timeout: float) -> KernelResult:
+        """Runs a snippet in the kernel's namespace.
+
+        If the snippet ends in an expression, its repr is returned as the value.
+
+        Args:
+            code: Python source to run.
+            timeout: Seconds before the snippet is interrupted.
+
+        Returns:
+            KernelResult: Captured output, value or error, and whether the kernel had to be restarted.
+        """
+        with self._lock:
+            if not self.alive:
+                self._start()
+            assert self._process is not None  # noqa: S101
+            assert self._process.stdin is not None  # noqa: S101
+
+            request_id = next(self._ids)
+            try:
+                self._process.stdin.write(json.dumps({"id": request_id, "code": code}) + "\n")
+                self._process.stdin.flush()
+            except OSError:
+                self._stop()
+                return KernelResult(restarted="the kernel had exited; its state was lost, run the snippet again")
+
+            response = self._wait(request_id, timeout)
+            # no response either means the snippet is still running or that the child is gone
+            timed_out = response is None and not self._closed
+            if timed_out:
+                logger.info("kernel snippet ran past %ss, interrupting it", timeout)
+                self._interrupt()
+                response = self._wait(request_id, KERNEL_INTERRUPT_GRACE)
+            if response is None:
+                reason = "the snippet did not stop when interrupted" if timed_out else self._exit_reason()
+                self._stop()
+                return KernelResult(timed_out=timed_out, restarted=f"{reason}; its state was lost")
+
+            self.executions += 1
+            restarted = None
+            if response.get("memory_exceeded"):
+                self._stop()
+                restarted = "the kernel exceeded its memory cap; its state was lost"
+            return KernelResult(
+                stdout=str(response.get("stdout") or ""),
+                stderr=str(response.get("stderr") or ""),
+                value=None if response.get("value") is None else str(response["value"]),
+                error=None if response.get("error") is None else str(response["error"]),
+                timed_out=timed_out,
+                restarted=restarted,
+            )
+
+    def restart(self) -> None:
+        """Discards all state by stopping the child. A fresh one starts on the next snippet."""
+        with self._lock:
+            self._stop()
+
+    def shutdown(self) -> None:
+        """Stops the child."""
+        self.restart()
+
+    def _start(self) -> None:
+        self._responses = queue.Queue()
+        self._process = subprocess.Popen(  # noqa: S603
+            [
+                sys.executable,
+                "-I",
+                "-u",
+                "-c",
+                KERNEL_SOURCE,
+                *map(str, (self._memory_limit, self._output_limit, self._cpu_limit, self._file_size_limit)),
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=self.working_directory,
+            text=True,
+            encoding="utf-8",
+        )
+        self.executions = 0
+        self._closed = False
+        reader = threading.Thread(
+            target=_read_responses, args=(self._process, self._responses), name="kernel-reader", daemon=True
+        )
+        reader.start()
+        logger.info("started kernel pid=%s in %s", self._process.pid, self.working_directory)
+
+    def _wait(self, request_id: int, timeout: float) -> dict[str, object] | None:
+        """Waits for the response to a request, skipping late answers to earlier ones."""
+        while True:
+            try:
+                response = self._responses.get(timeout=timeout)
+            except queue.Empty:
+                return None
+            if response is None:
+                self._closed = True
+                return None
+            if response.get("id") == request_id:
+                return response
+
+    def _exit_reason(self) -> str:
+        """Says why the child exited, once its output has closed."""
+        if self._process is None:
+            return "the kernel exited"
+        try:
+            returncode = self._process.wait(timeout=KERNEL_INTERRUPT_GRACE)
+        except subprocess.TimeoutExpired:
+            return "the kernel stopped answering"
+        if returncode == -getattr(signal, "SIGXCPU", 0):
+            return "the kernel used up its CPU time cap"
+        return f"the kernel exited with code {returncode}"
+
+    def _interrupt(self) -> None:
+        if self._process is None:
+            return
+        try:
+            if sys.platform == "win32":
+                self._process.send_signal(signal.CTRL_C_EVENT)  # pyright: ignore[reportAttributeAccessIssue]
+            else:
+                os.kill(self._process.pid, signal.SIGINT)
+        except OSError:
+            logger.warning("could not interrupt kernel pid=%s", self._process.pid)
+
+    def _stop(self) -> None:
+        if self._process is None:
+            return
+        process, self._process = self._process, None
+        if process.poll() is None:
+            process.kill()
+        _ = process.wait()
+        for stream in (process.stdin, process.stdout):
+            if stream is not None:
+                stream.close()
+        logger.info("stopped kernel pid=%s", process.pid)
+
+
+def _read_responses(process: subprocess.Popen[str], responses: "queue.Queue[dict[str, object] | None]") -> None:
+    """Moves the child's answers onto a queue, ending with None when its stdout closes."""
+    assert process.stdout is not None  # noqa: S101
+    try:
+        for line in process.stdout:
+            try:
+                responses.put(json.loads(line))
+            except ValueError:
+                logger.warning("ignoring malformed kernel output: %.200s", line)
+    except (OSError, ValueError):
+        pass
+    responses.put(None)
+
+
+_KERNELS: dict[tuple[str, Path], Kernel] = {}
+_KERNELS_LOCK = threading.Lock()
+
+
+def get_kernel(working_directory: str) -> Kernel:
+    """Returns the current session's kernel for a working directory, creating it on first use.
+
+    Args:
+        working_directory: Current directory of the kernel.
+
+    Returns:
+        Kernel: The kernel.
+    """
+    key = (SESSION_ID.get(), Path(working_directory).resolve())
+    with _KERNELS_LOCK:
+        kernel = _KERNELS.get(key)
+        if kernel is None:
+            kernel = _KERNELS[key] = Kernel(working_directory)
+        return kernel
+
+
+def shutdown_kernels(session_id: str | None = None) -> None:
+    """Stops the kernels of one session, or all kernels.
+
+    Args:
+        session_id: Session whose kernels to stop. None stops every kernel.
+    """
+    with _KERNELS_LOCK:
+        keys = [key for key in _KERNELS if session_id is None or key[0] == session_id]
+        kernels = [_KERNELS.pop(key) for key in keys]
+    for kernel in kernels:
+        kernel.shutdown()
+
+
+_ = atexit.register(shutdown_kernels)
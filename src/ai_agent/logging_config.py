@@ -0,0 +1,166 @@
+"""Logging setup that keeps log I/O off the threads doing the work.
+
+Records are put on an in-memory queue by a QueueHandler and written by a single QueueListener thread
+to a size-rotated file, so a tool call never waits on the disk or on the file handler's lock.
+Messages are formatted lazily, on the listener thread; only exception tracebacks are rendered up front,
+since the frames they refer to do not outlive the call. Each record carries the session and iteration
+it was logged from, taken from context variables that the agent loop sets.
+"""
+
+import atexit
+import contextlib
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+from collections.abc import Iterator
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from pathlib import Path
+
+from ai_agent.constants import (
+    LOG_BACKUP_COUNT,
+    LOG_FILENAME,
+    LOG_FORMAT,
+    LOG_LEVEL,
+    LOG_MAX_BYTES,
+    LOG_TEXT_FORMAT,
+)
+
+SESSION_ID: ContextVar[str] = ContextVar("SESSION_ID", default="-")
+ITERATION: ContextVar[int] = ContextVar("ITERATION", default=0)
+LOG_FORMATS = ("json", "text")
+
+_listener: logging.handlers.QueueListener | None = None
+_queue_handler: logging.Handler | None = None
+
+
+class ContextFilter(logging.Filter):
+    """Stamps records with the session and iteration of the context they were logged from."""
+
+    def filter(self, record: logging.LogRecord) -> bool:  # noqa: D102
+        record.session_id = SESSION_ID.get()
+        record.iteration = ITERATION.get()
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:  # noqa: D102
+        if not record.exc_info:
+            return record
+        record = copy.copy(record)
+        record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:  # noqa: D102
+        payload: dict[str, object] = {
+            "time": datetime.fromtimestamp(record.created, tz=UTC).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "session": getattr(record, "session_id", "-"),
+            "iteration": getattr(record, "iteration", 0),
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exception"] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+def configure_logging(  # noqa: PLR0913
+    filename: str | Path = LOG_FILENAME,
+    level: str = LOG_LEVEL,
+    fmt: str = LOG_FORMAT,
+    max_bytes: int = LOG_MAX_BYTES,
+    backup_count: int = LOG_BACKUP_COUNT,
+    *,
+    logger: logging.Logger | None = None,
+) -> logging.handlers.QueueListener:
+    """Routes logging through a queue to a rotating file. Calling it again replaces the previous setup.
+
+    Args:
+        filename: Log file.
+        level: Level name, e.g. "INFO".
+        fmt: "json" or "text".
+        max_bytes: Size at which the file is rotated, 0 to never rotate.
+        backup_count: Number of rotated files to keep.
+        logger: Logger to attach to. Defaults to the root logger.
+
+    Returns:
+        logging.handlers.QueueListener: The started listener. It is stopped, and the queue flushed, at exit.
+
+    Raises:
+        ValueError: If fmt is not one of LOG_FORMATS.
+    """
+    global _listener, _queue_handler  # noqa: PLW0603
+    if fmt not in LOG_FORMATS:
+        msg = f"unknown log format {fmt!r}, expected one of {LOG_FORMATS}"
+        raise ValueError(msg)
+
+    logger = logging.getLogger() if logger is None else logger
+    shutdown_logging()
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+    )
+    file_handler.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(LOG_TEXT_FORMAT))
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    _queue_handler = DeferredQueueHandler(log_queue)
+    _queue_handler.addFilter(ContextFilter())
+    logger.addHandler(_queue_handler)
+    logger.setLevel(getattr(logging, level.upper()))
+
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Flushes queued records and detaches the handler installed by configure_logging."""
+    global _listener, _queue_handler  # noqa: PLW0603
+    if _queue_handler is not None:
+        for logger in (logging.getLogger(), *logging.Logger.manager.loggerDict.values()):
+            if isinstance(logger, logging.Logger):
+                logger.removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+@contextlib.contextmanager
+def log_context(session_id: str | None = None, iteration: int | None = None) -> Iterator[None]:
+    """Sets the session and/or iteration stamped on records logged inside the block.
+
+    Args:
+        session_id: Session to stamp, or None to keep the current one.
+        iteration: Iteration to stamp, or None to keep the current one.
+
+    Yields:
+        None
+    """
+    session_token = SESSION_ID.set(session_id) if session_id is not None else None
+    iteration_token = ITERATION.set(iteration) if iteration is not None else None
+    try:
+        yield
+    finally:
+        if iteration_token is not None:
+            ITERATION.reset(iteration_token)
+        if session_token is not None:
+            SESSION_ID.reset(session_token)
+
+
+_ = atexit.register(shutdown_logging)
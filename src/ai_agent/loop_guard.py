@@ -0,0 +1,153 @@
+"""Detection of a session that keeps repeating the same tool calls.
+
+Every call is fingerprinted by its tool name and arguments, and every result by a hash. An identical repeat
+of a read-only tool is answered from memory, with a note, until a tool that may change the workspace runs.
+The sequence of (call, result) steps is also checked for a short cycle repeated LOOP_MIN_REPEATS times in a
+row: the same steps giving the same results mean the session is not making progress. The first such cycle
+earns the model a warning next to the tool results; one more after LOOP_WARNINGS warnings stops the session,
+and the agent asks the model for a partial answer instead of running into MAX_ITERATIONS.
+"""
+
+import hashlib
+import json
+import logging
+from typing import Any
+
+from google.genai import types
+
+from ai_agent.constants import LOOP_MAX_PERIOD, LOOP_MIN_REPEATS, LOOP_WARNINGS, READ_ONLY_TOOLS
+from ai_agent.exceptions import LoopDetectedError
+
+logger = logging.getLogger(__name__)
+
+REPEAT_NOTE = "You already made this exact call and nothing has changed since; this is the same result."
+LOOP_WARNING = (
+    "You are repeating the same tool calls ({cycle}) and getting the same results. Repeating them again "
+    "will not help: try a different approach, or answer with what you have found so far."
+)
+
+
+class LoopGuard:
+    """Per-session memory of tool calls and their results.
+
+    Attributes:
+        warnings (int): Warnings given to the model so far.
+        served (int): Calls answered from memory.
+    """
+
+    def __init__(
+        self,
+        read_only_tools: frozenset[str] = READ_ONLY_TOOLS,
+        min_repeats: int = LOOP_MIN_REPEATS,
+        max_period: int = LOOP_MAX_PERIOD,
+        max_warnings: int = LOOP_WARNINGS,
+    ) -> None:
+        """Initializes an empty guard.
+
+        Args:
+            read_only_tools: Tools whose results may be served from memory. Any other tool clears the memory.
+            min_repeats: Back to back repetitions of a cycle that count as a loop.
+            max_period: Longest cycle, in calls, that is looked for.
+            max_warnings: Loops warned about before the next one stops the session.
+        """
+        self.warnings: int = 0
+        self.served: int = 0
+        self._read_only_tools: frozenset[str] = read_only_tools
+        self._min_repeats: int = min_repeats
+        self._max_period: int = max_period
+        self._max_warnings: int = max_warnings
+        self._memory: dict[str, dict[str, Any]] = {}  # pyright: ignore[reportExplicitAny]
+        self._steps: list[str] = []
+        self._names: list[str] = []
+
+    def recall(self, function_call: types.FunctionCall) -> types.Content | None:
+        """Answers an identical repeat of a read-only call from memory.
+
+        Args:
+            function_call: The call the model made.
+
+        Returns:
+            types.Content | None: The earlier result with REPEAT_NOTE added, or None if the call must run.
+        """
+        response = self._memory.get(_fingerprint(function_call))
+        if response is None:
+            return None
+        self.served += 1
+        logger.info("serving repeated %s call from memory", function_call.name)
+        return types.Content(
+            role="tool",
+            parts=[
+                types.Part.from_function_response(
+                    name=function_call.name or "unknown_function", response={**response, "note": REPEAT_NOTE}
+                )
+            ],
+        )
+
+    def record(self, function_call: types.FunctionCall, response: dict[str, Any]) -> None:  # pyright: ignore[reportExplicitAny]
+        """Remembers a call and its result. Failed calls are not remembered, so retrying one runs it again.
+
+        Args:
+            function_call: The call the model made.
+            response: The response sent back for it.
+        """
+        fingerprint = _fingerprint(function_call)
+        if function_call.name in self._read_only_tools:
+            if "note" not in response and "error" not in response:
+                # a copy: the response is still in the tool message, where deduplication may replace its result
+                self._memory[fingerprint] = dict(response)
+        else:
+            self._memory.clear()
+        result = {key: value for key, value in response.items() if key != "note"}
+        self._steps.append(f"{fingerprint}:{_digest(result)}")
+        self._names.append(function_call.name or "unknown_function")
+
+    def check(self, tool_message: types.Content) -> None:
+        """Looks for a cycle at the end of the session's steps and escalates if there is one.
+
+        A warning is added to the last response of the tool message. The steps are then forgotten, so the
+        next warning or stop needs a fresh run of repeats.
+
+        Args:
+            tool_message: The tool message of the turn that was just recorded.
+
+        Raises:
+            LoopDetectedError: If the model was already warned max_warnings times.
+        """
+        period = self._cycle_period()
+        if period is None:
+            return
+        cycle = ", ".join(self._names[-period:])
+        self._steps.clear()
+        self._names.clear()
+        if self.warnings >= self._max_warnings:
+            logger.warning("stopping session: repeated %s after %s warnings", cycle, self.warnings)
+            raise LoopDetectedError(cycle)
+
+        self.warnings += 1
+        logger.warning("loop detected, warning the model: %s", cycle)
+        last = tool_message.parts[-1] if tool_message.parts else None
+        if last is not None and last.function_response is not None:
+            response = dict(last.function_response.response or {})
+            response["warning"] = LOOP_WARNING.format(cycle=cycle)
+            last.function_response.response = response
+
+    def _cycle_period(self) -> int | None:
+        """Returns the length of the shortest cycle repeated min_repeats times at the end of the steps."""
+        for period in range(1, self._max_period + 1):
+            span = period * self._min_repeats
+            if len(self._steps) < span:
+                break
+            tail = self._steps[-span:]
+            if tail == tail[:period] * self._min_repeats:
+                return period
+        return None
+
+
+def _fingerprint(function_call: types.FunctionCall) -> str:
+    arguments = json.dumps(function_call.args or {}, sort_keys=True, default=str)
+    return f"{function_call.name}({_digest(arguments)})"
+
+
+def _digest(value: object) -> str:
+    text = value if isinstance(value, str) else json.dumps(value, sort_keys=True, default=str)
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
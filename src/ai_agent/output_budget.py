@@ -0,0 +1,151 @@
+"""Budget on how much tool output is added to the conversation history.
+
+Every tool result is re-sent to the model on each later turn, so a single large listing or a chatty script
+can dominate the prompt for the rest of the session. OutputBudget caps each result and the total for one
+turn, keeps the most informative part of what it cuts, and tells the model how to ask for the rest.
+Tools whose output is structured, such as read_files' JSON, read the current budget from CURRENT_BUDGET and
+size their output themselves, since cutting the text in the middle would break it.
+"""
+
+import logging
+from contextvars import ContextVar
+
+from ai_agent.constants import TOOL_OUTPUT_LIMIT, TOOL_OUTPUT_LIMITS, TURN_OUTPUT_LIMIT
+
+logger = logging.getLogger(__name__)
+
+# content a truncated result must keep to be worth sending; with less room the result is withheld, since a
+# tiny fragment helps no one
+MIN_USEFUL_OUTPUT = 200
+# room for the omission marker truncate_output puts in the middle, on top of its hint
+MARKER_OVERHEAD = 160
+HEAD_SHARE = 0.6
+
+TRUNCATION_HINTS: dict[str, str] = {
+    "get_file_content": "call get_file_content with an offset to read a later part of the file",
+    "get_files_info": "list a subdirectory instead of the whole tree",
+    "read_files": "read fewer files per call, or use get_file_content with an offset",
+    "run_python_file": "rerun with narrower arguments, or have the script write its output to a file and read that",
+}
+DEFAULT_TRUNCATION_HINT = "make a narrower request to see the rest"
+# tools that fit their output into OutputBudget.limit themselves and are never cut
+SELF_LIMITING_TOOLS: frozenset[str] = frozenset({"read_files"})
+
+
+class OutputBudget:
+    """Caps tool results for one turn.
+
+    Attributes:
+        remaining (int): Characters left for the rest of this turn.
+    """
+
+    def __init__(
+        self,
+        turn_limit: int = TURN_OUTPUT_LIMIT,
+        tool_limits: dict[str, int] | None = None,
+        default_limit: int = TOOL_OUTPUT_LIMIT,
+    ) -> None:
+        """Initializes the budget for a new turn.
+
+        Args:
+            turn_limit: Total characters all tool results of this turn may add.
+            tool_limits: Per-tool limits. Defaults to TOOL_OUTPUT_LIMITS.
+            default_limit: Limit for tools without their own entry.
+        """
+        self.remaining: int = turn_limit
+        self.tool_limits: dict[str, int] = TOOL_OUTPUT_LIMITS if tool_limits is None else tool_limits
+        self.default_limit: int = default_limit
+
+    def limit(self, tool_name: str) -> int:
+        """Returns the most characters a tool's next result may have.
+
+        Args:
+            tool_name: The tool about to run.
+
+        Returns:
+            int: The smaller of the tool's limit and what is left of this turn's budget.
+        """
+        return min(self.tool_limits.get(tool_name, self.default_limit), self.remaining)
+
+    def apply(self, tool_name: str, result: str) -> str:
+        """Fits a tool result into the budget, truncating it if needed.
+
+        Args:
+            tool_name: Tool that produced the result.
+            result: The full result.
+
+        Returns:
+            str: The result, or a truncated version that says how to get the rest.
+        """
+        limit = self.limit(tool_name)
+        if len(result) <= limit or (tool_name in SELF_LIMITING_TOOLS and limit >= MIN_USEFUL_OUTPUT):
+            self.remaining = max(self.remaining - len(result), 0)
+            return result
+
+        hint = TRUNCATION_HINTS.get(tool_name, DEFAULT_TRUNCATION_HINT)
+        if limit < MARKER_OVERHEAD + len(hint) + MIN_USEFUL_OUTPUT:
+            tool_limit = self.tool_limits.get(tool_name, self.default_limit)
+            if tool_limit <= self.remaining:
+                logger.info("withheld %s characters from %s: over its %s character cap", len(result), tool_name, limit)
+                return (
+                    f"[ ... {len(result)} characters withheld: {tool_name} output is capped at {tool_limit}"
+                    f" characters, too few to show part of it; {hint} ... ]"
+                )
+            logger.info("withheld %s characters from %s: turn output budget exhausted", len(result), tool_name)
+            return (
+                f"[ ... {len(result)} characters withheld: this turn's tool output budget is used up."
+                f" Call {tool_name} again in a later turn, or {hint} ... ]"
+            )
+
+        logger.info("truncated %s output from %s to about %s characters", tool_name, len(result), limit)
+        truncated = truncate_output(result, limit, hint)
+        self.remaining = max(self.remaining - len(truncated), 0)
+        return truncated
+
+
+CURRENT_BUDGET: ContextVar[OutputBudget | None] = ContextVar("CURRENT_BUDGET", default=None)
+
+
+def truncate_output(text: str, limit: int, hint: str = DEFAULT_TRUNCATION_HINT) -> str:
+    """Shortens text to roughly `limit` characters, keeping its most informative parts.
+
+    Python tracebacks keep their final frames and the error line. Other text keeps its head and tail,
+    cut on line boundaries where possible. A marker in the middle says how much was omitted and how to get it.
+
+    Args:
+        text: Text to shorten.
+        limit: Target length in characters.
+        hint: How the model can ask for the omitted part.
+
+    Returns:
+        str: The shortened text.
+    """
+    if len(text) <= limit:
+        return text
+
+    marker_budget = MARKER_OVERHEAD + len(hint)
+    keep = max(limit - marker_budget, 0)
+    traceback_start = text.rfind("Traceback (most recent call last):")
+    if traceback_start != -1:
+        # the end of a traceback (innermost frames and the exception) carries the useful information
+        tail = text[traceback_start:]
+        tail_keep = min(len(tail), max(keep - keep // 4, keep // 2))
+        head_keep = keep - tail_keep
+    else:
+        head_keep = int(keep * HEAD_SHARE)
+        tail_keep = keep - head_keep
+
+    head = _cut_at_line(text[:head_keep], from_end=False)
+    tail = _cut_at_line(text[len(text) - tail_keep :], from_end=True) if tail_keep else ""
+    omitted = len(text) - len(head) - len(tail)
+    marker = f"\n[ ... {omitted} of {len(text)} characters omitted; {hint} ... ]\n"
+    return head + marker + tail
+
+
+def _cut_at_line(text: str, from_end: bool) -> str:
+    """Trims a partial line from the cut side, unless that would throw away most of the text."""
+    if from_end:
+        newline = text.find("\n")
+        return text[newline + 1 :] if 0 <= newline < len(text) // 2 else text
+    newline = text.rfind("\n")
+    return text[: newline + 1] if newline >= len(text) // 2 else text
@@ -0,0 +1,230 @@
+"""Third-party tools registered through `importlib.metadata` entry points.
+
+A plugin distribution registers each tool under the PLUGIN_ENTRY_POINT_GROUP group, e.g. in its pyproject.toml:
+
+    [project.entry-points."ai_agent.tools"]
+    word_count = "my_tools.word_count:word_count"
+
+Tools follow the same conventions as the ones in ai_agent.functions: the first parameter is
+`working_directory`, the function returns a string and has a Google style docstring.
+
+The docstring and signature are read from the module source with `ast`, so schema generation does not
+import the tool module. The module is only imported the first time the tool is called.
+"""
+
+import ast
+import importlib
+import importlib.metadata
+import importlib.util
+import inspect
+import logging
+import threading
+from collections.abc import Callable
+from typing import Any, Literal, Optional, Union
+
+from ai_agent.constants import PLUGIN_ENTRY_POINT_GROUP
+from ai_agent.exceptions import PluginLoadError
+
+logger = logging.getLogger(__name__)
+
+# names an annotation in plugin source may use and still be resolved without importing the plugin
+_ANNOTATION_NAMESPACE: dict[str, object] = {
+    "str": str,
+    "int": int,
+    "float": float,
+    "bool": bool,
+    "list": list,
+    "dict": dict,
+    "tuple": tuple,
+    "None": None,
+    "Any": Any,
+    "Literal": Literal,
+    "Optional": Optional,
+    "Union": Union,
+}
+
+
+class LazyTool:
+    """Callable stand-in for a plugin tool that imports the implementation on first call.
+
+    Exposes `__doc__` and `__signature__` so `inspect.getdoc` and `inspect.signature` work before the import.
+
+    Attributes:
+        name (str): Name of the tool, as registered in the entry point.
+        module_name (str): Module that defines the tool.
+        attr (str): Name of the function in that module.
+    """
+
+    def __init__(self, name: str, module_name: str, attr: str, doc: str | None, signature: inspect.Signature) -> None:
+        """Initializes the LazyTool.
+
+        Args:
+            name: Name of the tool.
+            module_name: Module that defines the tool.
+            attr: Name of the function in that module.
+            doc: Docstring read from the source.
+            signature: Signature read from the source.
+        """
+        self.name: str = name
+        self.module_name: str = module_name
+        self.attr: str = attr
+        self.__doc__ = doc
+        self.__signature__: inspect.Signature = signature
+        self._func: Callable[..., str] | None = None
+        self._lock: threading.Lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the implementation has been imported."""
+        return self._func is not None
+
+    def load(self) -> Callable[..., str]:
+        """Imports the implementation if needed and returns it.
+
+        Returns:
+            Callable[..., str]: the tool function.
+
+        Raises:
+            PluginLoadError: if the module or function cannot be imported.
+        """
+        if self._func is None:
+            with self._lock:
+                if self._func is None:
+                    logger.debug("Importing plugin tool '%s' from %s", self.name, self.module_name)
+                    try:
+                        module = importlib.import_module(self.module_name)
+                        self._func = getattr(module, self.attr)
+                    except Exception as e:
+                        # importing runs third-party code: a SyntaxError or any error at import time is a load error
+                        raise PluginLoadError(self.name, f"{type(e).__name__}: {e}") from e
+        return self._func  # pyright: ignore[reportReturnType]
+
+    def __call__(self, *args: Any, **kwargs: Any) -> str:  # noqa: ANN401 # pyright: ignore[reportExplicitAny, reportAny]
+        """Calls the tool, importing it first if this is the first call.
+
+        Args:
+            *args: positional arguments for the tool.
+            **kwargs: keyword arguments for the tool.
+
+        Returns:
+            str: the tool's result.
+        """
+        return self.load()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        """Representation showing where the tool lives and whether it is loaded."""
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<LazyTool {self.name} {self.module_name}:{self.attr} ({state})>"
+
+
+def discover_plugin_tools(group: str = PLUGIN_ENTRY_POINT_GROUP) -> dict[str, LazyTool]:
+    """Discovers tools registered by installed distributions, without importing them.
+
+    Args:
+        group: entry point group to read.
+
+    Returns:
+        dict of lazily loaded tools, keyed by entry point name.
+    """
+    tools: dict[str, LazyTool] = {}
+    for entry_point in importlib.metadata.entry_points(group=group):
+        try:
+            tools[entry_point.name] = _lazy_tool_from_entry_point(entry_point)
+        except Exception:
+            # find_spec runs the code of parent packages, and the source may not decode: one bad plugin must
+            # not stop the agent from starting
+            logger.exception("Skipping plugin tool '%s' (%s)", entry_point.name, entry_point.value)
+    return tools
+
+
+def _lazy_tool_from_entry_point(entry_point: importlib.metadata.EntryPoint) -> LazyTool:
+    module_name = entry_point.module
+    attr = entry_point.attr
+    if not attr or "." in attr:
+        raise PluginLoadError(entry_point.name, f"'{entry_point.value}' must point at a module level function")
+
+    # find_spec imports parent packages, but never the tool module itself
+    spec = importlib.util.find_spec(module_name)
+    if spec is None or spec.origin is None or not spec.origin.endswith(".py"):
+        raise PluginLoadError(entry_point.name, f"no python source found for module '{module_name}'")
+
+    with open(spec.origin, encoding="utf-8") as f:  # noqa: PTH123
+        tree = ast.parse(f.read(), filename=spec.origin)
+
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name == attr:
+            return LazyTool(entry_point.name, module_name, attr, ast.get_docstring(node), _signature_from_ast(node))
+
+    raise PluginLoadError(entry_point.name, f"module '{module_name}' has no function '{attr}'")
+
+
+def _signature_from_ast(node: ast.FunctionDef) -> inspect.Signature:
+    args = node.args
+    positional = [*args.posonlyargs, *args.args]
+    defaults: list[ast.expr | None] = [None] * (len(positional) - len(args.defaults)) + list(args.defaults)
+
+    parameters: list[inspect.Parameter] = []
+    for index, (arg, default) in enumerate(zip(positional, defaults, strict=True)):
+        kind = (
+            inspect.Parameter.POSITIONAL_ONLY
+            if index < len(args.posonlyargs)
+            else inspect.Parameter.POSITIONAL_OR_KEYWORD
+        )
+        parameters.append(_parameter_from_ast(arg, default, kind))
+    for arg, default in zip(args.kwonlyargs, args.kw_defaults, strict=True):
+        parameters.append(_parameter_from_ast(arg, default, inspect.Parameter.KEYWORD_ONLY))
+
+    return_annotation = _resolve_annotation(node.returns) if node.returns else inspect.Signature.empty
+    return inspect.Signature(parameters, return_annotation=return_annotation)
+
+
+def _parameter_from_ast(arg: ast.arg, default: ast.expr | None, kind: inspect._ParameterKind) -> inspect.Parameter:  # pyright: ignore[reportPrivateUsage]
+    annotation = _resolve_annotation(arg.annotation) if arg.annotation else inspect.Parameter.empty
+    default_value: object = inspect.Parameter.empty
+    if default is not None:
+        try:
+            default_value = ast.literal_eval(default)
+        except ValueError:
+            default_value = ast.unparse(default)
+    return inspect.Parameter(arg.arg, kind, default=default_value, annotation=annotation)
+
+
+def _resolve_annotation(node: ast.expr) -> object:
+    """Resolves an annotation against builtin types and common typing forms, or falls back to its source text."""
+    source = ast.unparse(node)
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        source = node.value  # string annotation, e.g. "list[str]"
+    try:
+        return _evaluate_annotation(node)
+    except (ValueError, TypeError, SyntaxError):
+        return source
+
+
+def _evaluate_annotation(node: ast.expr) -> object:
+    """Evaluates an annotation's syntax tree through _ANNOTATION_NAMESPACE; plugin source is never executed.
+
+    Raises:
+        ValueError: If the annotation uses anything but known names, subscripts, `|` and constants.
+    """
+    if isinstance(node, ast.Constant):
+        if node.value is None or node.value is Ellipsis:
+            return node.value
+        if isinstance(node.value, str):
+            return _evaluate_annotation(ast.parse(node.value, mode="eval").body)
+    elif isinstance(node, (ast.Name, ast.Attribute)):
+        # typing.Optional resolves like Optional
+        name = node.id if isinstance(node, ast.Name) else node.attr
+        if name in _ANNOTATION_NAMESPACE:
+            return _ANNOTATION_NAMESPACE[name]
+    elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+        left, right = (_evaluate_annotation(side) for side in (node.left, node.right))
+        return (type(None) if left is None else left) | (type(None) if right is None else right)  # pyright: ignore[reportOperatorIssue]
+    elif isinstance(node, ast.Subscript):
+        origin = _evaluate_annotation(node.value)
+        elements = node.slice.elts if isinstance(node.slice, ast.Tuple) else [node.slice]
+        # the arguments of Literal are values, not annotations: "a" is the string, not a forward reference
+        evaluate = ast.literal_eval if origin is Literal else _evaluate_annotation
+        arguments = tuple(evaluate(element) for element in elements)
+        return origin[arguments if len(arguments) > 1 else arguments[0]]  # pyright: ignore[reportIndexIssue]
+    msg = f"unsupported annotation {ast.unparse(node)!r}"
+    raise ValueError(msg)
@@ -0,0 +1,186 @@
+"""Speculative prefetching of files the model is likely to read next.
+
+After a directory listing the model usually reads some of the listed source and text files. When enabled,
+the prefetcher reads small files of SUPPORTED_FILE_EXTENSIONS in the background, into a bounded
+in-memory cache, while the model is still deciding. get_file_content then serves them from memory.
+A cached entry is only used while the file's size and modification time are unchanged.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from ai_agent.constants import (
+    PREFETCH_CACHE_BYTES,
+    PREFETCH_ENABLED,
+    PREFETCH_MAX_FILE_BYTES,
+    PREFETCH_WORKERS,
+    SUPPORTED_FILE_EXTENSIONS,
+)
+
+logger = logging.getLogger(__name__)
+
+type StatKey = tuple[int, int]
+
+
+class Prefetcher:
+    """Background file reader with a byte-bounded LRU cache and hit-rate metrics.
+
+    Attributes:
+        max_bytes (int): Total size of cached content, and of reads scheduled by one listing.
+        max_file_bytes (int): Larger files are never prefetched.
+        stats (dict[str, int]): Counters: scheduled, prefetched, hits, misses, evicted, stale, skipped.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = PREFETCH_CACHE_BYTES,
+        max_file_bytes: int = PREFETCH_MAX_FILE_BYTES,
+        workers: int = PREFETCH_WORKERS,
+        extensions: list[str] | None = None,
+    ) -> None:
+        """Initializes an empty prefetcher. The worker threads start on first use.
+
+        Args:
+            max_bytes: Total size of cached content, and of reads scheduled by one listing.
+            max_file_bytes: Larger files are never prefetched.
+            workers: Number of reader threads.
+            extensions: File extensions worth prefetching. Defaults to SUPPORTED_FILE_EXTENSIONS.
+        """
+        self.max_bytes: int = max_bytes
+        self.max_file_bytes: int = max_file_bytes
+        self.extensions: frozenset[str] = frozenset(SUPPORTED_FILE_EXTENSIONS if extensions is None else extensions)
+        self.stats: dict[str, int] = dict.fromkeys(
+            ("scheduled", "prefetched", "hits", "misses", "evicted", "stale", "skipped"), 0
+        )
+        self._workers: int = workers
+        self._pool: ThreadPoolExecutor | None = None
+        self._lock: threading.Lock = threading.Lock()
+        self._cache: OrderedDict[Path, tuple[StatKey, str, int]] = OrderedDict()
+        self._cached_bytes: int = 0
+        self._pending: dict[Path, Future[None]] = {}
+
+    def schedule(self, paths: Iterable[Path]) -> int:
+        """Queues small supported files for background reading.
+
+        Reads scheduled by one call never add up to more than max_bytes, so a huge listing cannot thrash the disk.
+
+        Args:
+            paths: Candidate files, e.g. the entries of a directory listing.
+
+        Returns:
+            int: Number of files queued.
+        """
+        budget = self.max_bytes
+        queued = 0
+        for path in paths:
+            if path.suffix not in self.extensions:
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            key = (stat.st_mtime_ns, stat.st_size)
+            if not path.is_file() or stat.st_size > self.max_file_bytes or stat.st_size > budget:
+                self.stats["skipped"] += 1
+                continue
+            with self._lock:
+                cached = self._cache.get(path)
+                if path in self._pending or (cached and cached[0] == key):
+                    continue
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="prefetch")
+                self._pending[path] = self._pool.submit(self._load, path, key)
+            budget -= stat.st_size
+            queued += 1
+        self.stats["scheduled"] += queued
+        return queued
+
+    def get(self, path: Path) -> str | None:
+        """Returns the full text of a file from the cache, waiting for an in-flight read if there is one.
+
+        Args:
+            path: Resolved path of the file.
+
+        Returns:
+            str | None: The file's text, or None if it is not cached or has changed since it was read.
+        """
+        with self._lock:
+            pending = self._pending.get(path)
+        if pending is not None:
+            pending.result()
+
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._cache.get(path)
+            if cached is None:
+                self.stats["misses"] += 1
+                return None
+            if cached[0] != (stat.st_mtime_ns, stat.st_size):
+                self._remove(path)
+                self.stats["stale"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._cache.move_to_end(path)
+            self.stats["hits"] += 1
+            return cached[1]
+
+    def invalidate(self, path: Path) -> None:
+        """Drops a file from the cache, e.g. after writing to it.
+
+        Args:
+            path: Resolved path of the file.
+        """
+        with self._lock:
+            self._remove(path)
+
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache."""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def summary(self) -> str:
+        """Formats the counters and hit rate on one line."""
+        counters = ", ".join(f"{name}={count}" for name, count in self.stats.items())
+        return f"prefetch: {counters}, hit_rate={self.hit_rate():.0%}, cached_bytes={self._cached_bytes}"
+
+    def shutdown(self) -> None:
+        """Stops the reader threads, letting queued reads finish."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _load(self, path: Path, key: StatKey) -> None:
+        try:
+            text = path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError) as e:
+            logger.debug("prefetch of %s failed: %s", path, e)
+            with self._lock:
+                _ = self._pending.pop(path, None)
+            return
+
+        size = key[1]
+        with self._lock:
+            _ = self._pending.pop(path, None)
+            self._remove(path)
+            while self._cache and self._cached_bytes + size > self.max_bytes:
+                oldest = next(iter(self._cache))
+                self._remove(oldest)
+                self.stats["evicted"] += 1
+            self._cache[path] = (key, text, size)
+            self._cached_bytes += size
+            self.stats["prefetched"] += 1
+
+    def _remove(self, path: Path) -> None:
+        cached = self._cache.pop(path, None)
+        if cached is not None:
+            self._cached_bytes -= cached[2]
+
+
+PREFETCHER: Prefetcher | None = Prefetcher() if PREFETCH_ENABLED else None
@@ -0,0 +1,212 @@
+"""CPU and memory profiling of a whole agent run, for `main.py --profile`.
+
+The run is profiled with cProfile and traced with tracemalloc. run_session marks every iteration boundary,
+where a memory snapshot is compared with the previous one, so growth of the history shows up as the lines
+that allocated it. When the run ends, two files are written to the report directory:
+
+- profile.pstats: the raw CPU profile, for `python -m pstats` or a viewer such as snakeviz.
+- report.txt: time by phase, the hottest functions, memory per iteration and the largest allocations.
+
+cProfile only sees the thread that started it. Work done on worker threads (parallel reads, sub-agents)
+shows up as time spent waiting for them.
+"""
+
+import cProfile
+import io
+import linecache
+import logging
+import pstats
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from types import TracebackType
+from typing import Self
+
+from ai_agent.constants import PROFILE_TOP_ENTRIES, PROFILE_TRACEMALLOC_FRAMES
+
+logger = logging.getLogger(__name__)
+
+# (file path suffix, function name) of the calls whose cumulative time makes up each phase; phases may overlap
+PROFILE_PHASES: dict[str, list[tuple[str, str]]] = {
+    "model requests": [("google/genai/models.py", "generate_content")],
+    "tool discovery and schemas": [
+        ("ai_agent/discovery.py", "discover_tools"),
+        ("ai_agent/discovery.py", "generate_schema"),
+    ],
+    "tool calls": [("ai_agent/agent.py", "call_function")],
+    "subprocesses (part of tool calls)": [("subprocess.py", "run"), ("ai_agent/kernel.py", "execute")],
+}
+# allocations made by the profiler itself or by the import machinery are left out of the memory report;
+# they are dropped from the grouped statistics, since filtering every trace of a snapshot takes seconds
+IGNORED_ALLOCATIONS: tuple[str, ...] = (tracemalloc.__file__, "<frozen importlib", "<unknown>")
+
+_ACTIVE: "Profiler | None" = None
+
+
+class Profiler:
+    """Profiles everything run inside a `with` block and writes the reports when it ends.
+
+    Attributes:
+        directory (Path): Where the reports are written.
+        top (int): Entries listed in each ranking.
+    """
+
+    def __init__(self, directory: str | Path, top: int = PROFILE_TOP_ENTRIES) -> None:
+        """Initializes the profiler. Nothing is measured until the block is entered.
+
+        Args:
+            directory: Where the reports are written. Created if missing.
+            top: Entries listed in each ranking.
+        """
+        self.directory: Path = Path(directory)
+        self.top: int = top
+        self._profile: cProfile.Profile = cProfile.Profile()
+        self._lock: threading.Lock = threading.Lock()
+        self._iterations: list[tuple[str, int, int, list[tracemalloc.StatisticDiff]]] = []
+        self._thread: int = 0
+        self._first: tracemalloc.Snapshot | None = None
+        self._previous: tracemalloc.Snapshot | None = None
+        self._started: float = 0.0
+
+    def __enter__(self) -> Self:
+        """Starts tracing allocations and profiling calls."""
+        global _ACTIVE  # noqa: PLW0603
+        tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+        self._first = self._previous = tracemalloc.take_snapshot()
+        self._thread = threading.get_ident()
+        _ACTIVE = self
+        self._started = time.perf_counter()
+        self._profile.enable()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Stops profiling and writes the reports, also when the run failed."""
+        global _ACTIVE  # noqa: PLW0603
+        self._profile.disable()
+        elapsed = time.perf_counter() - self._started
+        _ACTIVE = None
+        self.mark("end of run")
+        final = self._previous
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        try:
+            self._write(elapsed, peak, final)
+        except OSError:
+            logger.exception("could not write the profile to %s", self.directory)
+
+    def mark(self, label: str) -> None:
+        """Takes a memory snapshot and records what grew since the previous one.
+
+        Args:
+            label: Name of the boundary, e.g. the session and iteration that starts here.
+        """
+        if not tracemalloc.is_tracing():
+            return
+        # keep the snapshot out of the CPU profile, which only runs on the thread that started it
+        pause = threading.get_ident() == self._thread and _ACTIVE is self
+        if pause:
+            self._profile.disable()
+        try:
+            with self._lock:
+                snapshot = tracemalloc.take_snapshot()
+                current, peak = tracemalloc.get_traced_memory()
+                growth: list[tracemalloc.StatisticDiff] = []
+                if self._previous is not None:
+                    growth = _relevant(snapshot.compare_to(self._previous, "lineno"))
+                self._iterations.append((label, current, peak, [stat for stat in growth if stat.size_diff > 0][:5]))
+                self._previous = snapshot
+        finally:
+            if pause:
+                self._profile.enable()
+
+    def _write(self, elapsed: float, peak: int, final: tracemalloc.Snapshot | None) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._profile.dump_stats(self.directory / "profile.pstats")
+
+        sections = [f"Wall time: {elapsed:.2f}s\nPeak traced memory: {_size(peak)}"]
+        sections.append(self._phases())
+        sections.append(f"Hot functions by cumulative time\n{self._stats('cumulative')}")
+        sections.append(f"Hot functions by own time\n{self._stats('tottime')}")
+        sections.append(self._memory_by_iteration())
+        if final is not None:
+            sections.append(self._allocations(final))
+        report = self.directory / "report.txt"
+        _ = report.write_text("\n\n".join(sections) + "\n", encoding="utf-8")
+        logger.info("profile written to %s", self.directory)
+
+    def _phases(self) -> str:
+        stats = pstats.Stats(self._profile).stats  # pyright: ignore[reportAttributeAccessIssue]
+        lines = ["Time by phase (cumulative)"]
+        for phase, functions in PROFILE_PHASES.items():
+            seconds = sum(
+                entry[3]
+                for (filename, _, name), entry in stats.items()
+                if any(
+                    filename.replace("\\", "/").endswith(suffix) and name == function for suffix, function in functions
+                )
+            )
+            lines.append(f"    {seconds:8.3f}s  {phase}")
+        return "\n".join(lines)
+
+    def _stats(self, sort: str) -> str:
+        stream = io.StringIO()
+        _ = pstats.Stats(self._profile, stream=stream).strip_dirs().sort_stats(sort).print_stats(self.top)
+        # drop the header pstats prints before the table
+        text = stream.getvalue()
+        return text[text.find("   ncalls") :].rstrip() if "   ncalls" in text else text.strip()
+
+    def _memory_by_iteration(self) -> str:
+        lines = ["Memory by iteration (largest growth since the previous boundary)"]
+        for label, current, peak, growth in self._iterations:
+            lines.append(f"{label}: current {_size(current)}, peak {_size(peak)}")
+            lines.extend(f"    {_size_diff(stat.size_diff):>10}  {_where(stat.traceback)}" for stat in growth)
+        return "\n".join(lines)
+
+    def _allocations(self, final: tracemalloc.Snapshot) -> str:
+        lines = ["Largest live allocations at the end of the run"]
+        lines.extend(
+            f"    {_size(stat.size):>10}  {stat.count:>8} blocks  {_where(stat.traceback)}"
+            for stat in _relevant(final.statistics("lineno"))[: self.top]
+        )
+        if self._first is not None:
+            lines.append("\nLargest growth over the whole run")
+            lines.extend(
+                f"    {_size_diff(stat.size_diff):>10}  {stat.count_diff:>+8} blocks  {_where(stat.traceback)}"
+                for stat in _relevant(final.compare_to(self._first, "lineno"))[: self.top]
+            )
+        return "\n".join(lines)
+
+
+def mark_iteration(session_id: str, iteration: int) -> None:
+    """Marks an iteration boundary for the running profiler. Does nothing when not profiling.
+
+    Args:
+        session_id: Session that starts an iteration.
+        iteration: Number of the iteration that starts.
+    """
+    if _ACTIVE is not None:
+        _ACTIVE.mark(f"session {session_id} iteration {iteration}")
+
+
+def _relevant[T: (tracemalloc.Statistic, tracemalloc.StatisticDiff)](statistics: list[T]) -> list[T]:
+    return [stat for stat in statistics if not stat.traceback[0].filename.startswith(IGNORED_ALLOCATIONS)]
+
+
+def _where(traceback: tracemalloc.Traceback) -> str:
+    frame = traceback[0]
+    source = linecache.getline(frame.filename, frame.lineno).strip()
+    return f"{frame.filename}:{frame.lineno}  {source}"
+
+
+def _size(size: int) -> str:
+    return f"{size / 1024:.1f} KiB" if size < 1024 * 1024 else f"{size / 1024 / 1024:.1f} MiB"
+
+
+def _size_diff(size: int) -> str:
+    return ("+" if size >= 0 else "-") + _size(abs(size))
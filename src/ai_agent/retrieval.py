@@ -0,0 +1,312 @@
+"""Offline lexical retrieval over the working directory.
+
+Files of SUPPORTED_FILE_EXTENSIONS are split into chunks of RETRIEVAL_CHUNK_LINES lines and scored with BM25.
+The index stores term counts only, never file text, and is persisted as JSON under STATE_DIRECTORY.
+Updating it re-reads only files whose size or modification time changed, so it is cheap to refresh
+before every session. build_context formats the best chunks for the first prompt under a token cap.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import NamedTuple, TypedDict
+
+from ai_agent.constants import (
+    DEFAULT_CHARS_PER_TOKEN,
+    RETRIEVAL_CHUNK_LINES,
+    RETRIEVAL_MAX_FILE_BYTES,
+    RETRIEVAL_TOKEN_CAP,
+    RETRIEVAL_TOP_K,
+    STATE_DIRECTORY,
+    SUPPORTED_FILE_EXTENSIONS,
+    WORKSPACE_IGNORED_NAMES,
+)
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+BM25_K1 = 1.5
+BM25_B = 0.75
+_TERM = re.compile(r"[A-Za-z][A-Za-z0-9]*|\d+")
+_CAMEL_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+class ChunkRecord(TypedDict):
+    """Indexed chunk of a file: its line range, length in terms, and term counts."""
+
+    start: int
+    end: int
+    length: int
+    terms: dict[str, int]
+
+
+class FileRecord(TypedDict):
+    """Indexed file: the stat data it was indexed at and its chunks."""
+
+    mtime_ns: int
+    size: int
+    chunks: list[ChunkRecord]
+
+
+class SearchHit(NamedTuple):
+    """One chunk matching a query.
+
+    Attributes:
+        score: BM25 score of the chunk.
+        path: File path relative to the working directory.
+        start: First line of the chunk, 1-based.
+        end: Last line of the chunk, inclusive.
+    """
+
+    score: float
+    path: str
+    start: int
+    end: int
+
+
+def tokenize(text: str) -> list[str]:
+    """Splits text into lowercase terms. snake_case and camelCase identifiers also yield their parts.
+
+    Args:
+        text: Text to split.
+
+    Returns:
+        list[str]: The terms, in order, with repeats.
+    """
+    terms: list[str] = []
+    for word in re.findall(r"\w+", text):
+        parts = [part for piece in word.split("_") for part in _CAMEL_BOUNDARY.split(piece) if part]
+        if len(parts) > 1:
+            terms.append(word.lower())
+        terms.extend(match.lower() for part in parts for match in _TERM.findall(part))
+    return terms
+
+
+class BM25Index:
+    """BM25 index over the chunked text files of one working directory.
+
+    Attributes:
+        root (Path): Resolved working directory.
+        index_path (Path): Where the index is persisted.
+        files (dict[str, FileRecord]): Indexed files by path relative to root.
+    """
+
+    def __init__(self, working_directory: str | Path, state_directory: str | Path = STATE_DIRECTORY) -> None:
+        """Loads the persisted index for a working directory, or starts an empty one.
+
+        Args:
+            working_directory: Directory to index.
+            state_directory: Directory the index file is kept in.
+        """
+        self.root: Path = Path(working_directory).resolve(strict=True)
+        digest = hashlib.sha1(str(self.root).encode(), usedforsecurity=False).hexdigest()[:12]
+        self.index_path: Path = Path(state_directory) / f"retrieval-{digest}.json"
+        self.files: dict[str, FileRecord] = {}
+        self._document_frequency: Counter[str] = Counter()
+        self._total_length: int = 0
+        self._chunk_count: int = 0
+        self._load()
+
+    def update(self) -> tuple[int, int]:
+        """Re-indexes changed files and drops deleted ones.
+
+        Returns:
+            tuple[int, int]: Number of files (re)indexed and number of files dropped.
+        """
+        seen: set[str] = set()
+        indexed = 0
+        for path, stat in self._walk():
+            relative = path.relative_to(self.root).as_posix()
+            seen.add(relative)
+            record = self.files.get(relative)
+            if record and record["mtime_ns"] == stat.st_mtime_ns and record["size"] == stat.st_size:
+                continue
+            try:
+                text = path.read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError) as e:
+                logger.debug("not indexing %s: %s", relative, e)
+                continue
+            self._set_file(relative, FileRecord(mtime_ns=stat.st_mtime_ns, size=stat.st_size, chunks=chunk_text(text)))
+            indexed += 1
+
+        dropped = [relative for relative in self.files if relative not in seen]
+        for relative in dropped:
+            self._set_file(relative, None)
+        if indexed or dropped:
+            logger.info(
+                "retrieval index: %s files indexed, %s dropped, %s chunks", indexed, len(dropped), self._chunk_count
+            )
+        return indexed, len(dropped)
+
+    def search(self, query: str, top_k: int = RETRIEVAL_TOP_K) -> list[SearchHit]:
+        """Returns the chunks that best match a query.
+
+        Args:
+            query: Free text, e.g. the user's prompt.
+            top_k: Maximum number of hits.
+
+        Returns:
+            list[SearchHit]: Hits, best first. Chunks sharing no term with the query are never returned.
+        """
+        query_terms = set(tokenize(query))
+        if not query_terms or not self._chunk_count:
+            return []
+        average_length = self._total_length / self._chunk_count
+        idf = {
+            term: math.log(1 + (self._chunk_count - df + 0.5) / (df + 0.5))
+            for term in query_terms
+            if (df := self._document_frequency.get(term, 0))
+        }
+        hits: list[SearchHit] = []
+        for relative, record in self.files.items():
+            for chunk in record["chunks"]:
+                score = 0.0
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * chunk["length"] / average_length)
+                for term, weight in idf.items():
+                    tf = chunk["terms"].get(term)
+                    if tf:
+                        score += weight * tf * (BM25_K1 + 1) / (tf + norm)
+                if score > 0:
+                    hits.append(SearchHit(score, relative, chunk["start"], chunk["end"]))
+        hits.sort(key=lambda hit: (-hit.score, hit.path, hit.start))
+        return hits[:top_k]
+
+    def save(self) -> None:
+        """Writes the index to index_path atomically."""
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.index_path.with_suffix(".tmp")
+        payload = {"version": INDEX_VERSION, "root": str(self.root), "files": self.files}
+        _ = temporary.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+        _ = temporary.replace(self.index_path)
+
+    def snippet(self, hit: SearchHit) -> str | None:
+        """Reads the lines of a hit, if the file has not changed since it was indexed.
+
+        Args:
+            hit: A hit returned by search.
+
+        Returns:
+            str | None: The chunk's text, or None if the file changed or cannot be read.
+        """
+        path = self.root / hit.path
+        record = self.files.get(hit.path)
+        try:
+            stat = path.stat()
+            if record is None or (record["mtime_ns"], record["size"]) != (stat.st_mtime_ns, stat.st_size):
+                return None
+            lines = path.read_text(encoding="utf-8").splitlines()
+        except (OSError, UnicodeDecodeError):
+            return None
+        return "\n".join(lines[hit.start - 1 : hit.end])
+
+    def _walk(self) -> list[tuple[Path, os.stat_result]]:
+        found: list[tuple[Path, os.stat_result]] = []
+        for directory, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = sorted(name for name in dirnames if name not in WORKSPACE_IGNORED_NAMES)
+            for name in sorted(filenames):
+                path = Path(directory) / name
+                if path.suffix not in SUPPORTED_FILE_EXTENSIONS:
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                if stat.st_size <= RETRIEVAL_MAX_FILE_BYTES:
+                    found.append((path, stat))
+        return found
+
+    def _set_file(self, relative: str, record: FileRecord | None) -> None:
+        """Replaces a file's record, keeping the corpus statistics in step."""
+        old = self.files.pop(relative, None)
+        if old is not None:
+            for chunk in old["chunks"]:
+                self._document_frequency.subtract(chunk["terms"].keys())
+                self._total_length -= chunk["length"]
+            self._chunk_count -= len(old["chunks"])
+        if record is not None:
+            self.files[relative] = record
+            for chunk in record["chunks"]:
+                self._document_frequency.update(chunk["terms"].keys())
+                self._total_length += chunk["length"]
+            self._chunk_count += len(record["chunks"])
+
+    def _load(self) -> None:
+        try:
+            payload = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("ignoring unreadable retrieval index %s: %s", self.index_path, e)
+            return
+        if payload.get("version") != INDEX_VERSION or payload.get("root") != str(self.root):
+            return
+        for relative, record in payload["files"].items():
+            self._set_file(relative, record)
+
+
+def chunk_text(text: str, chunk_lines: int = RETRIEVAL_CHUNK_LINES) -> list[ChunkRecord]:
+    """Splits text into chunks of whole lines and counts the terms of each.
+
+    Args:
+        text: Text of a file.
+        chunk_lines: Lines per chunk.
+
+    Returns:
+        list[ChunkRecord]: One record per chunk that has at least one term.
+    """
+    lines = text.splitlines()
+    chunks: list[ChunkRecord] = []
+    for start in range(0, len(lines), chunk_lines):
+        terms = tokenize("\n".join(lines[start : start + chunk_lines]))
+        if terms:
+            end = min(start + chunk_lines, len(lines))
+            chunks.append(ChunkRecord(start=start + 1, end=end, length=len(terms), terms=dict(Counter(terms))))
+    return chunks
+
+
+def build_context(
+    query: str,
+    working_directory: str,
+    top_k: int = RETRIEVAL_TOP_K,
+    token_cap: int = RETRIEVAL_TOKEN_CAP,
+    state_directory: str | Path = STATE_DIRECTORY,
+) -> str:
+    """Refreshes the index of a working directory and formats the snippets that best match a query.
+
+    Args:
+        query: The user's prompt.
+        working_directory: Directory to search.
+        top_k: Maximum number of snippets.
+        token_cap: Approximate token budget for all snippets together.
+        state_directory: Directory the index file is kept in.
+
+    Returns:
+        str: Snippets with their file and line range, or an empty string if nothing matched.
+    """
+    index = BM25Index(working_directory, state_directory)
+    if any(index.update()):
+        try:
+            index.save()
+        except OSError as e:
+            logger.warning("could not save retrieval index: %s", e)
+
+    budget = int(token_cap * DEFAULT_CHARS_PER_TOKEN)
+    sections: list[str] = []
+    for hit in index.search(query, top_k):
+        text = index.snippet(hit)
+        if text is None:
+            continue
+        header = f"--- {hit.path} (lines {hit.start}-{hit.end}) ---\n"
+        room = budget - len(header)
+        if room <= 0:
+            break
+        if len(text) > room:
+            text = text[:room].rsplit("\n", 1)[0] + "\n[ ... snippet truncated ... ]"
+        sections.append(header + text)
+        budget -= len(sections[-1])
+    return "\n".join(sections)
@@ -0,0 +1,187 @@
+"""Per-turn selection of the tools offered to the model.
+
+Every tool declaration sent with a request costs prompt tokens, and so does its line in the system prompt.
+With a large catalogue, e.g. many plugin tools, the router offers at most ROUTER_MAX_TOOLS per turn:
+
+- the CORE_TOOLS, always, including list_tools, which lets the model find and unlock the rest;
+- tools the model unlocked with list_tools, most recent first, then tools it called in the last
+  ROUTER_RECENT_TURNS turns;
+- the remaining slots go to the tools whose name, description and arguments best match the conversation,
+  scored lexically with idf weights, so words shared by every tool count for little.
+
+A catalogue that fits in ROUTER_MAX_TOOLS, or one without list_tools, is always offered whole.
+"""
+
+import logging
+import math
+from collections import Counter
+from contextvars import ContextVar
+
+from google.genai import types
+
+from ai_agent.constants import CORE_TOOLS, ROUTER_MAX_TOOLS, ROUTER_RECENT_TURNS
+from ai_agent.retrieval import tokenize
+
+logger = logging.getLogger(__name__)
+
+LIST_TOOLS_TOOL_NAME = "list_tools"
+
+
+class ToolRouter:
+    """Picks the tools offered in each turn of one session.
+
+    Attributes:
+        catalogue (types.Tool): Every tool the session may use.
+        max_tools (int): Most tools offered per turn.
+        pinned (list[str]): Tools unlocked with list_tools, most recent first.
+    """
+
+    def __init__(
+        self,
+        catalogue: types.Tool,
+        core: frozenset[str] = CORE_TOOLS,
+        max_tools: int = ROUTER_MAX_TOOLS,
+        recent_turns: int = ROUTER_RECENT_TURNS,
+    ) -> None:
+        """Indexes the catalogue.
+
+        Args:
+            catalogue: Every tool the session may use.
+            core: Tools offered in every turn.
+            max_tools: Most tools offered per turn. The core tools are offered even if there are more.
+            recent_turns: Model turns whose tool calls keep those tools offered.
+        """
+        self.catalogue: types.Tool = catalogue
+        self.max_tools: int = max_tools
+        self.pinned: list[str] = []
+        self._recent_turns: int = recent_turns
+        self._declarations: dict[str, types.FunctionDeclaration] = {
+            declaration.name: declaration for declaration in catalogue.function_declarations or [] if declaration.name
+        }
+        self._core: list[str] = [name for name in self._declarations if name in core]
+        self._terms: dict[str, set[str]] = {
+            name: set(tokenize(_describe(declaration))) for name, declaration in self._declarations.items()
+        }
+        document_frequency = Counter(term for terms in self._terms.values() for term in terms)
+        count = len(self._terms)
+        self._idf: dict[str, float] = {
+            term: math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequency.items()
+        }
+        self._offered: types.Tool = catalogue
+
+    @property
+    def free_slots(self) -> int:
+        """Slots left next to the core tools, i.e. the most tools one list_tools call can unlock."""
+        return max(0, self.max_tools - len(self._core))
+
+    @property
+    def routing(self) -> bool:
+        """Whether the catalogue is too large to offer whole and the model can still reach all of it."""
+        return LIST_TOOLS_TOOL_NAME in self._declarations and len(self._declarations) > self.max_tools
+
+    def select(self, messages: list[types.Content]) -> types.Tool:
+        """Returns the tools to offer for the next request.
+
+        The same object is returned for as long as the selection does not change.
+
+        Args:
+            messages: History of the session so far.
+
+        Returns:
+            types.Tool: The selected declarations, in catalogue order.
+        """
+        if not self.routing:
+            return self.catalogue
+
+        chosen = dict.fromkeys(self._core)
+        for name in [*self.pinned, *_recent_calls(messages, self._recent_turns)]:
+            if len(chosen) >= self.max_tools:
+                break
+            if name in self._declarations:
+                chosen[name] = None
+        if len(chosen) < self.max_tools:
+            for name in self.rank(_conversation_text(messages, self._recent_turns)):
+                if len(chosen) >= self.max_tools:
+                    break
+                chosen[name] = None
+
+        names = [name for name in self._declarations if name in chosen]
+        if names != [declaration.name for declaration in self._offered.function_declarations or []]:
+            logger.info("offering %s of %s tools: %s", len(names), len(self._declarations), ", ".join(names))
+            self._offered = types.Tool(function_declarations=[self._declarations[name] for name in names])
+        return self._offered
+
+    def rank(self, text: str) -> list[str]:
+        """Ranks the tools that share at least one term with a text, best match first.
+
+        Args:
+            text: Text to match, e.g. the recent conversation or a list_tools query.
+
+        Returns:
+            list[str]: Names of the matching tools.
+        """
+        query = set(tokenize(text))
+        scores = {
+            name: sum(self._idf[term] for term in query & terms) for name, terms in self._terms.items() if query & terms
+        }
+        return sorted(scores, key=lambda name: -scores[name])
+
+    def unlisted(self, query: str = "") -> list[types.FunctionDeclaration]:
+        """Returns the tools not offered in the current turn, best match for the query first.
+
+        Args:
+            query: Words describing the tools wanted. Empty lists all of them in catalogue order.
+
+        Returns:
+            list[types.FunctionDeclaration]: The declarations.
+        """
+        offered = {declaration.name for declaration in self._offered.function_declarations or []}
+        names = self.rank(query) if query.strip() else list(self._declarations)
+        return [self._declarations[name] for name in names if name not in offered]
+
+    def pin(self, names: list[str]) -> None:
+        """Offers tools in the next turns, as long as there is room for them.
+
+        Args:
+            names: Tools to offer, most wanted first.
+        """
+        wanted = [name for name in names if name in self._declarations]
+        self.pinned = [*wanted, *(name for name in self.pinned if name not in wanted)]
+
+
+CURRENT_ROUTER: ContextVar[ToolRouter | None] = ContextVar("CURRENT_ROUTER", default=None)
+
+
+def _describe(declaration: types.FunctionDeclaration) -> str:
+    """Text a tool is matched on: its name, description and argument names and descriptions."""
+    parts = [declaration.name or "", declaration.description or ""]
+    if declaration.parameters is not None and declaration.parameters.properties:
+        for name, schema in declaration.parameters.properties.items():
+            parts.extend((name, schema.description or ""))
+    return " ".join(parts)
+
+
+def _recent_calls(messages: list[types.Content], turns: int) -> list[str]:
+    """Names of the tools called in the last model turns, most recent first."""
+    names: list[str] = []
+    model_turns = [message for message in messages if message.role == "model"][-turns:] if turns > 0 else []
+    for message in reversed(model_turns):
+        names.extend(
+            part.function_call.name for part in message.parts or [] if part.function_call and part.function_call.name
+        )
+    return list(dict.fromkeys(names))
+
+
+def _conversation_text(messages: list[types.Content], turns: int) -> str:
+    """The first prompt and the text of the last turns, which the tools are matched against."""
+    recent = messages[-2 * turns :] if turns > 0 else []
+    selected = [messages[0], *(message for message in recent if message is not messages[0])] if messages else []
+    texts: list[str] = []
+    for message in selected:
+        for part in message.parts or []:
+            if part.text:
+                texts.append(part.text)
+            elif part.function_call and part.function_call.name:
+                texts.append(part.function_call.name)
+    return "\n".join(texts)
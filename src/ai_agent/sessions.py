@@ -0,0 +1,272 @@
+"""Append-only on-disk log of each session, so a session can be resumed after it ends or crashes.
+
+Every message is appended to STATE_DIRECTORY/sessions/<session id>.jsonl as soon as the turn that produced it
+is over, as one compact JSON line. Tool payloads and call arguments of SESSION_BLOB_MIN_CHARS or more are
+stored once, compressed and named by their hash, under sessions/blobs/, and the line only holds a reference,
+so repeated outputs (the same file read in many sessions) cost their size once.
+
+Resuming reads the log back into a history. Only the payloads of the last SESSION_RESUME_PAYLOADS tool
+messages, the ones the next turn most likely builds on, are loaded; older ones are left on disk and replaced
+by a note that names their blob, which the model can load with the load_session_output tool when it needs it.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any
+
+from google.genai import types
+
+from ai_agent.constants import SESSION_BLOB_MIN_CHARS, SESSION_LOG_ENABLED, SESSION_RESUME_PAYLOADS, STATE_DIRECTORY
+from ai_agent.exceptions import SessionNotFoundError
+
+logger = logging.getLogger(__name__)
+
+LOG_VERSION = 1
+BLOB_KEY = "$blob"
+# session ids become file names, so they may not contain separators or dots
+SESSION_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]+")
+BLOB_PATTERN = re.compile(r"[0-9a-f]{32}")
+STORED_NOTE = "[ ... output of an earlier run, not reloaded to save tokens; call the tool again if you need it ... ]"
+LAZY_NOTE = (
+    "[ ... output of an earlier run, {chars} characters, not reloaded to save tokens;"
+    ' call load_session_output with ref="{ref}" if you need it ... ]'
+)
+
+
+class SessionLog:
+    """Appends the messages of one session to its log file.
+
+    Attributes:
+        session_id (str): Id of the session.
+        path (Path): The log file.
+        logged (int): Messages of the history already in the log.
+    """
+
+    def __init__(self, store: "SessionStore", session_id: str, logged: int = 0) -> None:
+        """Initializes the log. The file is created on the first append.
+
+        Args:
+            store: Store the log and its payloads are kept in.
+            session_id: Id of the session.
+            logged: Messages of the history already in the log, e.g. when resuming.
+        """
+        self.session_id: str = session_id
+        self.path: Path = store.log_path(session_id)
+        self.logged: int = logged
+        self._store: SessionStore = store
+
+    def sync(self, messages: list[types.Content]) -> int:
+        """Appends the messages added to the history since the last call.
+
+        Messages already logged are not written again, even if they were compacted since.
+
+        Args:
+            messages: The session's history.
+
+        Returns:
+            int: Number of messages appended.
+        """
+        new = messages[self.logged :]
+        if not new:
+            return 0
+        try:
+            lines = [json.dumps(self._store.externalize(content), separators=(",", ":")) for content in new]
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as log:
+                if self.logged == 0 and log.tell() == 0:
+                    header = {"session": self.session_id, "version": LOG_VERSION, "created": time.time()}
+                    _ = log.write(json.dumps(header, separators=(",", ":")) + "\n")
+                _ = log.write("\n".join(lines) + "\n")
+        except OSError:
+            logger.exception("could not append to session log %s", self.path)
+            return 0
+        self.logged = len(messages)
+        return len(new)
+
+
+class SessionStore:
+    """Session logs and the payloads they refer to.
+
+    Attributes:
+        directory (Path): Where logs and payloads are kept.
+        min_chars (int): Strings at least this long are stored as payloads.
+    """
+
+    def __init__(self, directory: str | Path | None = None, min_chars: int = SESSION_BLOB_MIN_CHARS) -> None:
+        """Initializes the store. Nothing is created on disk until the first append.
+
+        Args:
+            directory: Where logs and payloads are kept. Defaults to STATE_DIRECTORY/sessions.
+            min_chars: Strings at least this long are stored as payloads.
+        """
+        self.directory: Path = Path(STATE_DIRECTORY, "sessions") if directory is None else Path(directory)
+        self.min_chars: int = min_chars
+        self._lock: threading.Lock = threading.Lock()
+
+    def log_path(self, session_id: str) -> Path:
+        """Returns the log file of a session.
+
+        Args:
+            session_id: Id of the session.
+
+        Returns:
+            Path: The log file, inside the store's directory.
+
+        Raises:
+            SessionNotFoundError: If the id is not a valid session id, e.g. one that would reach outside.
+        """
+        if not SESSION_ID_PATTERN.fullmatch(session_id):
+            raise SessionNotFoundError(session_id)
+        return self.directory / f"{session_id}.jsonl"
+
+    def open(self, session_id: str) -> SessionLog:
+        """Starts the log of a new session.
+
+        Args:
+            session_id: Id of the session.
+
+        Returns:
+            SessionLog: The log.
+        """
+        return SessionLog(self, session_id)
+
+    def resume(
+        self, session_id: str, payloads: int = SESSION_RESUME_PAYLOADS
+    ) -> tuple[list[types.Content], SessionLog]:
+        """Rebuilds the history of a logged session.
+
+        A line cut short by a crash is skipped.
+
+        Args:
+            session_id: Id of the session.
+            payloads: Most recent tool messages whose payloads are loaded.
+
+        Returns:
+            tuple: The history, and the log to keep appending to.
+
+        Raises:
+            SessionNotFoundError: If there is no log for the session.
+        """
+        path = self.log_path(session_id)
+        records: list[dict[str, Any]] = []  # pyright: ignore[reportExplicitAny]
+        try:
+            with path.open(encoding="utf-8") as log:
+                for number, line in enumerate(log, 1):
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        logger.warning("skipping unreadable line %s of %s", number, path)
+                        continue
+                    if "session" not in record:
+                        records.append(record)
+        except FileNotFoundError:
+            raise SessionNotFoundError(session_id) from None
+
+        tool_indices = [index for index, record in enumerate(records) if record.get("role") == "tool"]
+        first_loaded = len(records)
+        if payloads > 0:
+            first_loaded = tool_indices[-payloads] if payloads <= len(tool_indices) else 0
+        messages = [
+            types.Content.model_validate(self.internalize(record, load=index >= first_loaded))
+            for index, record in enumerate(records)
+        ]
+        logger.info("resumed session %s with %s messages", session_id, len(messages))
+        return messages, SessionLog(self, session_id, logged=len(messages))
+
+    def externalize(self, content: types.Content) -> dict[str, Any]:  # pyright: ignore[reportExplicitAny]
+        """Serializes a message, storing its long call arguments and tool payloads as blobs.
+
+        Args:
+            content: A message of the history.
+
+        Returns:
+            dict: The message as JSON data, with references in place of long strings.
+        """
+        record = content.model_dump(mode="json", exclude_none=True)
+        for part in record.get("parts", []):
+            for key, field in (("function_call", "args"), ("function_response", "response")):
+                if key in part and field in part[key]:
+                    part[key][field] = self._externalize_value(part[key][field])
+        return record
+
+    def internalize(self, record: dict[str, Any], load: bool = True) -> dict[str, Any]:  # pyright: ignore[reportExplicitAny]
+        """Replaces the blob references of a logged message by their payloads, or by LAZY_NOTE.
+
+        Args:
+            record: A message as logged.
+            load: Whether to read the payloads from disk.
+
+        Returns:
+            dict: The message as JSON data.
+        """
+        for part in record.get("parts", []):
+            for key, field in (("function_call", "args"), ("function_response", "response")):
+                if key in part and field in part[key]:
+                    part[key][field] = self._internalize_value(part[key][field], load)
+        return record
+
+    def _externalize_value(self, value: object) -> object:
+        if isinstance(value, str) and len(value) >= self.min_chars:
+            return {BLOB_KEY: self._put(value), "chars": len(value)}
+        if isinstance(value, dict):
+            return {key: self._externalize_value(item) for key, item in value.items()}  # pyright: ignore[reportUnknownVariableType]
+        if isinstance(value, list):
+            return [self._externalize_value(item) for item in value]  # pyright: ignore[reportUnknownVariableType]
+        return value
+
+    def _internalize_value(self, value: object, load: bool) -> object:
+        if isinstance(value, dict):
+            if BLOB_KEY in value:
+                digest = str(value[BLOB_KEY])  # pyright: ignore[reportUnknownArgumentType]
+                return self._get(digest) if load else LAZY_NOTE.format(chars=value.get("chars", "?"), ref=digest)  # pyright: ignore[reportUnknownMemberType]
+            return {key: self._internalize_value(item, load) for key, item in value.items()}  # pyright: ignore[reportUnknownVariableType]
+        if isinstance(value, list):
+            return [self._internalize_value(item, load) for item in value]  # pyright: ignore[reportUnknownVariableType]
+        return value
+
+    def load(self, ref: str) -> str | None:
+        """Reads a payload that a resumed history left on disk.
+
+        Args:
+            ref: The blob named in LAZY_NOTE.
+
+        Returns:
+            str | None: The payload, or None if there is no such blob.
+        """
+        if not BLOB_PATTERN.fullmatch(ref) or not self._blob_path(ref).is_file():
+            return None
+        return self._get(ref)
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.directory / "blobs" / digest[:2] / digest
+
+    def _put(self, text: str) -> str:
+        """Stores a payload unless an identical one is stored already, and returns its hash."""
+        data = text.encode()
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        path = self._blob_path(digest)
+        with self._lock:
+            if path.exists():
+                return digest
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = path.with_suffix(".tmp")
+            _ = temporary.write_bytes(zlib.compress(data))
+            _ = temporary.replace(path)
+        return digest
+
+    def _get(self, digest: str) -> str:
+        """Reads a payload, or returns STORED_NOTE if it is missing or damaged."""
+        try:
+            return zlib.decompress(self._blob_path(digest).read_bytes()).decode()
+        except (OSError, zlib.error, UnicodeDecodeError):
+            logger.warning("session payload %s is missing or damaged", digest)
+            return STORED_NOTE
+
+
+SESSION_STORE = SessionStore() if SESSION_LOG_ENABLED else None
@@ -0,0 +1,123 @@
+"""Parallel sub-agents for tasks that split into independent parts.
+
+Each sub-agent is a separate session with its own short history, iteration limit and usage ledger.
+They run concurrently on the parent's client, and only their final answers go back to the parent,
+so the parent's history grows by one tool result instead of every intermediate tool call.
+The ledgers split what is left of the parent's budget, and the sub-agents stop once the delegate call
+is cancelled, so together they cannot take the parent past its ceilings.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+
+from google.genai import types
+
+from ai_agent.agent import AVAILABLE_FUNCTIONS, CURRENT_SESSION, SessionContext, run_session
+from ai_agent.constants import (
+    SUBAGENT_ANSWER_LIMIT,
+    SUBAGENT_MAX_ITERATIONS,
+    SUBAGENT_MAX_TASKS,
+    SUBAGENT_MAX_TOKENS,
+    SUBAGENT_MAX_WORKERS,
+    SUBAGENT_PROMPT,
+)
+from ai_agent.exceptions import AIAgentError, DelegationError
+from ai_agent.output_budget import truncate_output
+from ai_agent.usage import UsageLedger
+
+logger = logging.getLogger(__name__)
+
+DELEGATE_TOOL_NAME = "delegate"
+
+# sub-agents add their usage to the parent's ledger as they finish, from their own threads
+_MERGE_LOCK = threading.Lock()
+
+SUBAGENT_FUNCTIONS = types.Tool(
+    function_declarations=[
+        declaration
+        for declaration in AVAILABLE_FUNCTIONS.function_declarations or []
+        if declaration.name != DELEGATE_TOOL_NAME
+    ]
+)
+
+
+def run_subagents(tasks: list[str]) -> list[str]:
+    """Runs one sub-agent per task concurrently and returns their final answers in task order.
+
+    Args:
+        tasks: Self-contained task descriptions.
+
+    Returns:
+        list[str]: One final answer per task, or "Error: ..." for a sub-agent that failed.
+
+    Raises:
+        DelegationError: If there is no running session, it is already a sub-agent, or its budget is used up.
+    """
+    parent = CURRENT_SESSION.get()
+    if parent is None:
+        msg = "no agent session is running"
+        raise DelegationError(msg)
+    if parent.depth > 0:
+        msg = "sub-agents cannot start sub-agents of their own"
+        raise DelegationError(msg)
+    if len(tasks) > SUBAGENT_MAX_TASKS:
+        msg = f"at most {SUBAGENT_MAX_TASKS} tasks per call, got {len(tasks)}"
+        raise DelegationError(msg)
+
+    max_tokens, max_cost = _child_limits(parent.ledger, len(tasks))
+
+    logger.info("Starting %s sub-agents", len(tasks))
+    # each sub-agent runs in a copy of this context, so it sees the delegate call's cancellation token
+    context = copy_context()
+    with ThreadPoolExecutor(max_workers=min(SUBAGENT_MAX_WORKERS, len(tasks)) or 1) as pool:
+        answers = list(
+            pool.map(
+                lambda item: context.copy().run(_run_subagent, parent, *item, max_tokens, max_cost),
+                enumerate(tasks, start=1),
+            )
+        )
+    return [truncate_output(answer, SUBAGENT_ANSWER_LIMIT, "delegate a narrower task") for answer in answers]
+
+
+def _child_limits(ledger: UsageLedger, count: int) -> tuple[int, float]:
+    """Splits what is left of the parent's token and cost ceilings evenly between `count` sub-agents."""
+    max_tokens, max_cost = SUBAGENT_MAX_TOKENS, 0.0
+    if ledger.max_tokens:
+        left = ledger.max_tokens - ledger.total_tokens
+        if left <= 0:
+            msg = "the session's token budget is used up"
+            raise DelegationError(msg)
+        share = max(left // count, 1)
+        max_tokens = min(max_tokens, share) if max_tokens else share
+    if ledger.max_cost:
+        left_cost = ledger.max_cost - ledger.total_cost
+        if left_cost <= 0:
+            msg = "the session's cost budget is used up"
+            raise DelegationError(msg)
+        max_cost = left_cost / count
+    return max_tokens, max_cost
+
+
+def _run_subagent(parent: SessionContext, index: int, task: str, max_tokens: int, max_cost: float) -> str:
+    ledger = UsageLedger(max_tokens=max_tokens, max_cost=max_cost)
+    try:
+        answer = run_session(
+            parent.client,
+            SUBAGENT_PROMPT.format(task=task),
+            verbose=False,
+            ledger=ledger,
+            tools=SUBAGENT_FUNCTIONS,
+            max_iterations=SUBAGENT_MAX_ITERATIONS,
+            depth=parent.depth + 1,
+            session_id=f"{parent.session_id}.{index}",
+        )
+    except AIAgentError as e:
+        logger.warning("Sub-agent failed on task '%s': %s", task, e)
+        answer = f"Error: {e}"
+    finally:
+        # also when the delegate call timed out and nobody reads the answer: the tokens were still spent
+        with _MERGE_LOCK:
+            parent.ledger.merge(ledger)
+    return answer
@@ -0,0 +1,190 @@
+"""Session level token accounting and budget checks.
+
+The ledger accumulates the usage metadata of every response, per model, and projects the size of the
+next request before it is sent. The agent loop uses that projection to compact the history or stop
+*before* a configured token or cost ceiling would be crossed, instead of finding out afterwards.
+"""
+
+import logging
+from dataclasses import dataclass
+from enum import Enum, auto
+
+from google.genai import types
+
+from ai_agent.constants import DEFAULT_CHARS_PER_TOKEN, MAX_SESSION_COST, MAX_SESSION_TOKENS, MODEL_PRICES
+from ai_agent.history import history_chars
+
+logger = logging.getLogger(__name__)
+
+
+class BudgetDecision(Enum):
+    """What the agent loop should do before its next request.
+
+    Attributes:
+        CONTINUE: The next request fits within the budget.
+        COMPACT: The next request would exceed the budget, but compacting the history may make it fit.
+        STOP: The next request would exceed the budget even after compaction.
+    """
+
+    CONTINUE = auto()
+    COMPACT = auto()
+    STOP = auto()
+
+
+@dataclass
+class ModelUsage:
+    """Token totals for one model.
+
+    Attributes:
+        calls: Number of responses received.
+        prompt_tokens: Prompt tokens, including cached ones.
+        candidate_tokens: Response tokens, including thinking tokens.
+        cached_tokens: Prompt tokens served from the context cache.
+    """
+
+    calls: int = 0
+    prompt_tokens: int = 0
+    candidate_tokens: int = 0
+    cached_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        """Prompt plus candidate tokens."""
+        return self.prompt_tokens + self.candidate_tokens
+
+    def cost(self, model: str) -> float:
+        """Estimated cost in USD, using MODEL_PRICES. Unknown models cost 0.
+
+        Args:
+            model: Name of the model these tokens were used with.
+
+        Returns:
+            float: Estimated cost in USD.
+        """
+        input_price, output_price, cached_price = MODEL_PRICES.get(model, (0.0, 0.0, 0.0))
+        uncached = self.prompt_tokens - self.cached_tokens
+        return (uncached * input_price + self.cached_tokens * cached_price + self.candidate_tokens * output_price) / 1e6
+
+
+class UsageLedger:
+    """Accumulates token usage for a session and checks it against token and cost ceilings.
+
+    Attributes:
+        max_tokens (int): Token ceiling for the session, 0 for no ceiling.
+        max_cost (float): Cost ceiling in USD for the session, 0 for no ceiling.
+        models (dict[str, ModelUsage]): Usage per model.
+    """
+
+    def __init__(self, max_tokens: int = MAX_SESSION_TOKENS, max_cost: float = MAX_SESSION_COST) -> None:
+        """Initializes an empty ledger.
+
+        Args:
+            max_tokens: Token ceiling for the session, 0 for no ceiling.
+            max_cost: Cost ceiling in USD for the session, 0 for no ceiling.
+        """
+        self.max_tokens: int = max_tokens
+        self.max_cost: float = max_cost
+        self.models: dict[str, ModelUsage] = {}
+        self._chars_per_token: float = DEFAULT_CHARS_PER_TOKEN
+
+    @property
+    def total_tokens(self) -> int:
+        """Tokens used by the session across all models."""
+        return sum(usage.total_tokens for usage in self.models.values())
+
+    @property
+    def total_cost(self) -> float:
+        """Estimated cost in USD of the session across all models."""
+        return sum(usage.cost(model) for model, usage in self.models.items())
+
+    def record(self, model: str, usage_metadata: types.GenerateContentResponseUsageMetadata, prompt_chars: int) -> None:
+        """Adds one response's usage to the ledger.
+
+        Args:
+            model: Model that produced the response.
+            usage_metadata: Usage metadata of the response.
+            prompt_chars: Characters sent in the request, used to calibrate future projections.
+        """
+        usage = self.models.setdefault(model, ModelUsage())
+        prompt_tokens = usage_metadata.prompt_token_count or 0
+        usage.calls += 1
+        usage.prompt_tokens += prompt_tokens
+        usage.candidate_tokens += (usage_metadata.candidates_token_count or 0) + (
+            usage_metadata.thoughts_token_count or 0
+        )
+        usage.cached_tokens += usage_metadata.cached_content_token_count or 0
+        if prompt_tokens and prompt_chars:
+            self._chars_per_token = prompt_chars / prompt_tokens
+
+    def merge(self, other: "UsageLedger") -> None:
+        """Adds another ledger's totals to this one, e.g. those of a finished sub-agent.
+
+        Args:
+            other: Ledger to add.
+        """
+        for model, usage in other.models.items():
+            total = self.models.setdefault(model, ModelUsage())
+            total.calls += usage.calls
+            total.prompt_tokens += usage.prompt_tokens
+            total.candidate_tokens += usage.candidate_tokens
+            total.cached_tokens += usage.cached_tokens
+
+    def project_prompt_tokens(self, messages: list[types.Content], system_prompt: str = "") -> int:
+        """Projects the prompt size of the next request, calibrated against the previous one.
+
+        Args:
+            messages: The history that is about to be sent.
+            system_prompt: The system prompt that is about to be sent.
+
+        Returns:
+            int: Projected prompt tokens.
+        """
+        return round(history_chars(messages, system_prompt) / self._chars_per_token)
+
+    def check(
+        self, model: str, messages: list[types.Content], system_prompt: str = "", can_compact: bool = True
+    ) -> BudgetDecision:
+        """Decides whether the next request fits within the session's ceilings.
+
+        Args:
+            model: Model the next request goes to.
+            messages: The history that is about to be sent.
+            system_prompt: The system prompt that is about to be sent.
+            can_compact: Whether compacting the history is still an option.
+
+        Returns:
+            BudgetDecision: What to do before sending the request.
+        """
+        if not self.max_tokens and not self.max_cost:
+            return BudgetDecision.CONTINUE
+
+        projected = ModelUsage(prompt_tokens=self.project_prompt_tokens(messages, system_prompt))
+        usage = self.models.get(model)
+        if usage and usage.calls:
+            projected.candidate_tokens = usage.candidate_tokens // usage.calls
+
+        over_tokens = self.max_tokens and self.total_tokens + projected.total_tokens > self.max_tokens
+        over_cost = self.max_cost and self.total_cost + projected.cost(model) > self.max_cost
+        if not over_tokens and not over_cost:
+            return BudgetDecision.CONTINUE
+        logger.info(
+            "next request projected at %s tokens would exceed the session budget (%s tokens / $%.4f used so far)",
+            projected.total_tokens,
+            self.total_tokens,
+            self.total_cost,
+        )
+        return BudgetDecision.COMPACT if can_compact else BudgetDecision.STOP
+
+    def summary(self) -> str:
+        """Formats the session totals, one line per model and a total line.
+
+        Returns:
+            str: Human readable totals.
+        """
+        lines = [
+            f"{model}: calls={usage.calls}, prompt={usage.prompt_tokens}, candidates={usage.candidate_tokens}, "
+            f"cached={usage.cached_tokens}, cost=${usage.cost(model):.4f}"
+            for model, usage in self.models.items()
+        ]
+        lines.append(f"total: tokens={self.total_tokens}, cost=${self.total_cost:.4f}")
+        return "\n".join(lines)
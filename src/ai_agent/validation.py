@@ -0,0 +1,307 @@
+"""Argument validation and coercion for tool calls.
+
+A validator is compiled once per tool from its signature, so checking a call only walks a small
+precomputed table. Values the model commonly sends in the wrong but unambiguous shape are coerced
+(e.g. "5" to 5, 5.0 to 5, "a" to ["a"]). Anything else is reported back to the model as a structured error.
+"""
+
+import contextlib
+import enum
+import inspect
+import json
+import logging
+import types as pytypes
+from collections.abc import Callable
+from typing import Any, Literal, Union, get_args, get_origin
+
+from ai_agent.exceptions import ArgumentValidationError
+
+logger = logging.getLogger(__name__)
+
+type Coercer = Callable[[object], object]
+
+_TRUE_STRINGS = frozenset({"true", "yes", "1"})
+_FALSE_STRINGS = frozenset({"false", "no", "0"})
+
+
+class _CoercionError(ValueError):
+    """Raised by a coercer when a value cannot be converted."""
+
+
+class ArgumentValidator:
+    """Validates and coerces the arguments of one tool.
+
+    Attributes:
+        tool_name (str): Name of the tool this validator belongs to.
+        required (tuple[str, ...]): Parameters the model has to provide.
+    """
+
+    def __init__(self, tool_name: str, signature: inspect.Signature, injected_args: list[str] | None = None) -> None:
+        """Compiles the validator from the tool's signature.
+
+        Args:
+            tool_name: Name of the tool.
+            signature: Signature of the tool function.
+            injected_args: Arguments filled in by the agent, e.g. working_directory. The model may not set them.
+        """
+        injected = set(injected_args or [])
+        self.tool_name: str = tool_name
+        self._injected: frozenset[str] = frozenset(injected)
+        self._coercers: dict[str, Coercer] = {}
+        required: list[str] = []
+        self._accepts_any: bool = False
+        for p in signature.parameters.values():
+            if p.kind is inspect.Parameter.VAR_KEYWORD:
+                self._accepts_any = True
+                continue
+            if p.kind is inspect.Parameter.VAR_POSITIONAL or p.name in injected:
+                continue
+            self._coercers[p.name] = _compile_coercer(p.annotation)  # pyright: ignore[reportAny]
+            if p.default is inspect.Parameter.empty:
+                required.append(p.name)
+        self.required: tuple[str, ...] = tuple(required)
+
+    def __call__(self, args: dict[str, Any]) -> dict[str, Any]:  # pyright: ignore[reportExplicitAny]
+        """Validates and coerces a call's arguments.
+
+        Args:
+            args: Arguments sent by the model.
+
+        Returns:
+            dict: Coerced arguments, without any injected ones.
+
+        Raises:
+            ArgumentValidationError: If arguments are unknown, missing or of the wrong type.
+        """
+        errors: dict[str, str] = {}
+        coerced: dict[str, Any] = {}  # pyright: ignore[reportExplicitAny]
+        for name, value in args.items():  # pyright: ignore[reportAny]
+            if name in self._injected:
+                continue
+            coercer = self._coercers.get(name)
+            if coercer is None:
+                if self._accepts_any:
+                    coerced[name] = value
+                else:
+                    errors[name] = "unknown argument"
+                continue
+            try:
+                coerced[name] = coercer(value)
+            except _CoercionError as e:
+                errors[name] = str(e)
+        for name in self.required:
+            if name not in args:
+                errors[name] = "missing required argument"
+
+        if errors:
+            raise ArgumentValidationError(self.tool_name, errors, expected=list(self._coercers))
+        return coerced
+
+
+def compile_validators(
+    discovered_tools: dict[str, Callable[..., str]], injected_args: list[str] | None = None
+) -> dict[str, ArgumentValidator]:
+    """Compiles one validator per tool. Meant to run once, at discovery time.
+
+    Args:
+        discovered_tools: Tools keyed by name.
+        injected_args: Arguments filled in by the agent rather than the model.
+
+    Returns:
+        dict of validators keyed by tool name.
+    """
+    return {
+        name: ArgumentValidator(name, inspect.signature(func), injected_args) for name, func in discovered_tools.items()
+    }
+
+
+def _compile_coercer(annotation: object) -> Coercer:  # noqa: C901, PLR0911
+    if annotation is inspect.Parameter.empty or annotation is Any:
+        return _passthrough
+
+    origin = get_origin(annotation)
+    if origin in (Union, pytypes.UnionType):
+        members = get_args(annotation)
+        optional = type(None) in members
+        others = [m for m in members if m is not type(None)]  # pyright: ignore[reportAny]
+        inner = (
+            _compile_coercer(others[0]) if len(others) == 1 else _first_of([(m, _compile_coercer(m)) for m in others])  # pyright: ignore[reportAny]
+        )
+        return _optional(inner) if optional else inner
+    if origin is Literal:
+        return _literal(get_args(annotation))
+    if isinstance(annotation, type) and issubclass(annotation, enum.Enum):
+        return _enum(annotation)
+    if annotation is list or origin is list:
+        item_args = get_args(annotation)
+        return _list_of(_compile_coercer(item_args[0]) if item_args else _passthrough)
+    if annotation is dict or origin is dict:
+        return _dict
+    if annotation is bool:
+        return _bool
+    if annotation is int:
+        return _int
+    if annotation is float:
+        return _float
+    if annotation is str:
+        return _str
+    logger.debug("no coercion rule for annotation %r, passing values through", annotation)
+    return _passthrough
+
+
+def _passthrough(value: object) -> object:
+    return value
+
+
+def _str(value: object) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return str(value)
+    msg = f"expected a string, got {type(value).__name__}"
+    raise _CoercionError(msg)
+
+
+def _int(value: object) -> int:
+    if isinstance(value, bool):
+        msg = "expected an integer, got a boolean"
+        raise _CoercionError(msg)
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            pass
+    msg = f"expected an integer, got {value!r}"
+    raise _CoercionError(msg)
+
+
+def _float(value: object) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.strip())
+        except ValueError:
+            pass
+    msg = f"expected a number, got {value!r}"
+    raise _CoercionError(msg)
+
+
+def _bool(value: object) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in _TRUE_STRINGS | _FALSE_STRINGS:
+        return value.strip().lower() in _TRUE_STRINGS
+    if isinstance(value, (int, float)) and value in (0, 1):
+        return bool(value)
+    msg = f"expected a boolean, got {value!r}"
+    raise _CoercionError(msg)
+
+
+def _dict(value: object) -> object:
+    if isinstance(value, str) and value.lstrip().startswith("{"):
+        with contextlib.suppress(json.JSONDecodeError):
+            value = json.loads(value)
+    if isinstance(value, dict):
+        return value  # pyright: ignore[reportUnknownVariableType]
+    msg = f"expected an object, got {type(value).__name__}"
+    raise _CoercionError(msg)
+
+
+def _list_of(item: Coercer) -> Coercer:
+    def coerce(value: object) -> list[object]:
+        if isinstance(value, str):
+            # a JSON encoded list, or a single value the model forgot to wrap
+            if value.lstrip().startswith("["):
+                try:
+                    value = json.loads(value)
+                except json.JSONDecodeError:
+                    value = [value]
+            else:
+                value = [value]
+        if isinstance(value, tuple):
+            value = list(value)  # pyright: ignore[reportUnknownArgumentType]
+        if not isinstance(value, list):
+            value = [value]
+        result: list[object] = []
+        for index, element in enumerate(value):  # pyright: ignore[reportUnknownVariableType, reportUnknownArgumentType]
+            try:
+                result.append(item(element))
+            except _CoercionError as e:
+                msg = f"item {index}: {e}"
+                raise _CoercionError(msg) from e
+        return result
+
+    return coerce
+
+
+def _optional(inner: Coercer) -> Coercer:
+    def coerce(value: object) -> object:
+        return None if value is None else inner(value)
+
+    return coerce
+
+
+def _first_of(members: list[tuple[object, Coercer]]) -> Coercer:
+    def coerce(value: object) -> object:
+        # a member the value already is wins, so 5 stays 5 for str | int; only then try coercing in order
+        for annotation, coercer in members:
+            if _matches(annotation, value):
+                return coercer(value)
+        errors: list[str] = []
+        for _, coercer in members:
+            try:
+                return coercer(value)
+            except _CoercionError as e:
+                errors.append(str(e))
+        raise _CoercionError("; ".join(errors))
+
+    return coerce
+
+
+def _matches(annotation: object, value: object) -> bool:
+    """Whether a value already has the type of an annotation, without any coercion."""
+    origin = get_origin(annotation)
+    if origin is Literal:
+        return any(type(value) is type(choice) and value == choice for choice in get_args(annotation))
+    expected = origin or annotation
+    if expected is float:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if expected is int:
+        return isinstance(value, int) and not isinstance(value, bool)
+    return isinstance(expected, type) and isinstance(value, expected)
+
+
+def _literal(choices: tuple[object, ...]) -> Coercer:
+    # e.g. "1" for Literal[1, 2]: coerce to the type of each choice before giving up
+    coercers = [(choice, _compile_coercer(type(choice))) for choice in choices]
+
+    def coerce(value: object) -> object:
+        for choice in choices:
+            if type(value) is type(choice) and value == choice:
+                return choice
+        for choice, coercer in coercers:
+            with contextlib.suppress(_CoercionError):
+                if coercer(value) == choice:
+                    return choice
+        msg = f"expected one of {list(choices)!r}, got {value!r}"
+        raise _CoercionError(msg)
+
+    return coerce
+
+
+def _enum(enum_type: type[enum.Enum]) -> Coercer:
+    def coerce(value: object) -> object:
+        if isinstance(value, enum_type):
+            return value
+        for member in enum_type:
+            if value in (member.value, str(member.value), member.name):
+                return member
+        msg = f"expected one of {[member.value for member in enum_type]!r}, got {value!r}"
+        raise _CoercionError(msg)
+
+    return coerce
@@ -0,0 +1,334 @@
+"""Incrementally maintained snapshot of a working directory.
+
+The snapshot keeps every entry of the tree in memory with its stat data and a numbered change log.
+On Linux it is kept current with inotify, so a refresh only re-stats the paths that were touched;
+elsewhere, or if inotify is unavailable or its queue overflows, a refresh rescans the tree and diffs it.
+Callers ask for the changes since a token instead of listing the tree again.
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import secrets
+import struct
+import sys
+import threading
+from collections import deque
+from pathlib import Path
+from stat import S_ISDIR
+from typing import NamedTuple
+
+from ai_agent.constants import WORKSPACE_CHANGE_LOG_SIZE, WORKSPACE_IGNORED_NAMES
+
+logger = logging.getLogger(__name__)
+
+# inotify(7) event masks
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class Entry(NamedTuple):
+    """Stat data kept for one path of the workspace."""
+
+    size: int
+    mtime_ns: int
+    is_dir: bool
+
+
+class Change(NamedTuple):
+    """One entry of the change log."""
+
+    generation: int
+    kind: str
+    path: str
+
+
+class WorkspaceDelta(NamedTuple):
+    """Changes between a token and the current state of the workspace.
+
+    Attributes:
+        token: Token for the current state, to pass to the next call.
+        created: Paths created since the token.
+        modified: Paths whose size or modification time changed since the token.
+        deleted: Paths deleted since the token.
+    """
+
+    token: str
+    created: list[str]
+    modified: list[str]
+    deleted: list[str]
+
+
+class _Inotify:
+    """Minimal ctypes binding to the Linux inotify API."""
+
+    def __init__(self) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        fd: int = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.fd: int = fd
+        self.watches: dict[int, str] = {}
+
+    def add_watch(self, path: Path, relative: str) -> None:
+        wd: int = self._add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        self.watches[wd] = relative
+
+    def forget(self, relative: str) -> None:
+        """Stops watching a directory and every directory below it, e.g. because it was moved."""
+        prefix = relative + "/"
+        for wd, directory in list(self.watches.items()):
+            if directory == relative or directory.startswith(prefix):
+                _ = self._rm_watch(self.fd, wd)
+                del self.watches[wd]
+
+    def read_events(self) -> list[tuple[str, int, str]]:
+        """Drains pending events as (watched directory, mask, name) tuples."""
+        events: list[tuple[str, int, str]] = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+                offset += length
+                if mask & IN_IGNORED:
+                    _ = self.watches.pop(wd, None)
+                    continue
+                directory = self.watches.get(wd)
+                if directory is not None or mask & IN_Q_OVERFLOW:
+                    events.append((directory or "", mask, name))
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class WorkspaceSnapshot:
+    """In-memory tree of a working directory with a change log addressed by tokens.
+
+    Attributes:
+        root (Path): Resolved root of the workspace.
+        entries (dict[str, Entry]): Stat data per path, relative to the root, with "/" separators.
+        generation (int): Number of the latest change.
+    """
+
+    def __init__(self, root: str | Path, use_inotify: bool = True) -> None:
+        """Scans the tree once and starts watching it.
+
+        Args:
+            root: Directory to track.
+            use_inotify: Set to False to always refresh by polling.
+        """
+        self.root: Path = Path(root).resolve(strict=True)
+        self.entries: dict[str, Entry] = {}
+        self.generation: int = 0
+        self._id: str = secrets.token_hex(4)
+        self._changes: deque[Change] = deque(maxlen=WORKSPACE_CHANGE_LOG_SIZE)
+        self._lock: threading.Lock = threading.Lock()
+        self._inotify: _Inotify | None = None
+        if use_inotify and sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError) as e:
+                logger.info("inotify unavailable, falling back to polling: %s", e)
+        for relative, entry in self._scan(""):
+            self.entries[relative] = entry
+
+    @property
+    def watching(self) -> bool:
+        """Whether changes are tracked with inotify rather than by polling."""
+        return self._inotify is not None
+
+    @property
+    def token(self) -> str:
+        """Token for the current state."""
+        return f"{self._id}:{self.generation}"
+
+    def refresh(self) -> None:
+        """Brings the snapshot up to date with the file system."""
+        with self._lock:
+            if self._inotify is None:
+                self._poll()
+                return
+            events = self._inotify.read_events()
+            if any(mask & IN_Q_OVERFLOW for _, mask, _ in events):
+                logger.info("inotify queue overflowed, rescanning workspace")
+                self._poll()
+                return
+            dirty: dict[str, int] = {}
+            for directory, mask, name in events:
+                if name not in WORKSPACE_IGNORED_NAMES and not WORKSPACE_IGNORED_NAMES.intersection(
+                    directory.split("/")
+                ):
+                    relative = self._join(directory, name)
+                    dirty[relative] = dirty.get(relative, 0) | mask
+            for relative in sorted(dirty):
+                if dirty[relative] & IN_ISDIR and dirty[relative] & (IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE):
+                    # the watches of a moved directory still map to its old path, and a directory deleted and
+                    # created again has lost its watch: drop the old tree, and the restat below scans and
+                    # watches it again as it is now
+                    self._inotify.forget(relative)
+                    self._remove_tree(relative)
+            for relative in sorted(dirty):
+                self._restat(relative)
+
+    def changes_since(self, token: str) -> WorkspaceDelta | None:
+        """Lists what changed since a token, after refreshing the snapshot.
+
+        A path changed several times is reported once, by its net change.
+
+        Args:
+            token: Token from an earlier call.
+
+        Returns:
+            WorkspaceDelta | None: The changes, or None if the token is unknown or too old to answer from the log.
+        """
+        self.refresh()
+        snapshot_id, _, generation_text = token.partition(":")
+        if snapshot_id != self._id or not generation_text.isdigit():
+            return None
+        since = int(generation_text)
+        with self._lock:
+            if since > self.generation or (self._changes and since < self._changes[0].generation - 1):
+                return None
+            existed_before: dict[str, bool] = {}
+            for change in self._changes:
+                if change.generation > since and change.path not in existed_before:
+                    existed_before[change.path] = change.kind != "created"
+            created: list[str] = []
+            modified: list[str] = []
+            deleted: list[str] = []
+            for path, existed in existed_before.items():
+                exists = path in self.entries
+                if exists and not existed:
+                    created.append(path)
+                elif exists:
+                    modified.append(path)
+                elif existed:
+                    deleted.append(path)
+            return WorkspaceDelta(self.token, sorted(created), sorted(modified), sorted(deleted))
+
+    def close(self) -> None:
+        """Stops watching the tree."""
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _poll(self) -> None:
+        current = dict(self._scan(""))
+        for relative in self.entries.keys() - current.keys():
+            self._record("deleted", relative)
+            del self.entries[relative]
+        for relative, entry in current.items():
+            previous = self.entries.get(relative)
+            if previous != entry:
+                self._record("created" if previous is None else "modified", relative)
+                self.entries[relative] = entry
+
+    def _restat(self, relative: str) -> None:
+        path = self.root / relative
+        try:
+            stat = path.lstat()
+        except OSError:
+            self._remove_tree(relative)
+            return
+        # not path.is_dir(), which follows symlinks; like _scan, a symlink to a directory is not walked
+        entry = Entry(stat.st_size, stat.st_mtime_ns, S_ISDIR(stat.st_mode))
+        previous = self.entries.get(relative)
+        if previous == entry:
+            return
+        self.entries[relative] = entry
+        self._record("created" if previous is None else "modified", relative)
+        if entry.is_dir and previous is None:
+            # a new directory: watch it and pick up whatever was created in it before the watch existed
+            for child, child_entry in self._scan(relative):
+                if self.entries.get(child) != child_entry:
+                    self._record("created" if child not in self.entries else "modified", child)
+                    self.entries[child] = child_entry
+
+    def _remove_tree(self, relative: str) -> None:
+        prefix = relative + "/"
+        for path in [p for p in self.entries if p == relative or p.startswith(prefix)]:
+            del self.entries[path]
+            self._record("deleted", path)
+
+    def _scan(self, relative: str) -> list[tuple[str, Entry]]:
+        found: list[tuple[str, Entry]] = []
+        stack = [relative]
+        while stack:
+            current = stack.pop()
+            directory = self.root / current
+            if self._inotify is not None:
+                try:
+                    self._inotify.add_watch(directory, current)
+                except OSError as e:
+                    logger.warning("could not watch %s: %s", directory, e)
+            try:
+                with os.scandir(directory) as it:
+                    for dir_entry in it:
+                        if dir_entry.name in WORKSPACE_IGNORED_NAMES:
+                            continue
+                        child = self._join(current, dir_entry.name)
+                        try:
+                            stat = dir_entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        is_dir = dir_entry.is_dir(follow_symlinks=False)
+                        found.append((child, Entry(stat.st_size, stat.st_mtime_ns, is_dir)))
+                        if is_dir:
+                            stack.append(child)
+            except OSError as e:
+                logger.warning("could not scan %s: %s", directory, e)
+        return found
+
+    def _record(self, kind: str, relative: str) -> None:
+        self.generation += 1
+        self._changes.append(Change(self.generation, kind, relative))
+
+    @staticmethod
+    def _join(directory: str, name: str) -> str:
+        return f"{directory}/{name}" if directory and name else directory or name
+
+
+_SNAPSHOTS: dict[Path, WorkspaceSnapshot] = {}
+_SNAPSHOTS_LOCK = threading.Lock()
+
+
+def get_snapshot(working_directory: str) -> WorkspaceSnapshot:
+    """Returns the snapshot of a working directory, creating it on first use.
+
+    Args:
+        working_directory: The working directory to track.
+
+    Returns:
+        WorkspaceSnapshot: The shared snapshot for that directory.
+    """
+    root = Path(working_directory).resolve(strict=True)
+    with _SNAPSHOTS_LOCK:
+        snapshot = _SNAPSHOTS.get(root)
+        if snapshot is None:
+            snapshot = _SNAPSHOTS[root] = WorkspaceSnapshot(root)
+        return snapshot
@@ -10,6 +10,8 @@ from pathlib import Path
 
 import pytest
 
+from ai_agent import logging_config
+
 
 @pytest.fixture(scope="session", autouse=True)
 def configure_logging():
@@ -23,14 +25,15 @@ def configure_logging():
     project_root = Path(__file__).parent.parent
     log_file = project_root / "app.log"
 
-    logging.basicConfig(
-        level=logging.DEBUG,  # Set level to DEBUG to capture all messages
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        filename=str(log_file),  # Use the absolute path
-        filemode="a",  # Append to the log file for each test run
+    _ = logging_config.configure_logging(
+        filename=log_file,  # Use the absolute path
+        level="DEBUG",  # Set level to DEBUG to capture all messages
     )
 
     logger = logging.getLogger(__name__)
 
     # Optional: Add a log message to indicate the start of a test session
     logger.info("=" * 20 + " TEST SESSION STARTED " + "=" * 20)  # noqa: G003
+    yield
+    # Flush the queued records before the session ends
+    logging_config.shutdown_logging()
@@ -0,0 +1,53 @@
+"""Offline stand-in for the genai client, replaying scripted responses."""
+
+from typing import Any
+
+from google.genai import types
+
+
+def usage(prompt: int = 100, candidates: int = 10, cached: int = 0) -> types.GenerateContentResponseUsageMetadata:
+    """Usage metadata for a scripted response."""
+    return types.GenerateContentResponseUsageMetadata(
+        prompt_token_count=prompt, candidates_token_count=candidates, cached_content_token_count=cached
+    )
+
+
+def text_response(text: str, prompt: int = 100, candidates: int = 10) -> types.GenerateContentResponse:
+    """A final answer from the model."""
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part(text=text)]))],
+        usage_metadata=usage(prompt, candidates),
+    )
+
+
+def call_response(
+    calls: list[tuple[str, dict[str, Any]]], prompt: int = 100, candidates: int = 10
+) -> types.GenerateContentResponse:
+    """A model turn that asks for one or more function calls."""
+    parts = [types.Part(function_call=types.FunctionCall(name=name, args=args)) for name, args in calls]
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=parts))],
+        usage_metadata=usage(prompt, candidates),
+    )
+
+
+class FakeModels:
+    """Replays scripted responses and records every request."""
+
+    def __init__(self, responses: list[types.GenerateContentResponse]) -> None:
+        self.responses = list(responses)
+        self.requests: list[dict[str, Any]] = []
+
+    def generate_content(self, **kwargs: Any) -> types.GenerateContentResponse:
+        # snapshot the history, the agent keeps appending to the same list
+        self.requests.append({**kwargs, "contents": list(kwargs.get("contents", []))})
+        if not self.responses:
+            return text_response("out of script")
+        return self.responses.pop(0)
+
+
+class FakeClient:
+    """Drop-in for genai.Client in tests."""
+
+    def __init__(self, responses: list[types.GenerateContentResponse]) -> None:
+        self.models = FakeModels(responses)
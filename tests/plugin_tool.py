@@ -0,0 +1,15 @@
+"""Stand-in for a third-party plugin tool, registered through a patched entry point in test_plugins."""
+
+
+def shout(working_directory: str, text: str, times: int = 1) -> str:  # noqa: ARG001
+    """Repeats text in upper case.
+
+    Args:
+        working_directory: Unused, injected for every tool.
+        text: The text to shout.
+        times: How many times to repeat it.
+
+    Returns:
+        str: The shouted text.
+    """
+    return " ".join([text.upper()] * times)
@@ -0,0 +1,35 @@
+import unittest
+
+from ai_agent.functions.calculate import calculate
+
+from .utils import WORKING_DIR
+
+
+class TestCalculate(unittest.TestCase):
+    """Test suite for the in-process calculate tool."""
+
+    def test_batch(self) -> None:
+        """Test that several expressions are evaluated in one call."""
+        result = calculate(str(WORKING_DIR), ["3 + 5", "2 * 3 - 8 / 2 + 5", "10 / 4"])
+        self.assertEqual(result, "3 + 5 = 8\n2 * 3 - 8 / 2 + 5 = 7\n10 / 4 = 2.5")
+
+    def test_single_string(self) -> None:
+        """Test that a bare string is treated as one expression."""
+        result = calculate(str(WORKING_DIR), "3 * 4")  # pyright: ignore[reportArgumentType]
+        self.assertEqual(result, "3 * 4 = 12")
+
+    def test_errors_do_not_abort(self) -> None:
+        """Test that a bad expression reports an error and the rest still evaluate."""
+        result = calculate(str(WORKING_DIR), ["1 / 0", "$ 3 5", "1 + 1"])
+        lines = result.splitlines()
+        self.assertIn("Error:", lines[0])
+        self.assertIn("Error:", lines[1])
+        self.assertEqual(lines[2], "1 + 1 = 2")
+
+    def test_empty(self) -> None:
+        """Test that an empty list is an error."""
+        self.assertTrue(calculate(str(WORKING_DIR), []).startswith("Error:"))
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
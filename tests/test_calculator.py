@@ -1,6 +1,8 @@
 # tests.py
 
 import unittest
+from decimal import Decimal
+from fractions import Fraction
 from typing import final, override
 
 from ai_agent.calculator.pkg.calculator import Calculator
@@ -50,6 +52,31 @@ class TestCalculator(unittest.TestCase):
         with self.assertRaises(ValueError):
             _ = self.calculator.evaluate("+ 3")
 
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            _ = Calculator("complex")
+
+    def test_fraction_mode_is_exact(self):
+        result = Calculator("fraction").evaluate("1 / 3 * 3 - 1")
+        self.assertEqual(result, Fraction(0))
+
+    def test_decimal_mode_is_exact(self):
+        result = Calculator("decimal").evaluate("0.1 + 0.2")
+        self.assertEqual(result, Decimal("0.3"))
+
+    def test_chunks_split_tokens(self):
+        result = self.calculator.evaluate_chunks(["1", "2 + 3", "0 * ", "2"])
+        self.assertEqual(result, 72)
+
+    def test_empty_chunks(self):
+        result = self.calculator.evaluate_chunks(["", "   "])
+        self.assertIsNone(result)
+
+    def test_long_expression(self):
+        expression = " + ".join(["1"] * 200_000)
+        result = self.calculator.evaluate(expression)
+        self.assertEqual(result, 200_000)
+
 
 if __name__ == "__main__":
     _ = unittest.main()
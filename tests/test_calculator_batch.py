@@ -0,0 +1,54 @@
+import io
+import json
+import unittest
+from contextlib import redirect_stderr
+from unittest.mock import patch
+
+from ai_agent.calculator.calc import main
+from ai_agent.calculator.pkg.batch import evaluate_stream, format_batch_result
+
+
+class TestCalculatorBatch(unittest.TestCase):
+    """Test suite for streaming batch evaluation."""
+
+    LINES = ["3 + 5\n", "\n", "1 / 0\n", "2 * 3 - 1\n", "foo\n"]
+
+    def test_results_in_order_with_errors(self) -> None:
+        """Errors are reported per line and never abort the batch."""
+        results = list(evaluate_stream(self.LINES, workers=1))
+        self.assertEqual([r.line_number for r in results], [1, 3, 4, 5])
+        self.assertEqual(results[0].result, 8)
+        self.assertIsNotNone(results[1].error)
+        self.assertEqual(results[2].result, 5)
+        self.assertIn("invalid token", results[3].error or "")
+
+    def test_process_pool_preserves_order(self) -> None:
+        """Results come back in input order when evaluated across processes."""
+        lines = [f"{i} * 2" for i in range(500)]
+        results = list(evaluate_stream(lines, workers=2, chunk_size=7))
+        self.assertEqual([r.result for r in results], [i * 2 for i in range(500)])
+
+    def test_formats(self) -> None:
+        """Each output format produces one record per result."""
+        result = next(evaluate_stream(["3 + 5"], workers=1))
+        self.assertEqual(format_batch_result(result, "csv"), "1,3 + 5,8,")
+        self.assertEqual(json.loads(format_batch_result(result, "jsonl"))["result"], 8)
+        self.assertIn("8", format_batch_result(result, "render"))
+
+    def test_counts_below_one_are_rejected(self) -> None:
+        """A chunk size or worker count below 1 is a usage error, not an empty or crashing run."""
+        for option, value in (("--chunk-size", "0"), ("--chunk-size", "-3"), ("-j", "0"), ("-j", "x")):
+            with self.subTest(option=option, value=value):
+                err = io.StringIO()
+                with (
+                    patch("sys.argv", ["calc.py", "--file", "-", option, value]),
+                    redirect_stderr(err),
+                    self.assertRaises(SystemExit) as context,
+                ):
+                    main()
+                self.assertEqual(context.exception.code, 2)
+                self.assertIn("at least 1", err.getvalue())
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
@@ -0,0 +1,109 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from ai_agent.checkpoints import CheckpointJournal
+from ai_agent.exceptions import CheckpointNotFoundError
+from ai_agent.functions.rollback_workspace import rollback_workspace
+from ai_agent.functions.write_file import write_file
+from ai_agent.functions.write_files import write_files
+
+
+class TestCheckpoints(unittest.TestCase):
+    """Test suite for workspace checkpoints and rollback."""
+
+    def setUp(self) -> None:
+        """Create a workspace with one file, and a journal for it in a separate state directory."""
+        self.workspace = Path(tempfile.mkdtemp()).resolve()
+        _ = (self.workspace / "notes.txt").write_text("original", encoding="utf-8")
+        self.journal = CheckpointJournal(self.workspace, state_directory=tempfile.mkdtemp())
+        patcher = patch("ai_agent.functions.write_file.get_journal", return_value=self.journal)
+        _ = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch("ai_agent.functions.write_files.get_journal", return_value=self.journal)
+        _ = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch("ai_agent.functions.rollback_workspace.get_journal", return_value=self.journal)
+        _ = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_rollback_modified_and_created_files(self) -> None:
+        """Test that rolling back restores an overwritten file and removes created files and directories."""
+        self.assertIn("Successfully", write_file(str(self.workspace), "notes.txt", "changed"))
+        self.assertIn("Successfully", write_file(str(self.workspace), "new/deep/file.txt", "hello"))
+        checkpoints = self.journal.checkpoints()
+        self.assertEqual([info.files for info in checkpoints], [["new/deep/file.txt"], ["notes.txt"]])
+
+        restored = self.journal.rollback(checkpoints[-1].checkpoint_id)
+        self.assertEqual(sorted(restored), ["new/deep/file.txt", "notes.txt"])
+        self.assertEqual((self.workspace / "notes.txt").read_text(encoding="utf-8"), "original")
+        self.assertFalse((self.workspace / "new").exists())
+        self.assertEqual(self.journal.checkpoints(), [])
+
+    def test_rollback_keeps_older_changes(self) -> None:
+        """Test that rolling back to a checkpoint leaves the writes before it in place."""
+        _ = write_file(str(self.workspace), "notes.txt", "first")
+        _ = write_file(str(self.workspace), "notes.txt", "second")
+        newest = self.journal.checkpoints()[0]
+        _ = self.journal.rollback(newest.checkpoint_id)
+        self.assertEqual((self.workspace / "notes.txt").read_text(encoding="utf-8"), "first")
+        self.assertEqual(len(self.journal.checkpoints()), 1)
+
+    def test_created_directory_with_other_files_kept(self) -> None:
+        """Test that a created directory is kept if something else was put in it since."""
+        _ = write_file(str(self.workspace), "new/file.txt", "hello")
+        _ = (self.workspace / "new" / "other.txt").write_text("kept", encoding="utf-8")
+        _ = self.journal.rollback(self.journal.checkpoints()[0].checkpoint_id)
+        self.assertFalse((self.workspace / "new" / "file.txt").exists())
+        self.assertTrue((self.workspace / "new" / "other.txt").exists())
+
+    def test_failed_write_leaves_no_checkpoint(self) -> None:
+        """Test that a write that fails does not leave a checkpoint to roll back."""
+        # the checkpoint is taken, then creating the parent directory fails because it is a file
+        result = write_file(str(self.workspace), "notes.txt/child.txt", "changed")
+        self.assertTrue(result.startswith("Error:"), result)
+        self.assertEqual(self.journal.checkpoints(), [])
+
+    def test_batch_write_is_one_checkpoint(self) -> None:
+        """Test that write_files takes one checkpoint for all of its files."""
+        result = write_files(str(self.workspace), ["notes.txt", "b.txt"], ["one", "two"])
+        self.assertIn("Successfully", result)
+        (info,) = self.journal.checkpoints()
+        self.assertEqual(info.files, ["notes.txt", "b.txt"])
+        _ = self.journal.rollback(info.checkpoint_id)
+        self.assertEqual((self.workspace / "notes.txt").read_text(encoding="utf-8"), "original")
+        self.assertFalse((self.workspace / "b.txt").exists())
+
+    def test_pruning(self) -> None:
+        """Test that old checkpoints are pruned by count and by size, keeping the newest."""
+        self.journal.keep = 3
+        for index in range(5):
+            _ = write_file(str(self.workspace), "notes.txt", str(index))
+        self.assertEqual(len(self.journal.checkpoints()), 3)
+
+        self.journal.max_bytes = 0
+        _ = write_file(str(self.workspace), "notes.txt", "last")
+        (info,) = self.journal.checkpoints()
+        _ = self.journal.rollback(info.checkpoint_id)
+        self.assertEqual((self.workspace / "notes.txt").read_text(encoding="utf-8"), "4")
+
+    def test_unknown_checkpoint(self) -> None:
+        """Test that rolling back to a checkpoint that does not exist fails."""
+        with self.assertRaises(CheckpointNotFoundError):
+            _ = self.journal.rollback("missing")
+        self.assertIn("Error: No checkpoint 'missing'", rollback_workspace(str(self.workspace), "missing"))
+
+    def test_rollback_tool(self) -> None:
+        """Test that the tool lists checkpoints and rolls back to one."""
+        self.assertEqual(rollback_workspace(str(self.workspace)), "No checkpoints.")
+        _ = write_file(str(self.workspace), "notes.txt", "changed")
+        listing = rollback_workspace(str(self.workspace))
+        self.assertIn("before write_file notes.txt", listing)
+        result = rollback_workspace(str(self.workspace), listing.split()[0])
+        self.assertIn("restored 1 files: notes.txt", result)
+        self.assertEqual((self.workspace / "notes.txt").read_text(encoding="utf-8"), "original")
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
@@ -0,0 +1,93 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+from typing import cast
+from unittest.mock import patch
+
+from google import genai
+
+from ai_agent.agent import CURRENT_SESSION, SessionContext, run_agent, run_session
+from ai_agent.dispatch import CURRENT_CANCELLATION, CancellationToken
+from ai_agent.exceptions import DelegationError, ToolCancelledError
+from ai_agent.functions.delegate import delegate
+from ai_agent.subagents import run_subagents
+from ai_agent.usage import UsageLedger
+
+from .fakes import FakeClient, call_response, text_response, usage
+from .utils import WORKING_DIR
+
+
+class TestDelegate(unittest.TestCase):
+    """Test suite for parallel sub-agents."""
+
+    def test_outside_session(self) -> None:
+        """Test that delegate refuses to run without a parent session."""
+        result = delegate(str(WORKING_DIR), ["anything"])
+        self.assertTrue(result.startswith("Error:"))
+
+    def test_children_answers_merged(self) -> None:
+        """Test that child answers come back as one tool result and their usage is counted."""
+        client = FakeClient(
+            [
+                call_response([("delegate", {"tasks": ["summarize a.py", "summarize b.py"]})], 100, 10),
+                text_response("child answer", 50, 5),
+                text_response("child answer", 50, 5),
+                text_response("both summarized", 300, 10),
+            ]
+        )
+        out = io.StringIO()
+        with redirect_stdout(out):
+            run_agent("summarize everything", verbose=True, client=cast("genai.Client", client))
+
+        last_request = client.models.requests[-1]["contents"]
+        tool_result = last_request[-1].parts[0].function_response.response["result"]
+        self.assertIn("## Task 1: summarize a.py\nchild answer", tool_result)
+        self.assertIn("## Task 2: summarize b.py\nchild answer", tool_result)
+        self.assertIn("both summarized", out.getvalue())
+        self.assertIn("calls=4", out.getvalue())
+
+    def test_children_cannot_delegate(self) -> None:
+        """Test that the delegate tool is not offered to sub-agents."""
+        client = FakeClient(
+            [
+                call_response([("delegate", {"tasks": ["one"]})]),
+                text_response("child answer"),
+                text_response("done"),
+            ]
+        )
+        with redirect_stdout(io.StringIO()):
+            run_agent("go", verbose=False, client=cast("genai.Client", client))
+        child_tools = client.models.requests[1]["config"].tools[0].function_declarations
+        self.assertNotIn("delegate", [d.name for d in child_tools])
+
+    def test_children_split_the_remaining_budget(self) -> None:
+        """Test that sub-agents get an even share of what is left of the parent's budget, and report back."""
+        parent = UsageLedger(max_tokens=10_000, max_cost=0)
+        parent.record("model", usage(1_500, 500), 0)
+        client = FakeClient([text_response("child answer", 50, 5)] * 2)
+        token = CURRENT_SESSION.set(SessionContext(cast("genai.Client", client), parent, 0, "parent"))
+        self.addCleanup(CURRENT_SESSION.reset, token)
+        with patch("ai_agent.subagents.run_session", wraps=run_session) as run_child:
+            answers = run_subagents(["one", "two"])
+        self.assertEqual(answers, ["child answer", "child answer"])
+        self.assertEqual([call.kwargs["ledger"].max_tokens for call in run_child.call_args_list], [4_000, 4_000])
+        self.assertEqual(parent.total_tokens, 2_000 + 2 * 55)
+
+        parent.record("model", usage(8_000, 0), 0)
+        with self.assertRaises(DelegationError):
+            _ = run_subagents(["three"])
+
+    def test_cancelled_session_stops(self) -> None:
+        """Test that a session running inside a cancelled tool call, like an abandoned sub-agent, stops."""
+        client = FakeClient([text_response("never sent")])
+        cancellation = CancellationToken(timeout=0)
+        cancellation.cancel("timed out")
+        token = CURRENT_CANCELLATION.set(cancellation)
+        self.addCleanup(CURRENT_CANCELLATION.reset, token)
+        with self.assertRaises(ToolCancelledError):
+            _ = run_session(cast("genai.Client", client), "task", verbose=False)
+        self.assertEqual(client.models.requests, [])
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
@@ -0,0 +1,138 @@
+import enum
+import unittest
+from typing import Any, Literal
+
+from google.genai import types
+
+from ai_agent.agent import AVAILABLE_FUNCTIONS, TOOL_VALIDATORS
+from ai_agent.discovery import generate_schema
+
+
+class Color(enum.Enum):
+    """Colors for the sample tool."""
+
+    RED = "red"
+    BLUE = "blue"
+
+
+def sample_tool(  # noqa: PLR0913, PLR0917
+    working_directory: str,
+    path: str,
+    args: list[Any] | None = None,
+    pair: tuple[int, int] = (0, 0),
+    level: Literal[1, 2, 3] = 1,
+    mode: Literal["fast", "slow"] = "fast",
+    color: Color = Color.RED,
+    names: list[str | int] | None = None,
+) -> str:
+    """Tool used only to build a schema.
+
+    Args:
+        working_directory: injected by the agent.
+        path: a path.
+        args: anything.
+        pair: two numbers.
+        level: how hard to try.
+        mode: how fast to go.
+        color: which color.
+        names: names or ids.
+
+    Returns:
+        str: nothing useful.
+    """
+    return f"{working_directory}{path}{args}{pair}{level}{mode}{color}{names}"
+
+
+SAMPLE_VALUES: dict[types.Type, object] = {
+    types.Type.STRING: "x",
+    types.Type.INTEGER: 1,
+    types.Type.NUMBER: 1.5,
+    types.Type.BOOLEAN: True,
+    types.Type.OBJECT: {},
+}
+
+
+def sample_value(schema: types.Schema) -> object:
+    """A value that matches a schema, the way a model following it would send one."""
+    if schema.enum:
+        return schema.enum[-1]
+    if schema.any_of:
+        return sample_value(schema.any_of[0])
+    if schema.type == types.Type.ARRAY:
+        assert schema.items is not None
+        return [sample_value(schema.items)] * (schema.min_items or 1)
+    assert schema.type is not None
+    return SAMPLE_VALUES[schema.type]
+
+
+class TestSchemas(unittest.TestCase):
+    """Test suite for parameter schemas generated from type annotations."""
+
+    def setUp(self) -> None:
+        """Generate the schema of the sample tool."""
+        (declaration,) = generate_schema({"sample_tool": sample_tool}, banned_args=["working_directory"])
+        assert declaration.parameters is not None
+        assert declaration.parameters.properties is not None
+        self.parameters = declaration.parameters
+        self.properties = declaration.parameters.properties
+
+    def test_required_and_banned(self) -> None:
+        """Test that only parameters without a default are required, and banned ones are left out."""
+        self.assertEqual(self.parameters.required, ["path"])
+        self.assertNotIn("working_directory", self.properties)
+
+    def test_optional_list_of_any(self) -> None:
+        """Test that an optional list of anything is a nullable array of scalar items."""
+        args = self.properties["args"]
+        self.assertEqual(args.type, types.Type.ARRAY)
+        self.assertTrue(args.nullable)
+        assert args.items is not None
+        assert args.items.any_of is not None
+        self.assertEqual(
+            [s.type for s in args.items.any_of], [types.Type.STRING, types.Type.NUMBER, types.Type.BOOLEAN]
+        )
+
+    def test_fixed_tuple_and_defaults(self) -> None:
+        """Test that a fixed-length tuple is an array of that length and defaults are kept."""
+        pair = self.properties["pair"]
+        self.assertEqual((pair.type, pair.min_items, pair.max_items), (types.Type.ARRAY, 2, 2))
+        assert pair.items is not None
+        self.assertEqual(pair.items.type, types.Type.INTEGER)
+        self.assertEqual(pair.default, (0, 0))
+
+    def test_choices(self) -> None:
+        """Test that Literal and Enum parameters list their values."""
+        self.assertEqual(self.properties["mode"].enum, ["fast", "slow"])
+        self.assertEqual(self.properties["color"].enum, ["red", "blue"])
+        self.assertEqual(self.properties["color"].default, "red")
+        level = self.properties["level"]
+        self.assertEqual(level.type, types.Type.INTEGER)
+        self.assertEqual(level.description, "how hard to try. (one of 1, 2, 3)")
+
+    def test_union_items(self) -> None:
+        """Test that a union becomes any_of."""
+        items = self.properties["names"].items
+        assert items is not None
+        assert items.any_of is not None
+        self.assertEqual([s.type for s in items.any_of], [types.Type.STRING, types.Type.INTEGER])
+
+    def test_cached(self) -> None:
+        """Test that a tool's declaration is computed once."""
+        first = generate_schema({"sample_tool": sample_tool}, banned_args=["working_directory"])
+        second = generate_schema({"sample_tool": sample_tool}, banned_args=["working_directory"])
+        self.assertIs(first[0], second[0])
+
+    def test_calls_following_the_schemas_validate(self) -> None:
+        """Test that a call shaped like any built-in tool's schema passes that tool's validator."""
+        for declaration in AVAILABLE_FUNCTIONS.function_declarations or []:
+            assert declaration.name is not None
+            assert declaration.parameters is not None
+            with self.subTest(tool=declaration.name):
+                args = {
+                    name: sample_value(schema) for name, schema in (declaration.parameters.properties or {}).items()
+                }
+                _ = TOOL_VALIDATORS[declaration.name](args)
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
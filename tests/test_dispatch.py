@@ -0,0 +1,107 @@
+import tempfile
+import threading
+import time
+import unittest
+from contextvars import ContextVar
+from pathlib import Path
+from unittest.mock import patch
+
+from google.genai import types
+
+from ai_agent.agent import DISCOVERED_TOOLS, call_function
+from ai_agent.dispatch import CURRENT_CANCELLATION, CancellationToken, ToolDispatcher, check_cancelled
+from ai_agent.exceptions import ToolTimeoutError
+from ai_agent.functions.write_file import write_file
+from ai_agent.functions.write_files import write_files
+
+REQUEST_ID: ContextVar[str] = ContextVar("REQUEST_ID", default="unset")
+
+
+def cooperative(working_directory: str, directory: str = ".") -> str:  # noqa: ARG001
+    """A tool that takes far too long but checks for cancellation."""
+    for _ in range(1000):
+        check_cancelled()
+        time.sleep(0.01)
+    return "finished"
+
+
+class TestToolDispatcher(unittest.TestCase):
+    """Test suite for running tools under deadlines."""
+
+    def setUp(self) -> None:
+        """Create a dispatcher with a short deadline for slow tools."""
+        self.dispatcher = ToolDispatcher(timeouts={"slow": 0.2}, default_timeout=5)
+
+    def test_result_and_errors_pass_through(self) -> None:
+        """Test that results and exceptions of a tool reach the caller."""
+        self.assertEqual(self.dispatcher.run("echo", lambda text: text, {"text": "hi"}), "hi")
+
+        def broken() -> str:
+            msg = "boom"
+            raise ValueError(msg)
+
+        with self.assertRaises(ValueError):
+            _ = self.dispatcher.run("broken", broken, {})
+        self.assertEqual(self.dispatcher.stats["echo"], {"calls": 1, "timeouts": 0, "cancelled": 0})
+
+    def test_timeout_cancels_cooperative_tool(self) -> None:
+        """Test that a slow tool times out, is told to stop, and is counted."""
+        start = time.monotonic()
+        with self.assertRaises(ToolTimeoutError) as context:
+            _ = self.dispatcher.run("slow", cooperative, {"working_directory": "."})
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(context.exception.timeout, 0.2)
+        self.assertEqual(self.dispatcher.stats["slow"]["timeouts"], 1)
+
+        for _ in range(100):
+            if not self.dispatcher.abandoned:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.dispatcher.abandoned, 0)
+        self.assertIn("slow=1/1/0", self.dispatcher.summary())
+
+    def test_write_tools_do_not_write_once_cancelled(self) -> None:
+        """Test that a write whose call already timed out leaves the files alone."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        root = Path(directory.name)
+        _ = (root / "a.txt").write_text("old")
+        cancelled = CancellationToken(0)
+        cancelled.cancel("write_file ran past its deadline")
+        token = CURRENT_CANCELLATION.set(cancelled)
+        try:
+            single = write_file(str(root), "a.txt", "new")
+            batch = write_files(str(root), ["a.txt", "b.txt"], ["new", "new"])
+        finally:
+            CURRENT_CANCELLATION.reset(token)
+        self.assertIn("cancelled", single)
+        self.assertTrue(batch.startswith("Error: nothing was written"), batch)
+        self.assertEqual((root / "a.txt").read_text(), "old")
+        self.assertEqual(sorted(path.name for path in root.iterdir()), ["a.txt"])
+
+    def test_tool_sees_callers_context(self) -> None:
+        """Test that context variables of the caller are visible on the worker thread."""
+        token = REQUEST_ID.set("request-7")
+        try:
+            seen = self.dispatcher.run("probe", lambda: f"{REQUEST_ID.get()} {threading.current_thread().name}", {})
+        finally:
+            REQUEST_ID.reset(token)
+        self.assertEqual(seen, "request-7 tool-probe")
+
+    def test_call_function_reports_timeout(self) -> None:
+        """Test that the model gets a structured error when a tool times out."""
+        dispatcher = ToolDispatcher(timeouts={"get_files_info": 0.1})
+        with (
+            patch.dict(DISCOVERED_TOOLS, {"get_files_info": cooperative}),
+            patch("ai_agent.agent.DISPATCHER", dispatcher),
+        ):
+            content = call_function(types.FunctionCall(name="get_files_info", args={"directory": "."}))
+        response = content.parts[0].function_response.response  # pyright: ignore[reportOptionalSubscript, reportOptionalMemberAccess]
+        self.assertTrue(response["timed_out"])  # pyright: ignore[reportOptionalSubscript]
+        self.assertEqual(response["timeout_seconds"], 0.1)  # pyright: ignore[reportOptionalSubscript]
+        self.assertIn("get_files_info did not finish", response["error"])  # pyright: ignore[reportOptionalSubscript]
+        self.assertIn("hint", response)  # pyright: ignore[reportOperatorIssue]
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
@@ -0,0 +1,103 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from ai_agent.constants import NO_CACHE_MARKER
+from ai_agent.exec_cache import ExecutionCache
+from ai_agent.functions.run_python_file import run_python_file
+
+CACHED_NOTE = "cached result"
+
+
+class TestExecutionCache(unittest.TestCase):
+    """Test suite for the run_python_file execution cache."""
+
+    def setUp(self) -> None:
+        """Create a working directory with a script, a local module and a data file, and a fresh cache."""
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name) / "work"
+        self.root.mkdir()
+        _ = (self.root / "helper.py").write_text("GREETING = 'hello'\n")
+        _ = (self.root / "data.txt").write_text("world\n")
+        _ = (self.root / "main.py").write_text(
+            "import pathlib, sys\nfrom helper import GREETING\n"
+            "data = (pathlib.Path(__file__).parent / 'data.txt').read_text().strip()\n"
+            "print(GREETING, data, *sys.argv[1:])\n"
+        )
+        self.cache = ExecutionCache(Path(self._tmp.name) / "cache")
+        patcher = patch("ai_agent.functions.run_python_file.EXEC_CACHE", self.cache)
+        _ = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        """Remove the scratch directories."""
+        self._tmp.cleanup()
+
+    def run_main(self, *args: str, no_cache: bool = False) -> str:
+        """Run main.py through the tool."""
+        return run_python_file(str(self.root), "main.py", list(args), no_cache=no_cache)
+
+    def test_hit_and_invalidation(self) -> None:
+        """Test that a rerun is served from the cache until the script, a module or a data file changes."""
+        first = self.run_main("x")
+        self.assertIn("hello world x", first)
+        self.assertNotIn(CACHED_NOTE, first)
+        self.assertIn(CACHED_NOTE, self.run_main("x"))
+        self.assertNotIn(CACHED_NOTE, self.run_main("y"))
+
+        _ = (self.root / "helper.py").write_text("GREETING = 'hi'\n")
+        self.assertIn("hi world x", self.run_main("x"))
+        _ = (self.root / "data.txt").write_text("there\n")
+        self.assertIn("hi there x", self.run_main("x"))
+        self.assertEqual(self.cache.stats["hits"], 1)
+
+    def test_bypass(self) -> None:
+        """Test that no_cache forces a fresh run."""
+        _ = self.run_main()
+        self.assertNotIn(CACHED_NOTE, self.run_main(no_cache=True))
+
+    def test_side_effects_and_marker_are_not_cached(self) -> None:
+        """Test that runs writing files, and files with the opt-out marker, are never cached."""
+        _ = (self.root / "main.py").write_text("open(__file__ + '.out', 'w').write('x')\nprint('wrote')\n")
+        _ = self.run_main()
+        self.assertNotIn(CACHED_NOTE, self.run_main())
+
+        _ = (self.root / "main.py").write_text(f"{NO_CACHE_MARKER}\nprint('fresh')\n")
+        _ = self.run_main()
+        self.assertNotIn(CACHED_NOTE, self.run_main())
+        self.assertEqual(self.cache.stats["stored"], 0)
+
+    def test_directory_listing_invalidates(self) -> None:
+        """Test that a run that listed a directory is rerun once an entry is added to it, but not for imports."""
+        _ = (self.root / "main.py").write_text("import os\nprint(sorted(os.listdir(os.path.dirname(__file__))))\n")
+        (self.root / "sub").mkdir()
+        _ = self.run_main()
+        self.assertIn(CACHED_NOTE, self.run_main())
+        _ = (self.root / "sub" / "unrelated.txt").write_text("")
+        self.assertIn(CACHED_NOTE, self.run_main())
+        _ = (self.root / "new.txt").write_text("")
+        result = self.run_main()
+        self.assertNotIn(CACHED_NOTE, result)
+        self.assertIn("new.txt", result)
+
+    def test_existing_sitecustomize_still_runs(self) -> None:
+        """Test that the recording bootstrap does not hide a sitecustomize the environment already has."""
+        site = Path(self._tmp.name) / "site"
+        site.mkdir()
+        _ = (site / "sitecustomize.py").write_text("import builtins\nbuiltins.CUSTOMIZED = 'yes'\n")
+        _ = (self.root / "check.py").write_text("print(CUSTOMIZED)\n")
+        with patch.dict("os.environ", {"PYTHONPATH": str(site)}):
+            result = run_python_file(str(self.root), "check.py")
+        self.assertIn("STDOUT: yes", result)
+
+    def test_size_bound(self) -> None:
+        """Test that the cache is trimmed to its byte limit."""
+        self.cache.max_bytes = 1
+        _ = self.run_main("a")
+        self.assertEqual(list(self.cache.directory.glob("*.json")), [])
+        self.assertEqual(self.cache.stats["evicted"], 1)
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
@@ -1,4 +1,9 @@
+import bz2
+import gzip
+import lzma
+import tempfile
 import unittest
+from pathlib import Path
 
 from ai_agent.constants import FILE_CHAR_LIMIT
 from ai_agent.functions.get_file_content import get_file_content
@@ -44,6 +49,12 @@ class TestFileContent(unittest.TestCase):
             + r" characters \.\.\. \]",
         )
 
+    def test_offset(self) -> None:
+        """Test reading a file from a character offset."""
+        full = get_file_content(WORKING_DIR, "pkg/calculator.py")
+        result = get_file_content(WORKING_DIR, "pkg/calculator.py", offset=100)
+        self.assertEqual(result, full[100:])
+
     def test_prohibited_file(self) -> None:
         """Test for the out of bounds /bin/cat file."""
         result = get_file_content(WORKING_DIR, "/bin/cat")
@@ -57,5 +68,62 @@ class TestFileContent(unittest.TestCase):
         self.assertTrue(result.startswith("Error:"))
 
 
+class TestCompressedContent(unittest.TestCase):
+    """Test suite for reading compressed and binary files with get_file_content."""
+
+    def setUp(self) -> None:
+        """Create a working directory with a long log in every supported compression format."""
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.text = "".join(f"2024-01-01 request {index} ok\n" for index in range(FILE_CHAR_LIMIT))
+        _ = (self.root / "app.log.gz").write_bytes(gzip.compress(self.text.encode()))
+        _ = (self.root / "app.log.bz2").write_bytes(bz2.compress(self.text.encode()))
+        _ = (self.root / "app.log.xz").write_bytes(lzma.compress(self.text.encode()))
+
+    def tearDown(self) -> None:
+        """Remove the scratch directory."""
+        self._tmp.cleanup()
+
+    def test_compressed_files_are_decompressed(self) -> None:
+        """Test that gzip, bzip2 and xz files read like the text they contain, including offsets."""
+        for name in ("app.log.gz", "app.log.bz2", "app.log.xz"):
+            with self.subTest(name=name):
+                result = get_file_content(str(self.root), name)
+                self.assertTrue(result.startswith(self.text[:FILE_CHAR_LIMIT]))
+                self.assertIn(f"offset={FILE_CHAR_LIMIT}", result)
+                later = get_file_content(str(self.root), name, offset=500)
+                self.assertTrue(later.startswith(self.text[500 : 500 + FILE_CHAR_LIMIT]))
+
+    def test_only_the_needed_part_is_decompressed(self) -> None:
+        """Test that reading the start of an archive does not decompress the rest: a cut-off end goes unnoticed."""
+        archive = gzip.compress(self.text.encode() * 20)
+        _ = (self.root / "cut.gz").write_bytes(archive[: len(archive) // 2])
+        result = get_file_content(str(self.root), "cut.gz")
+        self.assertTrue(result.startswith(self.text[:FILE_CHAR_LIMIT]))
+
+    def test_binary_file_is_rejected(self) -> None:
+        """Test that binary content, compressed or not, is rejected with an error."""
+        _ = (self.root / "image.png").write_bytes(b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 100)
+        _ = (self.root / "blob.gz").write_bytes(gzip.compress(bytes(range(256)) * 100))
+        for name in ("image.png", "blob.gz"):
+            with self.subTest(name=name):
+                result = get_file_content(str(self.root), name)
+                self.assertTrue(result.startswith("Error:"))
+                self.assertIn("binary", result)
+
+    def test_text_starting_like_a_magic_is_read_as_text(self) -> None:
+        """Test that a text file is not mistaken for an archive because it starts with "BZh"."""
+        _ = (self.root / "notes.txt").write_text("BZh is how bzip2 files start\n", encoding="utf-8")
+        self.assertEqual(get_file_content(str(self.root), "notes.txt"), "BZh is how bzip2 files start\n")
+        _ = (self.root / "empty.bz2").write_bytes(bz2.compress(b""))
+        self.assertFalse(get_file_content(str(self.root), "empty.bz2").startswith("Error:"))
+
+    def test_corrupt_archive_is_an_error(self) -> None:
+        """Test that a truncated archive gives an error instead of raising."""
+        _ = (self.root / "cut.xz").write_bytes(lzma.compress(self.text.encode())[:100])
+        result = get_file_content(str(self.root), "cut.xz", offset=len(self.text) // 2)
+        self.assertTrue(result.startswith("Error:"))
+
+
 if __name__ == "__main__":
     _ = unittest.main()
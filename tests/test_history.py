@@ -0,0 +1,87 @@
+import unittest
+
+from google.genai import types
+
+from ai_agent.agent import run_session
+from ai_agent.history import COMPACTED_NOTE, PayloadStore, compact_history
+
+from .fakes import FakeClient, call_response, text_response
+
+
+def tool_message(*results: tuple[str, str]) -> types.Content:
+    """A tool message with one function response per (name, result) pair."""
+    parts = [types.Part.from_function_response(name=name, response={"result": result}) for name, result in results]
+    return types.Content(role="tool", parts=parts)
+
+
+def result_of(content: types.Content, index: int = 0) -> str:
+    """The result payload of one part of a tool message."""
+    response = content.parts[index].function_response  # pyright: ignore[reportOptionalSubscript]
+    return response.response["result"]  # pyright: ignore[reportOptionalMemberAccess, reportOptionalSubscript]
+
+
+class TestPayloadStore(unittest.TestCase):
+    """Test suite for deduplication of tool payloads in the history."""
+
+    def setUp(self) -> None:
+        """Start an empty history and store."""
+        self.messages: list[types.Content] = []
+        self.store = PayloadStore(min_chars=100)
+
+    def append(self, content: types.Content) -> types.Content:
+        """Dedupe a tool message and add it to the history."""
+        _ = self.store.dedupe(self.messages, content)
+        self.messages.append(content)
+        return content
+
+    def test_repeat_becomes_reference(self) -> None:
+        """Test that a repeated payload refers back to the first one, which is shared, not copied."""
+        first = self.append(tool_message(("get_file_content", "x" * 500)))
+        second = self.append(tool_message(("get_file_content", "x" * 500)))
+        self.assertEqual(result_of(first), "x" * 500)
+        self.assertIn("tool message #1", result_of(second))
+        self.assertGreater(self.store.saved_chars, 300)
+
+    def test_reference_names_original_tool(self) -> None:
+        """Test that the reference names the tool whose output is referred to, not the one that repeated it."""
+        _ = self.append(tool_message(("read_files", "x" * 500)))
+        second = self.append(tool_message(("get_file_content", "x" * 500)))
+        self.assertIn("result of read_files in tool message #1", result_of(second))
+
+    def test_small_and_different_payloads_kept(self) -> None:
+        """Test that short payloads and changed payloads are left alone."""
+        _ = self.append(tool_message(("a", "short"), ("b", "y" * 500)))
+        repeated = self.append(tool_message(("a", "short"), ("b", "y" * 499 + "z")))
+        self.assertEqual(result_of(repeated, 0), "short")
+        self.assertEqual(result_of(repeated, 1), "y" * 499 + "z")
+        self.assertEqual(self.store.saved_chars, 0)
+
+    def test_repeat_within_one_message(self) -> None:
+        """Test that two identical results of one turn are sent once."""
+        content = self.append(tool_message(("a", "z" * 500), ("a", "z" * 500)))
+        self.assertEqual(result_of(content, 0), "z" * 500)
+        self.assertIn("tool message #1", result_of(content, 1))
+
+    def test_compacted_original_is_not_referenced(self) -> None:
+        """Test that once the original is compacted away, the next copy is kept whole."""
+        _ = self.append(tool_message(("a", "q" * 500)))
+        _ = self.append(tool_message(("b", "other")))
+        _ = compact_history(self.messages)
+        self.assertEqual(result_of(self.messages[0]), COMPACTED_NOTE)
+        again = self.append(tool_message(("a", "q" * 500)))
+        self.assertEqual(result_of(again), "q" * 500)
+
+    def test_session_dedupes_rereads(self) -> None:
+        """Test that a session sends a re-read file once."""
+        read = ("get_file_content", {"file_path": "calc.py"})
+        client = FakeClient([call_response([read]), call_response([read]), text_response("done")])
+        self.assertEqual(run_session(client, "read it twice", verbose=False), "done")  # pyright: ignore[reportArgumentType]
+        last_request = client.models.requests[-1]["contents"]
+        results = [result_of(content) for content in last_request if content.role == "tool"]
+        self.assertEqual(len(results), 2)
+        self.assertIn("def main", results[0])
+        self.assertIn("identical to the result", results[1])
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
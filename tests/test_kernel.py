@@ -0,0 +1,105 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from ai_agent.functions.run_python_code import run_python_code
+from ai_agent.kernel import Kernel, get_kernel, shutdown_kernels
+from ai_agent.logging_config import SESSION_ID
+
+
+class TestKernel(unittest.TestCase):
+    """Test suite for the persistent python kernel."""
+
+    def setUp(self) -> None:
+        """Create a working directory with a local module, and a kernel in it."""
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        _ = (self.root / "helper.py").write_text("ANSWER = 42\n")
+        self.kernel = Kernel(self.root, memory_limit=512 * 1024 * 1024, output_limit=1000)
+
+    def tearDown(self) -> None:
+        """Stop the kernel and remove the scratch directory."""
+        self.kernel.shutdown()
+        shutdown_kernels()
+        self._tmp.cleanup()
+
+    def test_state_persists_between_snippets(self) -> None:
+        """Test that variables and imports survive between snippets, and the last expression is returned."""
+        first = self.kernel.execute("import helper\nx = helper.ANSWER\nprint('set')", timeout=10)
+        self.assertEqual(first.stdout, "set\n")
+        self.assertIsNone(first.value)
+        second = self.kernel.execute("x + 1", timeout=10)
+        self.assertEqual(second.value, "43")
+
+    def test_error_keeps_kernel(self) -> None:
+        """Test that an exception is reported without losing state."""
+        _ = self.kernel.execute("x = 1", timeout=10)
+        result = self.kernel.execute("1 / 0", timeout=10)
+        self.assertIn("ZeroDivisionError", result.error or "")
+        self.assertIsNone(result.restarted)
+        self.assertEqual(self.kernel.execute("x", timeout=10).value, "1")
+
+    def test_output_is_bounded(self) -> None:
+        """Test that output beyond the limit is dropped and counted."""
+        result = self.kernel.execute("print('a' * 5000)", timeout=10)
+        self.assertTrue(result.stdout.startswith("a" * 1000))
+        self.assertIn("4001 more characters", result.stdout)
+
+    def test_timeout_interrupts_without_losing_state(self) -> None:
+        """Test that a snippet past its timeout is interrupted and the kernel keeps its state."""
+        _ = self.kernel.execute("x = 'kept'", timeout=10)
+        start = time.monotonic()
+        result = self.kernel.execute("import time\nwhile True:\n    time.sleep(0.05)", timeout=0.5)
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertTrue(result.timed_out)
+        self.assertIn("KeyboardInterrupt", result.error or "")
+        self.assertIsNone(result.restarted)
+        self.assertEqual(self.kernel.execute("x", timeout=10).value, "'kept'")
+
+    def test_memory_cap_restarts_kernel(self) -> None:
+        """Test that exceeding the memory cap restarts the kernel and reports the lost state."""
+        _ = self.kernel.execute("x = 1", timeout=10)
+        result = self.kernel.execute("b = bytearray(1024 * 1024 * 1024)", timeout=10)
+        self.assertIn("MemoryError", result.error or "")
+        self.assertIsNotNone(result.restarted)
+        self.assertIn("NameError", self.kernel.execute("x", timeout=10).error or "")
+
+    def test_cpu_and_file_size_caps(self) -> None:
+        """Test that a write past the file size cap fails, and running past the CPU cap restarts the kernel."""
+        kernel = Kernel(self.root, cpu_limit=1, file_size_limit=1024)
+        self.addCleanup(kernel.shutdown)
+        result = kernel.execute("with open('big.bin', 'wb') as f:\n    f.write(b'x' * 100_000)", timeout=10)
+        self.assertIn("File too large", result.error or "")
+        self.assertIsNone(result.restarted)
+        self.assertLess((self.root / "big.bin").stat().st_size, 100_000)
+
+        result = kernel.execute("while True: pass", timeout=10)
+        self.assertFalse(result.timed_out)
+        self.assertIn("CPU time cap", result.restarted or "")
+        self.assertEqual(kernel.execute("1 + 1", timeout=10).value, "2")
+
+    def test_kernels_are_per_session(self) -> None:
+        """Test that each session gets its own kernel, and stopping one session leaves the other alone."""
+        token = SESSION_ID.set("first")
+        try:
+            first = get_kernel(str(self.root))
+            self.assertIs(get_kernel(str(self.root)), first)
+        finally:
+            SESSION_ID.reset(token)
+        second = get_kernel(str(self.root))
+        self.assertIsNot(first, second)
+        _ = first.execute("1", timeout=10)
+        _ = second.execute("1", timeout=10)
+
+        shutdown_kernels("first")
+        self.assertFalse(first.alive)
+        self.assertTrue(second.alive)
+
+    def test_tool_formats_result(self) -> None:
+        """Test the tool's output, and that restart discards state."""
+        self.assertEqual(run_python_code(str(self.root), "y = 2\ny * 3"), "Result: 6")
+        self.assertEqual(run_python_code(str(self.root), "print(y)"), "STDOUT: 2\n")
+        result = run_python_code(str(self.root), "y", restart=True)
+        self.assertIn("NameError", result)
+        self.assertEqual(run_python_code(str(self.root), "pass"), "No output produced")
@@ -0,0 +1,76 @@
+import json
+import logging
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from ai_agent.logging_config import configure_logging, log_context, shutdown_logging
+
+
+class TestLoggingConfig(unittest.TestCase):
+    """Test suite for the queue based logging setup."""
+
+    def setUp(self) -> None:
+        """Route a scratch logger to a scratch file."""
+        self._tmp = tempfile.TemporaryDirectory()
+        self.log_file = Path(self._tmp.name) / "test.log"
+        self.logger = logging.getLogger("ai_agent.tests.logging_config")
+        self.logger.propagate = False
+
+    def tearDown(self) -> None:
+        """Detach the scratch setup and restore the session wide one."""
+        shutdown_logging()
+        self.logger.propagate = True
+        self._tmp.cleanup()
+        project_root = Path(__file__).parent.parent
+        _ = configure_logging(filename=project_root / "app.log", level="DEBUG")
+
+    def read_records(self) -> list[dict[str, object]]:
+        """Flush the queue and parse the JSON lines written so far."""
+        shutdown_logging()
+        return [json.loads(line) for line in self.log_file.read_text().splitlines()]
+
+    def test_json_records_carry_context(self) -> None:
+        """Test that records are JSON with session and iteration ids, written off the calling thread."""
+        listener = configure_logging(self.log_file, level="DEBUG", fmt="json", logger=self.logger)
+        assert listener._thread is not None  # noqa: SLF001
+        self.assertNotEqual(listener._thread.ident, threading.get_ident())  # noqa: SLF001
+
+        with log_context("abc123", iteration=2):
+            self.logger.info("read %s characters", 42)
+        self.logger.debug("outside")
+
+        records = self.read_records()
+        self.assertEqual(records[0]["message"], "read 42 characters")
+        self.assertEqual((records[0]["session"], records[0]["iteration"]), ("abc123", 2))
+        self.assertEqual((records[1]["session"], records[1]["iteration"]), ("-", 0))
+
+    def test_exception_rendered_before_queueing(self) -> None:
+        """Test that tracebacks survive the trip through the queue."""
+        _ = configure_logging(self.log_file, fmt="json", logger=self.logger)
+        try:
+            _ = 1 / 0
+        except ZeroDivisionError:
+            self.logger.exception("boom")
+
+        (record,) = self.read_records()
+        self.assertIn("ZeroDivisionError", str(record["exception"]))
+
+    def test_rotation(self) -> None:
+        """Test that the file rotates at max_bytes."""
+        _ = configure_logging(self.log_file, fmt="text", max_bytes=200, backup_count=2, logger=self.logger)
+        for i in range(20):
+            self.logger.warning("line %d", i)
+        shutdown_logging()
+        self.assertTrue(Path(f"{self.log_file}.1").exists())
+        self.assertIn("[-:0] line 19", self.log_file.read_text())
+
+    def test_unknown_format(self) -> None:
+        """Test that an unknown format is rejected."""
+        with self.assertRaises(ValueError):
+            _ = configure_logging(self.log_file, fmt="xml", logger=self.logger)
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+
+from google.genai import types
+
+from ai_agent.agent import run_session
+from ai_agent.exceptions import LoopDetectedError
+from ai_agent.history import PayloadStore
+from ai_agent.loop_guard import REPEAT_NOTE, LoopGuard
+
+from .fakes import FakeClient, call_response, text_response
+
+
+def call(name: str, **args: str) -> types.FunctionCall:
+    """A function call as the model would send it."""
+    return types.FunctionCall(name=name, args=args)
+
+
+def tool_message(name: str, result: str) -> types.Content:
+    """A tool message with a single result."""
+    return types.Content(role="tool", parts=[types.Part.from_function_response(name=name, response={"result": result})])
+
+
+class TestLoopGuard(unittest.TestCase):
+    """Test suite for repeated call memory and loop detection."""
+
+    def setUp(self) -> None:
+        """Start a guard that warns once."""
+        self.guard = LoopGuard(min_repeats=3, max_period=3, max_warnings=1)
+
+    def turn(self, function_call: types.FunctionCall, result: str) -> types.Content:
+        """Record one call and its result as a whole turn, and check for a loop."""
+        self.guard.record(function_call, {"result": result})
+        message = tool_message(function_call.name or "", result)
+        self.guard.check(message)
+        return message
+
+    def test_read_only_repeat_is_recalled(self) -> None:
+        """Test that a repeated read-only call is answered from memory, with a note."""
+        listing = call("get_files_info", directory=".")
+        self.assertIsNone(self.guard.recall(listing))
+        self.guard.record(listing, {"result": "a.py"})
+        recalled = self.guard.recall(call("get_files_info", directory="."))
+        self.assertIsNotNone(recalled)
+        response = recalled.parts[0].function_response.response  # pyright: ignore[reportOptionalMemberAccess, reportOptionalSubscript]
+        self.assertEqual(response, {"result": "a.py", "note": REPEAT_NOTE})
+        self.assertIsNone(self.guard.recall(call("get_files_info", directory="pkg")))
+        self.assertEqual(self.guard.served, 1)
+
+    def test_recall_after_deduplication(self) -> None:
+        """Test that a recalled result is the real output, not the note that deduplication put in its place."""
+        payloads = PayloadStore(min_chars=1)
+        messages = [tool_message("read_files", "contents of a.py")]
+        _ = payloads.dedupe([], messages[0])
+        read = call("get_file_content", file_path="a.py")
+        message = tool_message("get_file_content", "contents of a.py")
+        self.guard.record(read, message.parts[0].function_response.response)  # pyright: ignore[reportOptionalMemberAccess, reportArgumentType]
+        _ = payloads.dedupe(messages, message)
+        self.assertNotEqual(message.parts[0].function_response.response["result"], "contents of a.py")  # pyright: ignore[reportOptionalMemberAccess, reportOptionalSubscript]
+        recalled = self.guard.recall(read)
+        self.assertIsNotNone(recalled)
+        self.assertEqual(recalled.parts[0].function_response.response["result"], "contents of a.py")  # pyright: ignore[reportOptionalMemberAccess, reportOptionalSubscript]
+
+    def test_failed_call_is_retried(self) -> None:
+        """Test that a read-only call that timed out runs again when retried, instead of repeating the error."""
+        read = call("get_file_content", file_path="big.log")
+        self.guard.record(read, {"error": "timed out", "timed_out": True, "hint": "retry"})
+        self.assertIsNone(self.guard.recall(read))
+        self.guard.record(read, {"result": "contents"})
+        self.assertIsNotNone(self.guard.recall(read))
+
+    def test_mutating_call_clears_memory(self) -> None:
+        """Test that a tool with side effects invalidates everything remembered."""
+        listing = call("get_files_info", directory=".")
+        self.guard.record(listing, {"result": "a.py"})
+        self.guard.record(call("write_file", file_path="b.py", content=""), {"result": "ok"})
+        self.assertIsNone(self.guard.recall(listing))
+        run = call("run_python_file", file_path="a.py")
+        self.guard.record(run, {"result": "out"})
+        self.assertIsNone(self.guard.recall(run))
+
+    def test_repeat_warns_then_stops(self) -> None:
+        """Test the escalation: a warning on the first loop, then a stop on the next."""
+        run = call("run_python_file", file_path="a.py")
+        _ = self.turn(run, "out")
+        _ = self.turn(run, "out")
+        warned = self.turn(run, "out")
+        response = warned.parts[0].function_response.response  # pyright: ignore[reportOptionalSubscript, reportOptionalMemberAccess]
+        self.assertIn("run_python_file", response["warning"])  # pyright: ignore[reportOptionalSubscript]
+        self.assertEqual(self.guard.warnings, 1)
+
+        _ = self.turn(run, "out")
+        _ = self.turn(run, "out")
+        with self.assertRaises(LoopDetectedError):
+            _ = self.turn(run, "out")
+
+    def test_cycle_of_two_calls(self) -> None:
+        """Test that alternating between two calls with unchanged results is a loop."""
+        first, second = call("get_file_content", file_path="a.py"), call("get_file_content", file_path="b.py")
+        for _ in range(2):
+            _ = self.turn(first, "a")
+            _ = self.turn(second, "b")
+        _ = self.turn(first, "a")
+        self.assertEqual(self.guard.warnings, 0)
+        _ = self.turn(second, "b")
+        self.assertEqual(self.guard.warnings, 1)
+
+    def test_changing_results_are_progress(self) -> None:
+        """Test that the same call giving new results each time is not a loop."""
+        run = call("run_python_file", file_path="poll.py")
+        for attempt in range(6):
+            _ = self.turn(run, f"attempt {attempt}")
+        self.assertEqual(self.guard.warnings, 0)
+
+    def test_session_stops_with_partial_answer(self) -> None:
+        """Test that a stuck session ends early with an answer written without tools."""
+        listing = ("get_files_info", {"directory": "."})
+        client = FakeClient([call_response([listing]) for _ in range(6)] + [text_response("partial answer")])
+        answer = run_session(client, "loop forever", verbose=False)  # pyright: ignore[reportArgumentType]
+        self.assertIn("partial answer", answer)
+        self.assertIn("Stopped early", answer)
+        requests = client.models.requests
+        self.assertEqual(len(requests), 7)
+        self.assertIsNone(requests[-1]["config"].tools)
+        tool_results = [content for content in requests[-1]["contents"] if content.role == "tool"]
+        recalled = tool_results[1].parts[0].function_response.response
+        self.assertEqual(recalled["note"], REPEAT_NOTE)
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+from ai_agent.output_budget import OutputBudget, truncate_output
+
+
+class TestOutputBudget(unittest.TestCase):
+    """Test suite for the tool output budget."""
+
+    def test_small_results_untouched(self) -> None:
+        """Test that results within budget are returned as is and counted."""
+        budget = OutputBudget(turn_limit=1_000, tool_limits={}, default_limit=500)
+        self.assertEqual(budget.apply("get_files_info", "x" * 300), "x" * 300)
+        self.assertEqual(budget.remaining, 700)
+
+    def test_per_tool_limit(self) -> None:
+        """Test that a per-tool limit truncates with a hint on how to get more."""
+        budget = OutputBudget(turn_limit=100_000, tool_limits={"get_file_content": 1_000}, default_limit=50_000)
+        text = "\n".join(f"line {i}" for i in range(2_000))
+        result = budget.apply("get_file_content", text)
+        print(result)
+        self.assertLess(len(result), 1_200)
+        self.assertTrue(result.startswith("line 0\n"))
+        self.assertTrue(result.endswith("line 1999"))
+        self.assertIn("offset", result)
+
+    def test_turn_budget_exhausted(self) -> None:
+        """Test that output is withheld once the turn budget is used up."""
+        budget = OutputBudget(turn_limit=1_000, tool_limits={}, default_limit=1_000)
+        _ = budget.apply("run_python_file", "a" * 950)
+        result = budget.apply("run_python_file", "b" * 500)
+        self.assertIn("withheld", result)
+        self.assertNotIn("b", result.replace("budget", ""))
+
+    def test_just_above_threshold(self) -> None:
+        """Test that a truncated result never outgrows its limit or overdraws the turn budget."""
+        budget = OutputBudget(turn_limit=420, tool_limits={}, default_limit=10_000)
+        result = budget.apply("run_python_file", "x\n" * 1_000)
+        self.assertIn("withheld", result)
+        self.assertGreaterEqual(budget.remaining, 0)
+
+        budget = OutputBudget(turn_limit=700, tool_limits={}, default_limit=10_000)
+        result = budget.apply("run_python_file", "x\n" * 1_000)
+        self.assertIn("omitted", result)
+        self.assertLessEqual(len(result), 700)
+        self.assertGreaterEqual(budget.remaining, 0)
+
+    def test_small_tool_cap_is_not_budget_exhaustion(self) -> None:
+        """Test that a per-tool cap too small for a fragment says so, rather than blaming the turn budget."""
+        budget = OutputBudget(turn_limit=100_000, tool_limits={"get_files_info": 100}, default_limit=10_000)
+        result = budget.apply("get_files_info", "entry\n" * 100)
+        self.assertIn("capped at 100 characters", result)
+        self.assertNotIn("used up", result)
+
+    def test_traceback_keeps_error(self) -> None:
+        """Test that truncating a traceback keeps the final error line."""
+        frames = "".join(f'  File "mod{i}.py", line {i}, in f{i}\n    call()\n' for i in range(500))
+        text = "STDOUT: noise\n" * 200 + "Traceback (most recent call last):\n" + frames + "ValueError: boom\n"
+        result = truncate_output(text, 2_000)
+        print(result)
+        self.assertLess(len(result), 2_100)
+        self.assertIn("ValueError: boom", result)
+        self.assertIn("omitted", result)
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
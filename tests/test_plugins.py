@@ -0,0 +1,98 @@
+import ast
+import inspect
+import sys
+import unittest
+from importlib.metadata import EntryPoint
+from typing import Literal, Optional
+from unittest.mock import patch
+
+from google.genai import types
+
+from ai_agent.constants import PLUGIN_ENTRY_POINT_GROUP
+from ai_agent.discovery import discover_tools, generate_schema
+from ai_agent.exceptions import PluginLoadError
+from ai_agent.plugins import LazyTool, _resolve_annotation, discover_plugin_tools  # pyright: ignore[reportPrivateUsage]
+
+from .utils import WORKING_DIR
+
+PLUGIN_MODULE = "tests.plugin_tool"
+
+
+def fake_entry_points(group: str) -> list[EntryPoint]:
+    """Entry points as an installed plugin distribution would register them."""
+    if group != PLUGIN_ENTRY_POINT_GROUP:
+        return []
+    return [
+        EntryPoint(name="shout", value=f"{PLUGIN_MODULE}:shout", group=group),
+        EntryPoint(name="missing", value=f"{PLUGIN_MODULE}:does_not_exist", group=group),
+    ]
+
+
+@patch("importlib.metadata.entry_points", fake_entry_points)
+class TestPlugins(unittest.TestCase):
+    """Test suite for entry point plugin tools."""
+
+    def setUp(self) -> None:
+        """Make sure every test starts with the plugin module unimported."""
+        _ = sys.modules.pop(PLUGIN_MODULE, None)
+
+    def test_schema_without_import(self) -> None:
+        """Test that a schema is generated from source without importing the plugin."""
+        tools = discover_tools(exclude=["utils"])
+        self.assertIsInstance(tools["shout"], LazyTool)
+        self.assertNotIn("missing", tools)
+
+        schemas = {s.name: s for s in generate_schema(tools, banned_args=["working_directory"])}
+        self.assertNotIn(PLUGIN_MODULE, sys.modules)
+        shout = schemas["shout"]
+        self.assertEqual(shout.description, "Repeats text in upper case.")
+        assert shout.parameters and shout.parameters.properties
+        self.assertEqual(shout.parameters.properties["times"].type, types.Type.INTEGER)
+
+    def test_import_on_first_call(self) -> None:
+        """Test that the plugin module is imported only when the tool is called."""
+        tool = discover_plugin_tools()["shout"]
+        self.assertFalse(tool.loaded)
+        self.assertEqual(tool(str(WORKING_DIR), "hi", times=2), "HI HI")
+        self.assertTrue(tool.loaded)
+        self.assertIn(PLUGIN_MODULE, sys.modules)
+
+    def test_import_error_is_load_error(self) -> None:
+        """Test that any exception raised while importing a plugin becomes a PluginLoadError."""
+        tool = LazyTool("broken", PLUGIN_MODULE, "shout", "", inspect.Signature())
+        with (
+            patch("importlib.import_module", side_effect=SyntaxError("invalid syntax")),
+            self.assertRaises(PluginLoadError) as context,
+        ):
+            _ = tool(str(WORKING_DIR), "hi")
+        self.assertIn("SyntaxError", str(context.exception))
+        self.assertFalse(tool.loaded)
+
+    def test_broken_plugin_is_skipped(self) -> None:
+        """Test that any exception while reading a plugin's source skips that plugin instead of failing discovery."""
+        with (
+            patch("importlib.util.find_spec", side_effect=RuntimeError("parent package failed")),
+            self.assertLogs("ai_agent.plugins", level="ERROR") as logs,
+        ):
+            self.assertEqual(discover_plugin_tools(), {})
+        self.assertIn("Skipping plugin tool 'shout'", logs.output[0])
+
+    def test_annotations_resolved_without_eval(self) -> None:
+        """Test that plugin annotations are resolved from their syntax tree, and anything else stays source text."""
+        cases = {
+            "list[str]": list[str],
+            "str | None": str | None,
+            "None | int": None | int,
+            '"dict[str, int]"': dict[str, int],
+            'Literal["a", "b"]': Literal["a", "b"],
+            "typing.Optional[int]": Optional[int],  # noqa: UP045
+            '__import__("os").getcwd()': "__import__('os').getcwd()",
+            "Path": "Path",
+        }
+        for source, expected in cases.items():
+            with self.subTest(source=source):
+                self.assertEqual(_resolve_annotation(ast.parse(source, mode="eval").body), expected)
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
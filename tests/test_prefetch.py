@@ -0,0 +1,57 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from ai_agent.prefetch import Prefetcher
+
+
+class TestPrefetch(unittest.TestCase):
+    """Test suite for the background prefetcher."""
+
+    def setUp(self) -> None:
+        """Create a scratch directory with a few files."""
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        _ = (self.root / "a.py").write_text("print('a')\n")
+        _ = (self.root / "b.md").write_text("# b\n")
+        _ = (self.root / "big.txt").write_text("x" * 5_000)
+        _ = (self.root / "data.bin").write_bytes(b"\x00\x01")
+        self.prefetcher = Prefetcher(max_bytes=10_000, max_file_bytes=1_000, workers=2)
+
+    def tearDown(self) -> None:
+        """Stop the reader threads and remove the scratch directory."""
+        self.prefetcher.shutdown()
+        self._tmp.cleanup()
+
+    def test_hits_and_skips(self) -> None:
+        """Test that small supported files are served from memory and others are skipped."""
+        queued = self.prefetcher.schedule(sorted(self.root.iterdir()))
+        self.assertEqual(queued, 2)
+        self.assertEqual(self.prefetcher.get(self.root / "a.py"), "print('a')\n")
+        self.assertEqual(self.prefetcher.get(self.root / "b.md"), "# b\n")
+        self.assertIsNone(self.prefetcher.get(self.root / "big.txt"))
+        self.assertEqual(self.prefetcher.stats["hits"], 2)
+        self.assertEqual(self.prefetcher.stats["skipped"], 1)
+        self.assertAlmostEqual(self.prefetcher.hit_rate(), 2 / 3)
+
+    def test_stale_entry_not_served(self) -> None:
+        """Test that a file changed after prefetching is read fresh."""
+        _ = self.prefetcher.schedule([self.root / "a.py"])
+        self.prefetcher.shutdown()
+        _ = (self.root / "a.py").write_text("print('changed')\n")
+        self.assertIsNone(self.prefetcher.get(self.root / "a.py"))
+        self.assertEqual(self.prefetcher.stats["stale"], 1)
+
+    def test_byte_budget_evicts(self) -> None:
+        """Test that the cache never holds more than its byte budget."""
+        prefetcher = Prefetcher(max_bytes=12, max_file_bytes=1_000, workers=1)
+        _ = prefetcher.schedule([self.root / "a.py"])
+        prefetcher.shutdown()
+        _ = prefetcher.schedule([self.root / "b.md"])
+        prefetcher.shutdown()
+        self.assertIsNone(prefetcher.get(self.root / "a.py"))
+        self.assertEqual(prefetcher.stats["evicted"], 1)
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
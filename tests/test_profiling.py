@@ -0,0 +1,63 @@
+import pstats
+import tempfile
+import unittest
+from pathlib import Path
+
+from ai_agent import profiling
+from ai_agent.profiling import Profiler, mark_iteration
+
+
+def build_history(size: int) -> list[str]:
+    """Allocate something the memory report should point at."""
+    return [f"message {index}" * 10 for index in range(size)]
+
+
+class TestProfiler(unittest.TestCase):
+    """Test suite for the --profile reports."""
+
+    def setUp(self) -> None:
+        """Create a scratch directory for the reports."""
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self._tmp.name) / "profile"
+
+    def tearDown(self) -> None:
+        """Remove the scratch directory."""
+        self._tmp.cleanup()
+
+    def test_writes_reports(self) -> None:
+        """Test that a profiled run writes a loadable profile and a report with every section."""
+        with Profiler(self.directory, top=5):
+            mark_iteration("abc", 1)
+            history = build_history(20_000)
+            mark_iteration("abc", 2)
+        self.assertTrue(history)
+
+        stats = pstats.Stats(str(self.directory / "profile.pstats"))
+        self.assertTrue(any(name == "build_history" for _, _, name in stats.stats))  # pyright: ignore[reportAttributeAccessIssue]
+
+        report = (self.directory / "report.txt").read_text(encoding="utf-8")
+        for section in ("Time by phase", "Hot functions by cumulative time", "Hot functions by own time"):
+            self.assertIn(section, report)
+        iterations = report.split("Memory by iteration")[1]
+        self.assertIn("session abc iteration 1", iterations)
+        growth = iterations.split("session abc iteration 2")[1].split("end of run")[0]
+        self.assertIn("test_profiling.py", growth)
+        self.assertIn("Largest live allocations", report)
+
+    def test_inactive_outside_block(self) -> None:
+        """Test that marking iterations without a profiler is a no-op, also after one has finished."""
+        mark_iteration("abc", 1)
+        with Profiler(self.directory):
+            self.assertIsNotNone(profiling._ACTIVE)  # noqa: SLF001
+        self.assertIsNone(profiling._ACTIVE)  # noqa: SLF001
+        mark_iteration("abc", 2)
+
+    def test_report_written_when_run_fails(self) -> None:
+        """Test that the reports are still written if the profiled run raises."""
+        with self.assertRaises(SystemExit), Profiler(self.directory):
+            raise SystemExit(1)
+        self.assertTrue((self.directory / "report.txt").exists())
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
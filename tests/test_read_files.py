@@ -0,0 +1,79 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from ai_agent.functions.read_files import read_files
+from ai_agent.output_budget import CURRENT_BUDGET, OutputBudget
+
+
+class TestReadFiles(unittest.TestCase):
+    """Test suite for the read_files function."""
+
+    def setUp(self) -> None:
+        """Create a scratch working directory."""
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        (self.root / "pkg").mkdir()
+        _ = (self.root / "main.py").write_text("print('main')\n")
+        _ = (self.root / "pkg" / "a.py").write_text("a = 1\n")
+        _ = (self.root / "pkg" / "b.py").write_text("b = 2\n")
+        _ = (self.root / "big.txt").write_text("line\n" * 2_000)
+        _ = (self.root / "blob.txt").write_bytes(b"\xff\xfe\x00")
+
+    def tearDown(self) -> None:
+        """Remove the scratch directory."""
+        self._tmp.cleanup()
+
+    def read(self, paths: list[str]) -> dict[str, dict[str, object]]:
+        """Call read_files and index its entries by path."""
+        result = json.loads(read_files(str(self.root), paths))
+        return {entry["path"]: entry for entry in result["files"]}
+
+    def test_paths_and_globs(self) -> None:
+        """Test that plain paths and glob matches are read once each, in order."""
+        files = self.read(["main.py", "pkg/*.py", "pkg/a.py"])
+        self.assertEqual(list(files), ["main.py", "pkg/a.py", "pkg/b.py"])
+        self.assertEqual(files["pkg/b.py"]["content"], "b = 2\n")
+        self.assertFalse(files["main.py"]["truncated"])
+        self.assertIsNone(files["main.py"]["error"])
+
+    def test_errors_are_per_file(self) -> None:
+        """Test that a bad entry does not spoil the others."""
+        files = self.read(["main.py", "missing.py", "../outside.txt", "*.rs", "blob.txt"])
+        self.assertEqual(files["main.py"]["content"], "print('main')\n")
+        for bad in ("missing.py", "../outside.txt", "*.rs", "blob.txt"):
+            self.assertTrue(files[bad]["error"], bad)
+
+    def test_shared_budget(self) -> None:
+        """Test that small files are read whole and a large one gets the rest of the budget."""
+        with patch("ai_agent.functions.read_files.TOOL_OUTPUT_LIMIT", 2_000):
+            document = read_files(str(self.root), ["main.py", "big.txt", "pkg/a.py"])
+        self.assertLessEqual(len(document), 2_000)
+        files = {entry["path"]: entry for entry in json.loads(document)["files"]}
+        self.assertEqual(files["pkg/a.py"]["content"], "a = 1\n")
+        self.assertTrue(files["big.txt"]["truncated"])
+        self.assertEqual(files["big.txt"]["next_offset"], len(files["big.txt"]["content"]))
+
+    def test_fits_turn_budget(self) -> None:
+        """Test that read_files fits what is left of the turn's output budget, and stays valid JSON."""
+        budget = OutputBudget(turn_limit=1_500, tool_limits={}, default_limit=50_000)
+        token = CURRENT_BUDGET.set(budget)
+        try:
+            document = read_files(str(self.root), ["main.py", "big.txt"])
+        finally:
+            CURRENT_BUDGET.reset(token)
+        self.assertLessEqual(len(document), 1_500)
+        self.assertEqual(budget.apply("read_files", document), document)
+        files = {entry["path"]: entry for entry in json.loads(document)["files"]}
+        self.assertTrue(files["big.txt"]["truncated"])
+        self.assertIn("next_offset", files["big.txt"])
+
+    def test_no_match(self) -> None:
+        """Test an empty request."""
+        self.assertEqual(read_files(str(self.root), []), "Error: no files matched")
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
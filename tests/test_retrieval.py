@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from ai_agent.retrieval import BM25Index, build_context, chunk_text, tokenize
+
+
+class TestRetrieval(unittest.TestCase):
+    """Test suite for the BM25 retrieval index."""
+
+    def setUp(self) -> None:
+        """Create a scratch working directory and state directory."""
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name) / "work"
+        self.state = Path(self._tmp.name) / "state"
+        (self.root / "pkg").mkdir(parents=True)
+        _ = (self.root / "pkg" / "render.py").write_text("def render_box(expression, result):\n    return expression\n")
+        _ = (self.root / "pkg" / "calculator.py").write_text("class Calculator:\n    def evaluate(self): ...\n")
+        _ = (self.root / "notes.md").write_text("Nothing about boxes here.\n")
+        _ = (self.root / "data.bin").write_bytes(b"render_box")
+
+    def tearDown(self) -> None:
+        """Remove the scratch directories."""
+        self._tmp.cleanup()
+
+    def test_tokenize_splits_identifiers(self) -> None:
+        """Test that identifiers yield themselves and their parts."""
+        self.assertEqual(tokenize("renderBox(x_1)"), ["renderbox", "render", "box", "x_1", "x", "1"])
+
+    def test_chunk_text(self) -> None:
+        """Test that chunks cover whole lines and skip empty ones."""
+        chunks = chunk_text("a\nb\n\n\nc d\n", chunk_lines=2)
+        self.assertEqual([(c["start"], c["end"]) for c in chunks], [(1, 2), (5, 5)])
+        self.assertEqual(chunks[1]["terms"], {"c": 1, "d": 1})
+
+    def test_search_ranks_matching_chunk_first(self) -> None:
+        """Test that the chunk sharing the rarest terms wins and binary files are ignored."""
+        index = BM25Index(self.root, self.state)
+        self.assertEqual(index.update(), (3, 0))
+        hits = index.search("where is the render box function?")
+        self.assertEqual(hits[0].path, "pkg/render.py")
+        self.assertNotIn("data.bin", {hit.path for hit in hits})
+        self.assertEqual(index.search("zzz"), [])
+
+    def test_incremental_update_and_persistence(self) -> None:
+        """Test that only changed files are re-indexed, across saves and loads."""
+        index = BM25Index(self.root, self.state)
+        _ = index.update()
+        index.save()
+
+        reloaded = BM25Index(self.root, self.state)
+        self.assertEqual(set(reloaded.files), set(index.files))
+        self.assertEqual(reloaded.update(), (0, 0))
+
+        calculator = self.root / "pkg" / "calculator.py"
+        _ = calculator.write_text("class Calculator:\n    def tokenize(self): ...\n")
+        os.utime(calculator, ns=(1, 1))
+        (self.root / "notes.md").unlink()
+        self.assertEqual(reloaded.update(), (1, 1))
+        self.assertEqual(reloaded.search("tokenize")[0].path, "pkg/calculator.py")
+
+    def test_build_context_respects_cap(self) -> None:
+        """Test that snippets are formatted with their location and kept under the token cap."""
+        _ = (self.root / "long.txt").write_text("render box\n" * 400)
+        context = build_context("render box", str(self.root), token_cap=50, state_directory=self.state)
+        self.assertIn("--- ", context)
+        self.assertLessEqual(len(context), 50 * 4 + 40)
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
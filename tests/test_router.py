@@ -0,0 +1,129 @@
+import functools
+import io
+import unittest
+from contextlib import redirect_stdout
+from typing import cast
+from unittest.mock import patch
+
+from google import genai
+from google.genai import types
+
+from ai_agent.agent import AVAILABLE_FUNCTIONS, run_session
+from ai_agent.functions.list_tools import list_tools
+from ai_agent.router import CURRENT_ROUTER, ToolRouter
+
+from .fakes import FakeClient, call_response, text_response
+from .utils import WORKING_DIR
+
+PLUGIN_TOOLS = {
+    "convert_csv_to_json": "Converts a csv spreadsheet into a list of json records.",
+    "deploy_service": "Deploys the service to the staging cluster.",
+    "send_email": "Sends an email message to a recipient.",
+    "resize_image": "Resizes a png or jpeg image to the given width.",
+    "query_database": "Runs a read-only sql query against the project database.",
+    "translate_text": "Translates text into another language.",
+    "lint_code": "Runs the linter over python files and reports style problems.",
+    "fetch_url": "Downloads a web page and returns its text.",
+}
+
+
+def catalogue() -> types.Tool:
+    """The built-in tools plus enough plugin-like tools to need routing."""
+    extra = [types.FunctionDeclaration(name=name, description=doc) for name, doc in PLUGIN_TOOLS.items()]
+    return types.Tool(function_declarations=[*(AVAILABLE_FUNCTIONS.function_declarations or []), *extra])
+
+
+def names(tool: types.Tool) -> list[str]:
+    """Names of the declarations of a tool."""
+    return [declaration.name or "" for declaration in tool.function_declarations or []]
+
+
+def user(text: str) -> types.Content:
+    """A user message."""
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+class TestToolRouter(unittest.TestCase):
+    """Test suite for per-turn tool selection."""
+
+    def test_small_catalogue_offered_whole(self) -> None:
+        """Test that a catalogue within the limit is offered as is."""
+        router = ToolRouter(AVAILABLE_FUNCTIONS, max_tools=100)
+        self.assertIs(router.select([user("anything")]), AVAILABLE_FUNCTIONS)
+
+    def test_catalogue_without_escape_hatch_offered_whole(self) -> None:
+        """Test that tools are not hidden when the model could not find them again."""
+        tool = types.Tool(
+            function_declarations=[d for d in catalogue().function_declarations or [] if d.name != "list_tools"]
+        )
+        self.assertIs(ToolRouter(tool, max_tools=6).select([user("anything")]), tool)
+
+    def test_core_tools_and_lexical_match(self) -> None:
+        """Test that the core tools are always offered and the best matching tool fills a free slot."""
+        router = ToolRouter(catalogue(), max_tools=6)
+        offered = names(router.select([user("please convert data.csv to json")]))
+        self.assertEqual(len(offered), 6)
+        for core in ("get_file_content", "get_files_info", "list_tools", "run_python_file", "write_file"):
+            self.assertIn(core, offered)
+        self.assertIn("convert_csv_to_json", offered)
+
+    def test_selection_reused_while_unchanged(self) -> None:
+        """Test that an unchanged selection returns the same tool object."""
+        router = ToolRouter(catalogue(), max_tools=6)
+        first = router.select([user("deploy the service")])
+        self.assertIs(router.select([user("deploy the service")]), first)
+        self.assertIn("deploy_service", names(first))
+
+    def test_recent_calls_stay_offered(self) -> None:
+        """Test that a tool the model just called is still offered when the conversation moved on."""
+        router = ToolRouter(catalogue(), max_tools=6)
+        messages = [
+            user("hello"),
+            types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(name="send_email"))]),
+            types.Content(role="tool", parts=[types.Part.from_function_response(name="send_email", response={})]),
+        ]
+        self.assertIn("send_email", names(router.select(messages)))
+
+    def test_list_tools_unlocks_tools(self) -> None:
+        """Test that list_tools lists tools that are not offered and offers them from the next turn."""
+        client = FakeClient(
+            [
+                call_response([("list_tools", {"query": "resize an image"})]),
+                text_response("done"),
+            ]
+        )
+        router = functools.partial(ToolRouter, max_tools=12)
+        with redirect_stdout(io.StringIO()), patch("ai_agent.agent.ToolRouter", router):
+            answer = run_session(
+                cast("genai.Client", client), "make the logo smaller", verbose=False, tools=catalogue()
+            )
+        self.assertEqual(answer, "done")
+
+        first, second = client.models.requests
+        self.assertNotIn("resize_image", names(first["config"].tools[0]))
+        self.assertIn("resize_image", names(second["config"].tools[0]))
+        self.assertIn("Resizes a png or jpeg image", second["config"].system_instruction)
+        result = second["contents"][-1].parts[0].function_response.response["result"]
+        self.assertIn("- resize_image: Resizes a png or jpeg image", result)
+
+    def test_list_tools_lists_only_what_fits(self) -> None:
+        """Test that list_tools unlocks no more tools than fit next to the core tools, and all of them are offered."""
+        router = ToolRouter(catalogue(), max_tools=8)
+        messages = [user("send the report")]
+        _ = router.select(messages)
+        token = CURRENT_ROUTER.set(router)
+        try:
+            result = list_tools(str(WORKING_DIR))
+        finally:
+            CURRENT_ROUTER.reset(token)
+        listed = [line[2:].split(":")[0] for line in result.splitlines()[1:]]
+        self.assertEqual(len(listed), router.free_slots)
+        self.assertTrue(set(listed) <= set(names(router.select(messages))))
+
+    def test_list_tools_outside_session(self) -> None:
+        """Test that list_tools needs a session."""
+        self.assertTrue(list_tools(str(WORKING_DIR)).startswith("Error:"))
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
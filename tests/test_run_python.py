@@ -18,6 +18,11 @@ class TestRunPython(unittest.TestCase):
         print(result)
         self.assertIn("8", result)
 
+    def test_non_string_args(self) -> None:
+        result = run_python_file(WORKING_DIR, "calc.py", [3, "+", 5])
+        self.assertIn("8", result)
+        self.assertNotIn("Error", result)
+
     def test_parent(self) -> None:
         result = run_python_file(WORKING_DIR, "../main.py")
         print(result)
@@ -0,0 +1,135 @@
+import io
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import cast
+from unittest.mock import patch
+
+from google import genai
+from google.genai import types
+
+from ai_agent.agent import run_agent
+from ai_agent.exceptions import SessionNotFoundError
+from ai_agent.functions.load_session_output import load_session_output
+from ai_agent.sessions import SessionStore
+
+from .fakes import FakeClient, call_response, text_response
+
+
+def tool_message(result: str) -> types.Content:
+    """A tool message with one result."""
+    return types.Content(
+        role="tool", parts=[types.Part.from_function_response(name="get_file_content", response={"result": result})]
+    )
+
+
+def history(*results: str) -> list[types.Content]:
+    """A prompt followed by one call and tool message per result."""
+    messages = [types.Content(role="user", parts=[types.Part(text="read it")])]
+    for result in results:
+        call = types.FunctionCall(name="get_file_content", args={"file_path": "a.txt"})
+        messages.extend((types.Content(role="model", parts=[types.Part(function_call=call)]), tool_message(result)))
+    return messages
+
+
+def result_of(content: types.Content) -> object:
+    """The result of a tool message."""
+    assert content.parts
+    assert content.parts[0].function_response
+    return (content.parts[0].function_response.response or {})["result"]
+
+
+class TestSessionStore(unittest.TestCase):
+    """Test suite for the on-disk session log."""
+
+    def setUp(self) -> None:
+        """Create a store in a temporary directory."""
+        self.directory = Path(tempfile.mkdtemp())
+        self.store = SessionStore(self.directory, min_chars=100)
+
+    def test_round_trip_with_lazy_payloads(self) -> None:
+        """Test that a resumed history has the last payload, and older payloads stay on disk."""
+        first, second = "a" * 500, "b" * 500
+        messages = history(first, second, "short")
+        log = self.store.open("s1")
+        self.assertEqual(log.sync(messages[:3]), 3)
+        self.assertEqual(log.sync(messages), 4)
+        self.assertEqual(log.sync(messages), 0)
+
+        resumed, resumed_log = self.store.resume("s1", payloads=2)
+        self.assertEqual(len(resumed), len(messages))
+        self.assertEqual(resumed_log.logged, len(messages))
+        note, *loaded = [result_of(m) for m in resumed if m.role == "tool"]
+        self.assertEqual(loaded, [second, "short"])
+        self.assertNotIn("a" * 100, log.path.read_text(encoding="utf-8"))
+
+        ref = str(note).split('ref="')[1].split('"')[0]
+        self.assertEqual(self.store.load(ref), first)
+        with patch("ai_agent.functions.load_session_output.SESSION_STORE", self.store):
+            self.assertEqual(load_session_output("", ref), first)
+            self.assertTrue(load_session_output("", "../../etc/passwd").startswith("Error:"))
+
+    def test_payloads_stored_once(self) -> None:
+        """Test that identical payloads share one blob, across sessions too."""
+        payload = "same output " * 50
+        _ = self.store.open("s1").sync(history(payload, payload))
+        _ = self.store.open("s2").sync(history(payload))
+        blobs = [path for path in (self.directory / "blobs").rglob("*") if path.is_file()]
+        self.assertEqual(len(blobs), 1)
+        self.assertLess(blobs[0].stat().st_size, len(payload))
+
+    def test_cut_off_line_skipped(self) -> None:
+        """Test that a line cut short by a crash does not prevent resuming."""
+        log = self.store.open("s1")
+        _ = log.sync(history("x"))
+        with log.path.open("a", encoding="utf-8") as file:
+            _ = file.write('{"role":"model","parts":[{"te')
+        resumed, _ = self.store.resume("s1")
+        self.assertEqual(len(resumed), 3)
+
+    def test_unknown_session(self) -> None:
+        """Test that resuming a session without a log fails."""
+        with self.assertRaises(SessionNotFoundError):
+            _ = self.store.resume("missing")
+
+    def test_invalid_session_id(self) -> None:
+        """Test that an id that is not a plain name cannot reach a file outside the store."""
+        outside = self.directory.parent / "outside.jsonl"
+        _ = outside.write_text('{"role":"user","parts":[{"text":"hi"}]}\n', encoding="utf-8")
+        self.addCleanup(outside.unlink)
+        for session_id in ("../outside", "a/b", "", "x.y"):
+            with self.subTest(session_id=session_id), self.assertRaises(SessionNotFoundError):
+                _ = self.store.resume(session_id)
+
+    def test_resume_through_run_agent(self) -> None:
+        """Test that a follow-up question is sent with the saved history and appended to the same log."""
+        client = FakeClient([call_response([("get_files_info", {"directory": "."})]), text_response("3 files")])
+        out = io.StringIO()
+        with patch("ai_agent.agent.SESSION_STORE", self.store), redirect_stdout(out):
+            run_agent("list the files", verbose=False, client=cast("genai.Client", client))
+        session_id = out.getvalue().split("--resume ")[-1].strip()
+
+        follow_up = FakeClient([text_response("the biggest is main.py")])
+        with patch("ai_agent.agent.SESSION_STORE", self.store), redirect_stdout(io.StringIO()):
+            run_agent("which is biggest?", verbose=False, client=cast("genai.Client", follow_up), resume=session_id)
+
+        contents = follow_up.models.requests[0]["contents"]
+        self.assertEqual([c.role for c in contents], ["user", "model", "tool", "model", "user"])
+        self.assertEqual(contents[-1].parts[0].text, "which is biggest?")
+        resumed, _ = self.store.resume(session_id)
+        self.assertEqual(len(resumed), 6)
+        self.assertEqual(self.store.log_path(session_id).read_text(encoding="utf-8").count('"session"'), 1)
+
+    def test_resume_unknown_through_run_agent(self) -> None:
+        """Test that run_agent reports an unknown session instead of starting a new one."""
+        client = FakeClient([])
+        out = io.StringIO()
+        with patch("ai_agent.agent.SESSION_STORE", self.store), redirect_stdout(out):
+            run_agent("hello", verbose=False, client=cast("genai.Client", client), resume="missing")
+        self.assertIn("No saved session 'missing'", out.getvalue())
+        self.assertEqual(client.models.requests, [])
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
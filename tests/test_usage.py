@@ -0,0 +1,68 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+from typing import cast
+
+from google import genai
+from google.genai import types
+
+from ai_agent.agent import run_agent
+from ai_agent.history import COMPACTED_NOTE, compact_history
+from ai_agent.usage import BudgetDecision, UsageLedger
+
+from .fakes import FakeClient, call_response, text_response, usage
+
+
+class TestUsageLedger(unittest.TestCase):
+    """Test suite for session token accounting."""
+
+    def test_accumulates_per_model(self) -> None:
+        """Test that usage adds up per model and in total."""
+        ledger = UsageLedger()
+        ledger.record("gemini-2.0-flash-001", usage(100, 10, cached=40), prompt_chars=400)
+        ledger.record("gemini-2.0-flash-001", usage(200, 20), prompt_chars=800)
+        ledger.record("other-model", usage(50, 5), prompt_chars=200)
+        model = ledger.models["gemini-2.0-flash-001"]
+        self.assertEqual((model.calls, model.prompt_tokens, model.candidate_tokens, model.cached_tokens), (2, 300, 30, 40))
+        self.assertEqual(ledger.total_tokens, 385)
+        self.assertGreater(ledger.total_cost, 0)
+        self.assertIn("total: tokens=385", ledger.summary())
+
+    def test_projection_stops_before_ceiling(self) -> None:
+        """Test that the check fails on the projected next request, not after it is sent."""
+        ledger = UsageLedger(max_tokens=1_000)
+        ledger.record("m", usage(500, 50), prompt_chars=2_000)
+        small = [types.Content(role="user", parts=[types.Part(text="x" * 400)])]
+        large = [types.Content(role="user", parts=[types.Part(text="x" * 4_000)])]
+        self.assertIs(ledger.check("m", small), BudgetDecision.CONTINUE)
+        self.assertIs(ledger.check("m", large), BudgetDecision.COMPACT)
+        self.assertIs(ledger.check("m", large, can_compact=False), BudgetDecision.STOP)
+
+    def test_compact_history(self) -> None:
+        """Test that older tool payloads are replaced and the latest is kept."""
+        messages = [
+            types.Content(role="tool", parts=[types.Part.from_function_response(name="a", response={"result": "1" * 500})]),
+            types.Content(role="tool", parts=[types.Part.from_function_response(name="b", response={"result": "2" * 500})]),
+        ]
+        removed = compact_history(messages)
+        self.assertGreater(removed, 0)
+        first = messages[0].parts[0].function_response  # pyright: ignore[reportOptionalSubscript]
+        last = messages[1].parts[0].function_response  # pyright: ignore[reportOptionalSubscript]
+        self.assertEqual(first.response, {"result": COMPACTED_NOTE})  # pyright: ignore[reportOptionalMemberAccess]
+        self.assertEqual(last.response, {"result": "2" * 500})  # pyright: ignore[reportOptionalMemberAccess]
+
+    def test_run_agent_reports_totals(self) -> None:
+        """Test that a session prints its totals with the offline client."""
+        client = FakeClient(
+            [call_response([("calculate", {"expressions": ["3 + 5"]})], 100, 10), text_response("8", 150, 5)]
+        )
+        out = io.StringIO()
+        with redirect_stdout(out):
+            run_agent("what is 3 + 5", verbose=True, client=cast("genai.Client", client))
+        print(out.getvalue())
+        self.assertIn("Final response:", out.getvalue())
+        self.assertIn("total: tokens=265", out.getvalue())
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
@@ -0,0 +1,102 @@
+import enum
+import inspect
+import unittest
+from typing import Literal
+
+from google.genai import types
+
+from ai_agent.agent import call_function
+from ai_agent.exceptions import ArgumentValidationError
+from ai_agent.validation import ArgumentValidator
+
+
+def sample_tool(
+    working_directory: str,
+    path: str,
+    count: int = 1,
+    ratio: float = 0.5,
+    args: list[str] | None = None,
+    mode: Literal["fast", "slow"] = "fast",
+    force: bool = False,
+) -> str:
+    """Tool used only to build a validator."""
+    return f"{working_directory}{path}{count}{ratio}{args}{mode}{force}"
+
+
+class Color(enum.Enum):
+    """Colors for the paint tool."""
+
+    RED = "red"
+    BLUE = "blue"
+
+
+def pick(key: str | int, level: Literal[1, 2] = 1) -> str:
+    """Tool used only to build a validator with a union and an int Literal."""
+    return f"{key}{level}"
+
+
+def paint(color: Color) -> str:
+    """Tool used only to build a validator with an Enum parameter."""
+    return color.value
+
+
+class TestValidation(unittest.TestCase):
+    """Test suite for argument validation and coercion."""
+
+    def setUp(self) -> None:
+        """Compile a validator for the sample tool."""
+        self.validator = ArgumentValidator(
+            "sample_tool", inspect.signature(sample_tool), injected_args=["working_directory"]
+        )
+
+    def test_coercion(self) -> None:
+        """Test that unambiguous values are coerced to the annotated types."""
+        result = self.validator(
+            {"path": 7, "count": "5", "ratio": "2", "args": "only", "force": "true", "working_directory": "/"}
+        )
+        self.assertEqual(result, {"path": "7", "count": 5, "ratio": 2.0, "args": ["only"], "force": True})
+
+    def test_json_list_and_none(self) -> None:
+        """Test that JSON encoded lists are decoded and None is kept for optional arguments."""
+        self.assertEqual(self.validator({"path": "a", "args": '["1", "2"]'})["args"], ["1", "2"])
+        self.assertIsNone(self.validator({"path": "a", "args": None})["args"])
+        self.assertEqual(self.validator({"path": "a", "count": 3.0})["count"], 3)
+
+    def test_structured_errors(self) -> None:
+        """Test that unknown, missing and badly typed arguments are all reported together."""
+        with self.assertRaises(ArgumentValidationError) as context:
+            _ = self.validator({"count": "many", "mode": "turbo", "colour": "red"})
+        errors = context.exception.errors
+        self.assertEqual(set(errors), {"path", "count", "mode", "colour"})
+        self.assertIn("missing", errors["path"])
+        self.assertIn("unknown", errors["colour"])
+
+    def test_enum_values(self) -> None:
+        """Test that Enum parameters accept their values or names and reject anything else."""
+        validator = ArgumentValidator("paint", inspect.signature(paint))
+        self.assertIs(validator({"color": "blue"})["color"], Color.BLUE)
+        self.assertIs(validator({"color": "RED"})["color"], Color.RED)
+        with self.assertRaises(ArgumentValidationError):
+            _ = validator({"color": "green"})
+
+    def test_union_prefers_exact_member(self) -> None:
+        """Test that a value matching a union member as is keeps its type, and Literal choices are coerced."""
+        validator = ArgumentValidator("pick", inspect.signature(pick))
+        self.assertEqual(validator({"key": 5}), {"key": 5})
+        self.assertEqual(validator({"key": "5"}), {"key": "5"})
+        self.assertEqual(validator({"key": "a", "level": "2"})["level"], 2)
+        with self.assertRaises(ArgumentValidationError):
+            _ = validator({"key": "a", "level": "3"})
+
+    def test_call_function_returns_error(self) -> None:
+        """Test that call_function reports invalid arguments to the model instead of raising."""
+        call = types.FunctionCall(name="get_file_content", args={"path": "main.py"})
+        content = call_function(call)
+        assert content.parts and content.parts[0].function_response
+        response = content.parts[0].function_response.response or {}
+        self.assertIn("error", response)
+        self.assertIn("file_path", response["details"])
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
@@ -0,0 +1,134 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from ai_agent.functions.get_workspace_changes import get_workspace_changes
+from ai_agent.workspace import WorkspaceSnapshot
+
+
+class TestWorkspaceSnapshot(unittest.TestCase):
+    """Test suite for the incrementally maintained workspace snapshot."""
+
+    def setUp(self) -> None:
+        """Create a scratch directory with a small tree."""
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        _ = (self.root / "a.txt").write_text("a")
+        (self.root / "pkg").mkdir()
+        _ = (self.root / "pkg" / "b.py").write_text("b = 1\n")
+        (self.root / "__pycache__").mkdir()
+
+    def tearDown(self) -> None:
+        """Remove the scratch directory."""
+        self._tmp.cleanup()
+
+    def check_deltas(self, use_inotify: bool) -> None:
+        """Make a few changes and check the delta reported for them."""
+        snapshot = WorkspaceSnapshot(self.root, use_inotify=use_inotify)
+        self.addCleanup(snapshot.close)
+        self.assertEqual(set(snapshot.entries), {"a.txt", "pkg", "pkg/b.py"})
+        token = snapshot.token
+
+        _ = (self.root / "a.txt").write_text("changed")
+        (self.root / "pkg" / "b.py").unlink()
+        (self.root / "out").mkdir()
+        _ = (self.root / "out" / "result.csv").write_text("1,2\n")
+        _ = (self.root / "__pycache__" / "x.pyc").write_bytes(b"\0")
+
+        delta = snapshot.changes_since(token)
+        assert delta is not None
+        self.assertEqual(delta.created, ["out", "out/result.csv"])
+        self.assertIn("a.txt", delta.modified)
+        self.assertEqual(delta.deleted, ["pkg/b.py"])
+
+        unchanged = snapshot.changes_since(delta.token)
+        assert unchanged is not None
+        self.assertEqual((unchanged.created, unchanged.deleted), ([], []))
+
+    def test_deltas_polling(self) -> None:
+        """Test deltas when the tree is rescanned on refresh."""
+        self.check_deltas(use_inotify=False)
+
+    def test_deltas_inotify(self) -> None:
+        """Test deltas when the tree is watched with inotify, where available."""
+        self.check_deltas(use_inotify=True)
+
+    def test_created_then_deleted_is_not_reported(self) -> None:
+        """Test that only net changes are reported."""
+        snapshot = WorkspaceSnapshot(self.root, use_inotify=False)
+        token = snapshot.token
+        _ = (self.root / "tmp.txt").write_text("x")
+        snapshot.refresh()
+        (self.root / "tmp.txt").unlink()
+        delta = snapshot.changes_since(token)
+        assert delta is not None
+        self.assertEqual((delta.created, delta.modified, delta.deleted), ([], [], []))
+
+    def test_symlinked_directory_not_walked(self) -> None:
+        """Test that a symlink to a directory outside the workspace is an entry, not a directory to walk."""
+        outside = tempfile.TemporaryDirectory()
+        self.addCleanup(outside.cleanup)
+        _ = (Path(outside.name) / "secret.txt").write_text("s")
+        snapshot = WorkspaceSnapshot(self.root)
+        self.addCleanup(snapshot.close)
+        (self.root / "link").symlink_to(outside.name, target_is_directory=True)
+        snapshot.refresh()
+        self.assertFalse(snapshot.entries["link"].is_dir)
+        self.assertNotIn("link/secret.txt", snapshot.entries)
+
+    def test_moved_directories(self) -> None:
+        """Test that a renamed directory is tracked under its new name, and one moved away is forgotten."""
+        outside = tempfile.TemporaryDirectory()
+        self.addCleanup(outside.cleanup)
+        snapshot = WorkspaceSnapshot(self.root)
+        self.addCleanup(snapshot.close)
+        (self.root / "pkg").rename(self.root / "lib")
+        snapshot.refresh()
+        _ = (self.root / "lib" / "c.py").write_text("c = 3\n")
+        snapshot.refresh()
+        self.assertLessEqual({"lib", "lib/b.py", "lib/c.py"}, set(snapshot.entries))
+        self.assertFalse([path for path in snapshot.entries if path.startswith("pkg")])
+
+        (self.root / "lib").rename(Path(outside.name) / "lib")
+        (self.root / "lib").mkdir()
+        snapshot.refresh()
+        _ = (Path(outside.name) / "lib" / "d.py").write_text("d = 4\n")
+        snapshot.refresh()
+        self.assertEqual([path for path in snapshot.entries if path.startswith("lib")], ["lib"])
+
+    def test_recreated_directory(self) -> None:
+        """Test that a directory deleted and created again between refreshes is still watched."""
+        snapshot = WorkspaceSnapshot(self.root)
+        self.addCleanup(snapshot.close)
+        token = snapshot.token
+        shutil.rmtree(self.root / "pkg")
+        (self.root / "pkg").mkdir()
+        snapshot.refresh()
+        _ = (self.root / "pkg" / "new.py").write_text("new = 1\n")
+
+        delta = snapshot.changes_since(token)
+        assert delta is not None
+        self.assertEqual(delta.created, ["pkg/new.py"])
+        self.assertEqual(delta.deleted, ["pkg/b.py"])
+
+    def test_unknown_token(self) -> None:
+        """Test that tokens of another snapshot, or from the future, are rejected."""
+        snapshot = WorkspaceSnapshot(self.root, use_inotify=False)
+        self.assertIsNone(snapshot.changes_since("deadbeef:0"))
+        self.assertIsNone(snapshot.changes_since(snapshot.token.replace(":0", ":99")))
+
+    def test_tool(self) -> None:
+        """Test the agent-facing tool end to end."""
+        baseline = get_workspace_changes(str(self.root))
+        self.assertIn("2 files in 1 directories", baseline)
+        token = baseline.splitlines()[0].removeprefix("token=")
+
+        _ = (self.root / "new.md").write_text("# new\n")
+        result = get_workspace_changes(str(self.root), token)
+        self.assertIn("+ new.md: file_size=6 bytes, is_dir=False", result)
+        self.assertTrue(get_workspace_changes(str(self.root), "bogus").startswith("Error:"))
+
+
+if __name__ == "__main__":
+    _ = unittest.main()
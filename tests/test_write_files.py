@@ -0,0 +1,68 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from ai_agent.functions.write_files import write_files
+
+
+class TestWriteFiles(unittest.TestCase):
+    """Test suite for the transactional write_files function."""
+
+    def setUp(self) -> None:
+        """Create a scratch working directory with one existing file."""
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.existing = self.root / "main.py"
+        _ = self.existing.write_text("old\n")
+        self.existing.chmod(0o755)
+
+    def tearDown(self) -> None:
+        """Remove the scratch directory."""
+        self._tmp.cleanup()
+
+    def listing(self) -> set[str]:
+        """Every path under the working directory, including hidden staging files."""
+        return {path.relative_to(self.root).as_posix() for path in self.root.rglob("*")}
+
+    def test_writes_all_files(self) -> None:
+        """Test that new and existing files are written and nothing is left behind."""
+        result = write_files(str(self.root), ["main.py", "pkg/new.py"], ["new\n", "x = 1\n"])
+        self.assertTrue(result.startswith("Successfully wrote 2 files"), result)
+        self.assertEqual(self.existing.read_text(), "new\n")
+        self.assertEqual((self.root / "pkg" / "new.py").read_text(), "x = 1\n")
+        self.assertEqual(self.existing.stat().st_mode & 0o777, 0o755)
+        self.assertEqual(self.listing(), {"main.py", "pkg", "pkg/new.py"})
+
+    def test_invalid_path_writes_nothing(self) -> None:
+        """Test that one bad path rejects the whole batch before anything is staged."""
+        result = write_files(str(self.root), ["main.py", "../escape.py", "a.py"], ["new\n", "x", "y"])
+        self.assertTrue(result.startswith("Error: nothing was written"), result)
+        self.assertIn("../escape.py", result)
+        self.assertEqual(self.existing.read_text(), "old\n")
+        self.assertEqual(self.listing(), {"main.py"})
+
+    def test_mismatched_lengths(self) -> None:
+        """Test that paths and contents must pair up."""
+        self.assertTrue(write_files(str(self.root), ["a.py", "b.py"], ["x"]).startswith("Error:"))
+
+    def test_failed_rename_rolls_back(self) -> None:
+        """Test that a failure while committing restores every file already replaced."""
+        real_replace = Path.replace
+
+        def flaky_replace(source: Path, target: Path) -> Path:
+            if target.name == "b.py":
+                msg = "disk full"
+                raise OSError(msg)
+            return real_replace(source, target)
+
+        with patch.object(Path, "replace", autospec=True, side_effect=flaky_replace):
+            result = write_files(str(self.root), ["main.py", "dir/b.py"], ["new\n", "b\n"])
+
+        self.assertIn("disk full", result)
+        self.assertEqual(self.existing.read_text(), "old\n")
+        self.assertEqual(self.listing(), {"main.py"})
+
+
+if __name__ == "__main__":
+    _ = unittest.main()